@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime
 import os
 import logging
@@ -16,9 +17,10 @@ logger = logging.getLogger(__name__)
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
 @router.post("/register", response_model=OTPResponse)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    result = await db.execute(select(User).where(User.email == user.email))
+    db_user = result.scalars().first()
     if db_user:
         logger.warning(f"Registration attempt with existing email: {user.email}")
         raise HTTPException(
@@ -36,11 +38,11 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
         is_verified=False
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     # Cleanup old/expired OTPs
-    deleted = otp_service.cleanup_expired_otps(db)
+    deleted = await otp_service.cleanup_expired_otps(db)
     if deleted > 0:
         logger.info(f"Cleaned up {deleted} expired/used OTP tokens")
     
@@ -55,7 +57,7 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
         otp_expires_at=otp_expires_at
     )
     db.add(otp_token)
-    db.commit()
+    await db.commit()
     
     # Send verification email
     email_sent = otp_service.send_verification_email(db_user.name, db_user.email, otp_code)
@@ -68,8 +70,9 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     )
 
 @router.post("/login", response_model=Token)
-async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == user_credentials.email).first()
+async def login_user(user_credentials: UserLogin, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User).where(User.email == user_credentials.email))
+    user = result.scalars().first()
     
     if not user or not verify_password(user_credentials.password, user.hashed_password):
         logger.warning(f"Failed login attempt for email: {user_credentials.email}")
@@ -97,13 +100,14 @@ async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/verify-otp", response_model=OTPResponse)
-async def verify_otp(otp_data: OTPVerify, db: Session = Depends(get_db)):
+async def verify_otp(otp_data: OTPVerify, db: AsyncSession = Depends(get_db)):
     """Verify OTP code and activate user account"""
     
     logger.info(f"OTP verification attempt for: {otp_data.email}")
     
     # Find user
-    user = db.query(User).filter(User.email == otp_data.email).first()
+    result = await db.execute(select(User).where(User.email == otp_data.email))
+    user = result.scalars().first()
     if not user:
         logger.warning(f"OTP verification failed: User not found - {otp_data.email}")
         raise HTTPException(
@@ -112,10 +116,13 @@ async def verify_otp(otp_data: OTPVerify, db: Session = Depends(get_db)):
         )
     
     # Get latest OTP for user
-    otp_token = db.query(OTPToken).filter(
-        OTPToken.user_id == user.id,
-        OTPToken.is_used == False
-    ).order_by(OTPToken.created_at.desc()).first()
+    result = await db.execute(
+        select(OTPToken).where(
+            OTPToken.user_id == user.id,
+            OTPToken.is_used == False
+        ).order_by(OTPToken.created_at.desc())
+    )
+    otp_token = result.scalars().first()
     
     if not otp_token:
         logger.warning(f"OTP verification failed: No unused OTP found for user {user.email}")
@@ -145,7 +152,7 @@ async def verify_otp(otp_data: OTPVerify, db: Session = Depends(get_db)):
     user.is_verified = True
     otp_token.is_used = True
     
-    db.commit()
+    await db.commit()
     
     logger.info(f"✅ User email verified successfully: {user.email}")
     
@@ -155,11 +162,12 @@ async def verify_otp(otp_data: OTPVerify, db: Session = Depends(get_db)):
     )
 
 @router.post("/resend-otp", response_model=OTPResponse)
-async def resend_otp(otp_data: OTPResend, db: Session = Depends(get_db)):
+async def resend_otp(otp_data: OTPResend, db: AsyncSession = Depends(get_db)):
     """Resend OTP verification code"""
     
     # Find user
-    user = db.query(User).filter(User.email == otp_data.email).first()
+    result = await db.execute(select(User).where(User.email == otp_data.email))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -174,7 +182,7 @@ async def resend_otp(otp_data: OTPResend, db: Session = Depends(get_db)):
         )
     
     # Cleanup old/expired OTPs
-    deleted = otp_service.cleanup_expired_otps(db)
+    deleted = await otp_service.cleanup_expired_otps(db)
     if deleted > 0:
         logger.info(f"Cleaned up {deleted} expired/used OTP tokens")
     
@@ -189,7 +197,7 @@ async def resend_otp(otp_data: OTPResend, db: Session = Depends(get_db)):
         otp_expires_at=otp_expires_at
     )
     db.add(otp_token)
-    db.commit()
+    await db.commit()
     
     # Send email
     email_sent = otp_service.send_resend_email(user.name, user.email, otp_code)
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from fastapi.responses import StreamingResponse, FileResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import StreamingResponse, FileResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, select, delete
 from typing import List, Optional
 from pydantic import BaseModel
 import time
 import json
+import base64
+from datetime import datetime
 import asyncio
 import logging
 
@@ -18,10 +20,14 @@ from app.schemas.chat import (
     ModelStatusResponse
 )
 from app.core.security import get_current_user
+from app.core.tracing import tracer, Trace
+from app.core.metrics import active_sse_streams
 from app.services.llm import llm_service
+from app.services.chat_writer import chat_writer
 from app.services.speech import speech_service
-import tempfile
-import os
+from app.services.tts_cache import tts_cache
+from app.services.canned import canned_responses
+from app.services.voice_pipeline import SentenceSegmenter, SpeechPipeline
 
 class TTSRequest(BaseModel):
     text: str
@@ -34,10 +40,11 @@ logger = logging.getLogger(__name__)
 async def send_chat_message(
     chat: ChatMessageCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Send a message to the AI assistant"""
     start_time = time.time()
+    trace = tracer.start("chat", user_id=current_user.id, use_urdu=chat.use_urdu, stream=False)
     
     try:
         # Generate AI response
@@ -46,28 +53,29 @@ async def send_chat_message(
             user_id=current_user.id,
             db=db,
             use_urdu=chat.use_urdu,
+            trace=trace,
         )
         
         response_time = time.time() - start_time
         model_used = llm_service.urdu_model if chat.use_urdu else llm_service.model_type
         
-        # Save chat to database
-        db_chat = ChatMessage(
-            user_id=current_user.id,
-            message=chat.message,
-            response=ai_response
-        )
-        db.add(db_chat)
-        db.commit()
-        db.refresh(db_chat)
+        # Queue the insert - the batch commit happens off the latency path
+        with trace.span("db.persist"):
+            message_id = await chat_writer.enqueue(
+                user_id=current_user.id,
+                message=chat.message,
+                response=ai_response,
+                model_used=model_used,
+                response_time=round(response_time, 2),
+            )
         
         response = ChatMessageResponse(
-            id=db_chat.id,
-            message=db_chat.message,
-            response=db_chat.response,
+            id=message_id,
+            message=chat.message,
+            response=ai_response,
             model_used=model_used,
             response_time=round(response_time, 2),
-            created_at=db_chat.created_at
+            created_at=datetime.utcnow()
         )
         
         logger.info(f"Chat response generated for user {current_user.id} in {response_time:.2f}s using {model_used}")
@@ -79,115 +87,270 @@ async def send_chat_message(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate response: {str(e)}"
         )
+    finally:
+        tracer.finish(trace)
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def _check_off_topic(chat: ChatMessageCreate, trace: Trace):
+    with trace.span("is_off_topic") as attrs:
+        is_off_topic, off_topic_response = llm_service.is_off_topic(chat.message, chat.use_urdu)
+        attrs["off_topic"] = is_off_topic
+    return is_off_topic, off_topic_response
+
+
+async def _load_chat_prompt(chat: ChatMessageCreate, user_id: int, db: AsyncSession, trace: Trace):
+    """Load context + history up front, then release the connection."""
+    with trace.span("get_user_context"):
+        user_context = await llm_service.get_user_context(user_id, db)
+    system_prompt = llm_service.create_system_prompt(user_context, chat.use_urdu)
+    with trace.span("build_chat_messages") as attrs:
+        chat_messages = await llm_service.build_chat_messages(system_prompt, user_id, db, chat.message)
+        attrs["messages"] = len(chat_messages)
+    model_name = llm_service.urdu_model if chat.use_urdu else llm_service.config.OLLAMA_BASE_MODEL
+    await db.close()
+    return chat_messages, model_name
+
+
+async def _ollama_tokens(chat_messages: list, model_name: str, trace: Trace, user_id: Optional[int] = None):
+    """Async iterator over Ollama tokens.
+
+    Identical in-flight prompts share one generation (see
+    LLMService.stream_tokens); the blocking HTTP stream runs in a worker
+    thread that never touches the DB. Records executor queueing, time to
+    first token and generation spans (with Ollama's eval stats) on `trace`.
+    """
+    stats = {}
+    start = time.time_ns()
+    first_token = None
+    count = 0
+    try:
+        async for token in llm_service.stream_tokens(chat_messages, model_name, stats, user_id=user_id):
+            if first_token is None:
+                first_token = time.time_ns()
+            count += 1
+            yield token
+    finally:
+        wait = stats.pop("executor_wait_ns", 0)
+        if wait:
+            trace.add_span("ollama.executor_wait", start, start + wait)
+        if first_token is not None:
+            trace.add_span("ollama.time_to_first_token", start + wait, first_token, model=model_name)
+        trace.add_span("ollama.generate", start + wait, time.time_ns(), model=model_name, chunks=count, **stats)
+        if "profile" in stats:
+            trace.attributes["profile"] = stats["profile"]
+
+
+async def _save_streamed_chat(chat: ChatMessageCreate, user_id: int, full_response: str, start_time: float, trace: Trace) -> dict:
+    """Queue the insert and build the final `done` event payload."""
+    response_time = round(time.time() - start_time, 2)
+    model_used = llm_service.urdu_model if chat.use_urdu else llm_service.config.OLLAMA_BASE_MODEL
+
+    # Queue the insert - the batch commit happens off the latency path
+    try:
+        with trace.span("db.persist"):
+            message_id = await chat_writer.enqueue(
+                user_id=user_id,
+                message=chat.message,
+                response=full_response,
+                model_used=model_used,
+                response_time=response_time,
+            )
+        done_payload = {
+            "token": "", "done": True,
+            "id": message_id,
+            "response_time": response_time,
+            "model_used": model_used,
+            "profile": trace.attributes.get("profile"),
+        }
+    except Exception as e:
+        logger.error(f"Failed to save streamed chat: {e}")
+        done_payload = {"token": "", "done": True, "response_time": response_time}
+
+    logger.info(f"Stream chat done for user {user_id} in {response_time}s")
+    return done_payload
 
 
 @router.post("/stream")
 async def stream_chat_message(
     chat: ChatMessageCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Stream chat response token-by-token via Server-Sent Events"""
-    
-    is_off_topic, off_topic_response = llm_service.is_off_topic(chat.message, chat.use_urdu)
+    """Stream chat response token-by-token via Server-Sent Events.
+
+    The request session is only used for the short context/history reads and
+    is closed before the stream starts, so no pool connection is held while
+    tokens flow. The final insert is handed to the write-behind queue.
+    """
+    user_id = current_user.id
+    trace = tracer.start("chat.stream", user_id=user_id, use_urdu=chat.use_urdu)
+    is_off_topic, off_topic_response = _check_off_topic(chat, trace)
         
     if is_off_topic:
+        await db.close()
+        tracer.finish(trace)
         async def _send_off_topic():
-            payload = json.dumps({"token": off_topic_response, "done": True, "full": off_topic_response})
-            yield f"data: {payload}\n\n"
-        return StreamingResponse(_send_off_topic(), media_type="text/event-stream",
-                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+            yield canned_responses.final_frame(off_topic_response)
+        return StreamingResponse(_send_off_topic(), media_type="text/event-stream", headers=SSE_HEADERS)
 
     start_time = time.time()
+    chat_messages, model_name = await _load_chat_prompt(chat, user_id, db, trace)
 
     async def _event_stream():
-        full_response = ""
-        loop = asyncio.get_event_loop()
-        token_queue = asyncio.Queue()
+        active_sse_streams.inc(endpoint="stream")
+        try:
+            full_response = ""
+            async for token in _ollama_tokens(chat_messages, model_name, trace, user_id):
+                full_response += token
+                yield _sse({"token": token, "done": False})
+            
+            # Append medical disclaimer
+            disclaimer = llm_service.create_medical_disclaimer(chat.use_urdu)
+            full_response += disclaimer
+            yield canned_responses.token_frame(disclaimer)
 
-        def _produce():
-            try:
-                user_context = llm_service.get_user_context(current_user.id, db)
-                system_prompt = llm_service.create_system_prompt(user_context, chat.use_urdu)
-                chat_messages = llm_service.build_chat_messages(system_prompt, current_user.id, db, chat.message)
-                model_name = llm_service.urdu_model if chat.use_urdu else llm_service.config.OLLAMA_BASE_MODEL
-                for token in llm_service.stream_ollama_tokens(chat_messages, model_name):
-                    loop.call_soon_threadsafe(token_queue.put_nowait, token)
-            finally:
-                loop.call_soon_threadsafe(token_queue.put_nowait, None)
+            yield _sse(await _save_streamed_chat(chat, user_id, full_response, start_time, trace))
+        finally:
+            active_sse_streams.dec(endpoint="stream")
+            tracer.finish(trace)
 
-        producer = loop.run_in_executor(None, _produce)
+    return StreamingResponse(_event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
 
-        while True:
-            token = await token_queue.get()
-            if token is None:
-                break
-            full_response += token
-            payload = json.dumps({"token": token, "done": False})
-            yield f"data: {payload}\n\n"
 
-        await producer
-        
-        # Append medical disclaimer
-        disclaimer = llm_service.create_medical_disclaimer(chat.use_urdu)
-        full_response += disclaimer
-        payload = json.dumps({"token": disclaimer, "done": False})
-        yield f"data: {payload}\n\n"
+@router.post("/stream/voice")
+async def stream_chat_voice(
+    chat: ChatMessageCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream the chat reply and its speech together over one SSE connection.
 
-        response_time = round(time.time() - start_time, 2)
-        model_used = llm_service.urdu_model if chat.use_urdu else llm_service.config.OLLAMA_BASE_MODEL
+    As tokens arrive, completed sentences (including Urdu ۔ and ؟) are cut
+    and sent to TTS concurrently. Text events (`{"token": ...}`) and audio
+    events (`{"audio": <base64 mp3 chunk>, "seq": n}`, with
+    `{"audio_end": n}` after each sentence) are interleaved on the same
+    stream, so speech starts after the first sentence rather than after
+    the whole generation plus a separate /chat/tts call.
 
-        # Save to database
-        try:
-            db_chat = ChatMessage(
-                user_id=current_user.id,
-                message=chat.message,
-                response=full_response
-            )
-            db.add(db_chat)
-            db.commit()
-            db.refresh(db_chat)
-            done_payload = json.dumps({
-                "token": "", "done": True,
-                "id": db_chat.id,
-                "response_time": response_time,
-                "model_used": model_used
-            })
-        except Exception as e:
-            logger.error(f"Failed to save streamed chat: {e}")
-            done_payload = json.dumps({"token": "", "done": True, "response_time": response_time})
+    The stream always ends with either the `done` event or, if generation
+    or speech fails midway, `{"error": ..., "done": true}`.
+    """
+    user_id = current_user.id
+    lang = "ur" if chat.use_urdu else "en"
+    trace = tracer.start("chat.voice", user_id=user_id, use_urdu=chat.use_urdu)
+    is_off_topic, off_topic_response = _check_off_topic(chat, trace)
 
-        yield f"data: {done_payload}\n\n"
-        logger.info(f"Stream chat done for user {current_user.id} in {response_time}s")
+    if is_off_topic:
+        await db.close()
+    else:
+        chat_messages, model_name = await _load_chat_prompt(chat, user_id, db, trace)
+    start_time = time.time()
 
-    return StreamingResponse(
-        _event_stream(),
-        media_type="text/event-stream",
-        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
-    )
+    async def _event_stream():
+        events = asyncio.Queue()
+
+        async def _emit_audio(seq: int, chunk: Optional[bytes]):
+            if chunk is None:
+                await events.put({"audio_end": seq, "done": False})
+            else:
+                await events.put({"audio": base64.b64encode(chunk).decode("ascii"), "seq": seq, "done": False})
+
+        pipeline = SpeechPipeline(lang, _emit_audio)
+        segmenter = SentenceSegmenter()
+
+        async def _produce_text():
+            if is_off_topic:
+                await events.put(canned_responses.token_frame(off_topic_response))
+                pipeline.submit(off_topic_response)
+                return off_topic_response
+
+            full_response = ""
+            async for token in _ollama_tokens(chat_messages, model_name, trace, user_id):
+                full_response += token
+                await events.put({"token": token, "done": False})
+                for sentence in segmenter.feed(token):
+                    pipeline.submit(sentence)
+            rest = segmenter.flush()
+            if rest:
+                pipeline.submit(rest)
+
+            disclaimer = llm_service.create_medical_disclaimer(chat.use_urdu)
+            await events.put(canned_responses.token_frame(disclaimer))
+            pipeline.submit(disclaimer.strip())
+            return full_response + disclaimer
+
+        async def _run():
+            try:
+                full_response = await _produce_text()
+                with trace.span("tts.drain") as attrs:
+                    await pipeline.close()
+                    attrs["sentences"] = pipeline.submitted
+                if is_off_topic:
+                    done = {"token": "", "done": True, "full": off_topic_response}
+                else:
+                    done = await _save_streamed_chat(chat, user_id, full_response, start_time, trace)
+                await events.put(done)
+            except Exception as e:
+                logger.error(f"Voice stream failed for user {user_id}: {e}")
+                trace.attributes["error"] = type(e).__name__
+                await pipeline.cancel()
+                await events.put({"error": "The response could not be completed, please try again.", "done": True})
+            finally:
+                await events.put(None)
+
+        runner = asyncio.create_task(_run())
+        active_sse_streams.inc(endpoint="voice")
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                # Canned frames arrive pre-serialized
+                yield event if isinstance(event, bytes) else _sse(event)
+            await runner
+        finally:
+            if not runner.done():
+                runner.cancel()
+                await pipeline.cancel()
+            active_sse_streams.dec(endpoint="voice")
+            tracer.finish(trace)
+
+    return StreamingResponse(_event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 @router.get("/history", response_model=ChatHistoryResponse)
 async def get_chat_history(
     limit: int = 50,
     offset: int = 0,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get chat history for the current user"""
     try:
-        total_count = db.query(ChatMessage).filter(
-            ChatMessage.user_id == current_user.id
-        ).count()
+        total_count = await db.scalar(
+            select(func.count(ChatMessage.id)).where(ChatMessage.user_id == current_user.id)
+        )
         
-        messages = db.query(ChatMessage).filter(
-            ChatMessage.user_id == current_user.id
-        ).order_by(desc(ChatMessage.created_at)).offset(offset).limit(limit).all()
+        result = await db.execute(
+            select(ChatMessage).where(
+                ChatMessage.user_id == current_user.id
+            ).order_by(desc(ChatMessage.created_at)).offset(offset).limit(limit)
+        )
+        messages = result.scalars().all()
         
         message_responses = [
             ChatMessageResponse(
                 id=msg.id,
                 message=msg.message,
                 response=msg.response,
+                model_used=msg.model_used,
+                response_time=msg.response_time,
                 created_at=msg.created_at
             ) for msg in messages
         ]
@@ -210,15 +373,16 @@ async def get_chat_history(
 @router.delete("/history")
 async def clear_chat_history(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Clear all chat history for the current user"""
     try:
-        deleted_count = db.query(ChatMessage).filter(
-            ChatMessage.user_id == current_user.id
-        ).delete()
+        result = await db.execute(
+            delete(ChatMessage).where(ChatMessage.user_id == current_user.id)
+        )
+        deleted_count = result.rowcount
         
-        db.commit()
+        await db.commit()
         
         logger.info(f"Cleared {deleted_count} chat messages for user {current_user.id}")
         
@@ -229,7 +393,7 @@ async def clear_chat_history(
         
     except Exception as e:
         logger.error(f"Error clearing chat history: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to clear chat history"
@@ -247,7 +411,8 @@ async def get_model_status(
             current_model=model_status["current_model"],
             available_models=model_status["available_models"],
             lora_loaded=model_status["lora_loaded"],
-            config=model_status["config"]
+            config=model_status["config"],
+            ollama=model_status["ollama"]
         )
         
     except Exception as e:
@@ -262,7 +427,7 @@ async def test_model(
     model_type: str,
     test_message: str = "What is PCOS?",
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Test a specific model with a sample message"""
     try:
@@ -297,20 +462,85 @@ async def test_model(
 @router.post("/tts")
 async def generate_tts(
     request: TTSRequest,
-    background_tasks: BackgroundTasks,
+    http_request: Request,
     current_user=Depends(get_current_user),
 ):
-    """Generate TTS audio using Edge TTS and return it as a file."""
+    """Generate TTS audio using Edge TTS and return it as a file.
+
+    Audio is cached on disk by (text, lang, voice), so replaying a reply is
+    served without re-synthesis. The content hash doubles as a strong ETag
+    and FileResponse handles Range requests for seeking.
+    """
+    canned = canned_responses.audio(request.text, request.lang)
+    if canned and "range" not in http_request.headers:
+        etag = f'"{canned.key}"'
+        headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+        if http_request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=canned.data, media_type="audio/mpeg", headers=headers)
+
     try:
-        fd, temp_path = tempfile.mkstemp(suffix=".mp3")
-        os.close(fd)
-        
-        success = await speech_service.text_to_speech(request.text, temp_path, request.lang)
-        if not success:
+        audio = await tts_cache.get_or_create(request.text, request.lang)
+        if audio is None:
             raise HTTPException(status_code=500, detail="Failed to generate speech")
-            
-        background_tasks.add_task(os.remove, temp_path)
-        return FileResponse(temp_path, media_type="audio/mpeg")
+
+        etag = f'"{audio.key}"'
+        headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+        if http_request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return FileResponse(audio.path, media_type="audio/mpeg", headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"TTS endpoint error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/tts/stream")
+async def stream_tts(
+    request: TTSRequest,
+    current_user=Depends(get_current_user),
+):
+    """Stream TTS audio as chunked audio/mpeg while synthesis is still running.
+
+    Chunks are forwarded from the synthesizer as they arrive, so playback can
+    start after the first sentence instead of after the whole reply. Nothing
+    is written to a temp file; the finished audio is added to the TTS cache
+    and later requests for the same text are served straight from it.
+    """
+    canned = canned_responses.audio(request.text, request.lang)
+    if canned:
+        return Response(content=canned.data, media_type="audio/mpeg", headers={"ETag": f'"{canned.key}"'})
+
+    cached = tts_cache.lookup(request.text, request.lang)
+    if cached:
+        tts_cache.hits += 1
+        return FileResponse(cached.path, media_type="audio/mpeg", headers={"ETag": f'"{cached.key}"'})
+
+    chunks = speech_service.stream_speech(request.text, request.lang)
+    # Pull the first chunk before committing to a 200 so synthesis errors surface
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=500, detail="Failed to generate speech")
+    except Exception as e:
+        logger.error(f"TTS stream error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    tts_cache.misses += 1
+
+    async def _audio_stream():
+        audio = [first]
+        yield first
+        try:
+            async for chunk in chunks:
+                audio.append(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"TTS stream interrupted: {e}")
+            return
+        tts_cache.put(request.text, request.lang, b"".join(audio))
+
+    return StreamingResponse(
+        _audio_stream(),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, desc, select
 from typing import List
 from datetime import datetime, timedelta
 import logging
@@ -52,15 +52,18 @@ def generate_recommendations(avg_mood: float, avg_sleep: float, avg_pain: float,
 @router.get("/", response_model=InsightsResponse)
 async def get_insights(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Get user's logs from last 30 days
     thirty_days_ago = datetime.now() - timedelta(days=30)
     
-    logs = db.query(DailyLog).filter(
-        DailyLog.user_id == current_user.id,
-        DailyLog.log_date >= thirty_days_ago
-    ).all()
+    result = await db.execute(
+        select(DailyLog).where(
+            DailyLog.user_id == current_user.id,
+            DailyLog.log_date >= thirty_days_ago
+        )
+    )
+    logs = result.scalars().all()
     
     if not logs:
         return InsightsResponse(
@@ -102,22 +105,28 @@ async def get_insights(
 @router.get("/summary")
 async def get_summary_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get summary statistics for dashboard"""
     # Last 7 days
     seven_days_ago = datetime.now() - timedelta(days=7)
-    recent_logs = db.query(DailyLog).filter(
-        DailyLog.user_id == current_user.id,
-        DailyLog.log_date >= seven_days_ago
-    ).all()
+    result = await db.execute(
+        select(DailyLog).where(
+            DailyLog.user_id == current_user.id,
+            DailyLog.log_date >= seven_days_ago
+        )
+    )
+    recent_logs = result.scalars().all()
     
     # Last 30 days
     thirty_days_ago = datetime.now() - timedelta(days=30)
-    monthly_logs = db.query(DailyLog).filter(
-        DailyLog.user_id == current_user.id,
-        DailyLog.log_date >= thirty_days_ago
-    ).all()
+    result = await db.execute(
+        select(DailyLog).where(
+            DailyLog.user_id == current_user.id,
+            DailyLog.log_date >= thirty_days_ago
+        )
+    )
+    monthly_logs = result.scalars().all()
     
     return {
         "logs_this_week": len(recent_logs),
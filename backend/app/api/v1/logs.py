@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, select
 from datetime import datetime, date, timedelta
 from typing import List, Optional
 import logging
@@ -16,19 +16,24 @@ logger = logging.getLogger(__name__)
 @router.get("/stats")
 async def get_dashboard_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get dashboard statistics for the user"""
     
     # Get total logs count
-    total_logs = db.query(DailyLog).filter(DailyLog.user_id == current_user.id).count()
+    total_logs = await db.scalar(
+        select(func.count(DailyLog.id)).where(DailyLog.user_id == current_user.id)
+    )
     
     # Get logs from last 30 days
     thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_logs = db.query(DailyLog).filter(
-        DailyLog.user_id == current_user.id,
-        DailyLog.log_date >= thirty_days_ago
-    ).all()
+    result = await db.execute(
+        select(DailyLog).where(
+            DailyLog.user_id == current_user.id,
+            DailyLog.log_date >= thirty_days_ago
+        )
+    )
+    recent_logs = result.scalars().all()
     
     # Calculate averages
     if recent_logs:
@@ -47,15 +52,21 @@ async def get_dashboard_stats(
         period_days = 0
     
     # Get latest log
-    latest_log = db.query(DailyLog).filter(
-        DailyLog.user_id == current_user.id
-    ).order_by(desc(DailyLog.log_date)).first()
+    result = await db.execute(
+        select(DailyLog).where(
+            DailyLog.user_id == current_user.id
+        ).order_by(desc(DailyLog.log_date)).limit(1)
+    )
+    latest_log = result.scalars().first()
     
     # Calculate cycle info
-    period_logs = db.query(DailyLog).filter(
-        DailyLog.user_id == current_user.id,
-        DailyLog.period_status == 'period'
-    ).order_by(desc(DailyLog.log_date)).limit(2).all()
+    result = await db.execute(
+        select(DailyLog).where(
+            DailyLog.user_id == current_user.id,
+            DailyLog.period_status == 'period'
+        ).order_by(desc(DailyLog.log_date)).limit(2)
+    )
+    period_logs = result.scalars().all()
     
     days_since_period = None
     if period_logs:
@@ -83,15 +94,18 @@ async def get_dashboard_stats(
 async def create_daily_log(
     log: DailyLogCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Check if log already exists for this date
     log_date = log.date if isinstance(log.date, datetime) else datetime.combine(log.date, datetime.min.time())
     
-    existing_log = db.query(DailyLog).filter(
-        DailyLog.user_id == current_user.id,
-        func.date(DailyLog.log_date) == log_date.date()
-    ).first()
+    result = await db.execute(
+        select(DailyLog).where(
+            DailyLog.user_id == current_user.id,
+            func.date(DailyLog.log_date) == log_date.date()
+        )
+    )
+    existing_log = result.scalars().first()
     
     if existing_log:
         # Update existing log
@@ -105,8 +119,8 @@ async def create_daily_log(
         existing_log.cravings = log.cravings
         existing_log.pain_level = log.pain_level
         existing_log.notes = log.notes
-        db.commit()
-        db.refresh(existing_log)
+        await db.commit()
+        await db.refresh(existing_log)
         return DailyLogResponse.from_orm(existing_log)
     
     # Create new log
@@ -124,8 +138,8 @@ async def create_daily_log(
         notes=log.notes
     )
     db.add(db_log)
-    db.commit()
-    db.refresh(db_log)
+    await db.commit()
+    await db.refresh(db_log)
     
     return DailyLogResponse.from_orm(db_log)
 
@@ -136,27 +150,31 @@ async def get_daily_logs(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(DailyLog).filter(DailyLog.user_id == current_user.id)
+    query = select(DailyLog).where(DailyLog.user_id == current_user.id)
     
     if start_date:
-        query = query.filter(DailyLog.log_date >= datetime.combine(start_date, datetime.min.time()))
+        query = query.where(DailyLog.log_date >= datetime.combine(start_date, datetime.min.time()))
     if end_date:
-        query = query.filter(DailyLog.log_date <= datetime.combine(end_date, datetime.max.time()))
+        query = query.where(DailyLog.log_date <= datetime.combine(end_date, datetime.max.time()))
     
-    logs = query.order_by(desc(DailyLog.log_date)).offset(skip).limit(limit).all()
+    result = await db.execute(query.order_by(desc(DailyLog.log_date)).offset(skip).limit(limit))
+    logs = result.scalars().all()
     return [DailyLogResponse.from_orm(log) for log in logs]
 
 @router.get("/latest", response_model=List[DailyLogResponse])
 async def get_latest_logs(
     days: int = Query(7, ge=1, le=30),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logs = db.query(DailyLog).filter(
-        DailyLog.user_id == current_user.id
-    ).order_by(desc(DailyLog.log_date)).limit(days).all()
+    result = await db.execute(
+        select(DailyLog).where(
+            DailyLog.user_id == current_user.id
+        ).order_by(desc(DailyLog.log_date)).limit(days)
+    )
+    logs = result.scalars().all()
     
     return [DailyLogResponse.from_orm(log) for log in logs]
 
@@ -164,12 +182,15 @@ async def get_latest_logs(
 async def get_daily_log(
     log_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    log = db.query(DailyLog).filter(
-        DailyLog.id == log_id,
-        DailyLog.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(DailyLog).where(
+            DailyLog.id == log_id,
+            DailyLog.user_id == current_user.id
+        )
+    )
+    log = result.scalars().first()
     
     if not log:
         raise HTTPException(
@@ -183,12 +204,15 @@ async def get_daily_log(
 async def delete_daily_log(
     log_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    log = db.query(DailyLog).filter(
-        DailyLog.id == log_id,
-        DailyLog.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(DailyLog).where(
+            DailyLog.id == log_id,
+            DailyLog.user_id == current_user.id
+        )
+    )
+    log = result.scalars().first()
     
     if not log:
         raise HTTPException(
@@ -196,7 +220,7 @@ async def delete_daily_log(
             detail="Log not found"
         )
     
-    db.delete(log)
-    db.commit()
+    await db.delete(log)
+    await db.commit()
     
     return {"message": "Log deleted successfully"}
\ No newline at end of file
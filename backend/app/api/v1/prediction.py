@@ -3,17 +3,21 @@ PCOS Prediction API Router
 Uses the trained ML model to predict PCOS risk based on health profile
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-import pickle
-import os
-import numpy as np
+import asyncio
+import json
 from datetime import datetime
 
 from app.db.session import get_db
-from app.core.security import get_current_user
+from app.core.security import get_current_user, require_admin
+from app.core.metrics import prediction_calls
 from app.models.user import User, UserHealthProfile, PCOSPrediction
+from app.services.attribution import attribution_service, profile_factors
+from app.services.model_rollout import RolloutError, model_rollout
+from app.services.risk import PCOS_THRESHOLD, calibrate, classify, risk_band, risk_bands
 from app.schemas.base import (
     HealthProfileCreate, 
     HealthProfileResponse,
@@ -23,48 +27,37 @@ from app.schemas.base import (
 
 router = APIRouter()
 
-# Load the trained model — check multiple paths for local dev vs deployment
-_api_v1_dir = os.path.dirname(__file__)                        # app/api/v1
-_backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(_api_v1_dir)))  # backend/
-_local_path = os.path.join(_backend_dir, '..', 'ml-models', 'models', 'saved', 'pcos_model.pkl')
-_deploy_path = os.path.join(_backend_dir, 'models', 'pcos_model.pkl')
-MODEL_PATH = _local_path if os.path.exists(_local_path) else _deploy_path
-
-
 def load_model():
-    """Load the trained PCOS prediction model"""
-    try:
-        with open(MODEL_PATH, 'rb') as f:
-            model = pickle.load(f)
-        return model
-    except Exception as e:
-        print(f"Error loading model: {e}")
-        return None
+    """The active PCOS model bundle, or None if there is none.
 
-# Load model at startup
-pcos_model = load_model()
+    Loading (which imports numpy/sklearn) is deferred until the first
+    prediction. A newly trained model is picked up from disk as the shadow
+    candidate and only serves once promoted (see app.services.model_rollout).
+    """
+    return model_rollout.active()
 
 
 @router.post("/health-profile", response_model=HealthProfileResponse)
 async def create_or_update_health_profile(
     profile: HealthProfileCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create or update user's health profile"""
     
     # Check if profile exists
-    existing_profile = db.query(UserHealthProfile).filter(
-        UserHealthProfile.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(UserHealthProfile).where(UserHealthProfile.user_id == current_user.id)
+    )
+    existing_profile = result.scalars().first()
     
     if existing_profile:
         # Update existing profile
         for key, value in profile.model_dump().items():
             setattr(existing_profile, key, value)
         existing_profile.updated_at = datetime.now()
-        db.commit()
-        db.refresh(existing_profile)
+        await db.commit()
+        await db.refresh(existing_profile)
         return existing_profile
     else:
         # Create new profile
@@ -73,21 +66,22 @@ async def create_or_update_health_profile(
             **profile.model_dump()
         )
         db.add(db_profile)
-        db.commit()
-        db.refresh(db_profile)
+        await db.commit()
+        await db.refresh(db_profile)
         return db_profile
 
 
 @router.get("/health-profile", response_model=HealthProfileResponse)
 async def get_health_profile(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user's health profile"""
     
-    profile = db.query(UserHealthProfile).filter(
-        UserHealthProfile.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(UserHealthProfile).where(UserHealthProfile.user_id == current_user.id)
+    )
+    profile = result.scalars().first()
     
     if not profile:
         raise HTTPException(
@@ -100,90 +94,58 @@ async def get_health_profile(
 
 @router.post("/predict", response_model=PredictionResponse)
 async def predict_pcos(
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Predict PCOS risk based on user's health profile"""
     
-    # Reload the model dynamically to pick up any newly trained model
+    # Reloads only if a newly trained model has been written since last use
     pcos_model = load_model()
     
     if not pcos_model:
+        prediction_calls.inc(outcome="no_model")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Prediction model not available"
         )
     
     # Get user's health profile
-    profile = db.query(UserHealthProfile).filter(
-        UserHealthProfile.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(UserHealthProfile).where(UserHealthProfile.user_id == current_user.id)
+    )
+    profile = result.scalars().first()
     
     if not profile:
+        prediction_calls.inc(outcome="no_profile")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Health profile not found. Please create one first."
         )
     
-    # Prepare features for prediction (21 features in order)
-    features = [
-        profile.typical_period_length or 5,
-        profile.typical_cycle_length or 28,
-        profile.age_group or 2,
-        profile.is_overweight or 0,
-        profile.has_weight_fluctuation or 0,
-        profile.has_irregular_periods or 0,
-        profile.difficulty_conceiving or 0,
-        profile.hair_chin or 0,
-        profile.hair_cheeks or 0,
-        profile.hair_breasts or 0,
-        profile.hair_upper_lips or 0,
-        profile.hair_arms or 0,
-        profile.hair_thighs or 0,
-        profile.has_acne or 0,
-        profile.has_hair_loss or 0,
-        profile.has_dark_patches or 0,
-        profile.always_tired or 0,
-        profile.frequent_mood_swings or 0,
-        profile.exercise_per_week or 0,
-        profile.eat_outside_per_week or 0,
-        profile.consumes_canned_food or 0
-    ]
+    # Features by name, in the order the model's manifest lists them
+    features = pcos_model.row(profile)
     
     # Make prediction
     try:
-        prediction = pcos_model.predict([features])[0]
-        prediction_proba = pcos_model.predict_proba([features])[0]
+        prediction_proba, _ = model_rollout.predict_proba(pcos_model, features)
+        shadow = model_rollout.shadow_candidate()
+        if shadow is not None:
+            # Scored after the response is sent
+            background_tasks.add_task(model_rollout.shadow_score, shadow, pcos_model, profile, prediction_proba)
         
-        # Get confidence and risk score
-        confidence = float(max(prediction_proba))
-        risk_score = float(prediction_proba[1])  # Probability of PCOS
-        
-        result = "PCOS" if prediction == 1 else "No PCOS"
+        # Calibrated probability of PCOS (the model's raw score overstates it);
+        # the result and its confidence come from the same probability
+        risk_score = calibrate(pcos_model, float(prediction_proba[1]))
+        result, confidence = classify(risk_score)
         
         # Calculate Risk Level
         risk_percentage = risk_score * 100
-        if risk_percentage < 20:
-            risk_level = "Low"
-            risk_color = "#10B981" # Emerald
-        elif risk_percentage < 50:
-            risk_level = "Moderate"
-            risk_color = "#F59E0B" # Amber
-        elif risk_percentage < 80:
-            risk_level = "High"
-            risk_color = "#EF4444" # Red
-        else:
-            risk_level = "Very High"
-            risk_color = "#B91C1C" # Dark Red
+        risk_level, risk_color = risk_band(risk_percentage)
 
-        # Identify Top Contributing Factors
-        contributing_factors = []
-        if profile.has_irregular_periods: contributing_factors.append("Irregular menstrual cycles")
-        if profile.is_overweight: contributing_factors.append("Higher Body Mass Index (BMI)")
-        if profile.has_acne: contributing_factors.append("Adult acne issues")
-        if profile.has_hair_loss: contributing_factors.append("Androgenic alopecia (hair thinning)")
-        if profile.hair_chin or profile.hair_cheeks or profile.hair_upper_lips: contributing_factors.append("Hirsutism (excessive hair growth)")
-        if profile.has_dark_patches: contributing_factors.append("Acanthosis nigricans (dark skin patches)")
+        # Top Contributing Factors - the features that raised this risk score,
+        # or the profile's symptoms if the model can't be explained
+        contributing_factors = attribution_service.factors(pcos_model, features) or profile_factors(profile)
         
         # Save prediction to database
         db_prediction = PCOSPrediction(
@@ -191,15 +153,17 @@ async def predict_pcos(
             prediction=result,
             risk_score=risk_score,
             confidence=confidence,
-            model_version="v1.1",
+            model_version=pcos_model.version,
+            features_json=json.dumps(dict(zip(pcos_model.feature_names, features))),
             notes=f"Risk Level: {risk_level}. Top factors: {', '.join(contributing_factors[:3])}"
         )
         db.add(db_prediction)
-        db.commit()
-        db.refresh(db_prediction)
+        await db.commit()
+        await db.refresh(db_prediction)
         
         # Generate categorized recommendations
         recommendations = generate_recommendations(profile, result, risk_score)
+        prediction_calls.inc(outcome=result)
         
         return {
             "id": db_prediction.id,
@@ -214,22 +178,88 @@ async def predict_pcos(
         }
         
     except Exception as e:
+        prediction_calls.inc(outcome="error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Prediction failed: {str(e)}"
         )
 
 
+@router.get("/models")
+async def get_model_rollout(current_user: User = Depends(require_admin)):
+    """Active, candidate and previous model versions with shadow comparison stats"""
+    return model_rollout.status()
+
+
+@router.post("/models/promote")
+async def promote_candidate_model(current_user: User = Depends(require_admin)):
+    """Make the shadow candidate the active model"""
+    try:
+        return model_rollout.promote()
+    except RolloutError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.post("/models/rollback")
+async def rollback_model(current_user: User = Depends(require_admin)):
+    """Reactivate the previous model and retire the current one"""
+    try:
+        return model_rollout.rollback()
+    except RolloutError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.get("/cohort/attributions")
+async def get_cohort_attributions(
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Feature attributions of the active model across every stored health profile"""
+    pcos_model = load_model()
+    if not pcos_model:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Prediction model not available"
+        )
+    result = await db.execute(select(UserHealthProfile))
+    profiles = result.scalars().all()
+    # Scoring and explaining every profile - keep it off the event loop
+    loop = asyncio.get_running_loop()
+    summary = await loop.run_in_executor(None, cohort_summary, pcos_model, profiles)
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No profiles to analyse, or the model can't be explained"
+        )
+    return summary
+
+
+def cohort_summary(pcos_model, profiles):
+    """Attribution summary plus calibrated risk levels over `profiles`, or None."""
+    rows = pcos_model.rows(profiles)
+    summary = attribution_service.cohort(pcos_model, rows)
+    if summary is None:
+        return None
+    risk = calibrate(pcos_model, pcos_model.model.predict_proba(rows)[:, 1])
+    levels, _ = risk_bands(risk * 100)
+    summary["mean_risk"] = float(risk.mean())
+    summary["risk_levels"] = {level: levels.count(level) for level in dict.fromkeys(levels)}
+    return summary
+
+
 @router.get("/predictions/history", response_model=List[PredictionHistoryResponse])
 async def get_prediction_history(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user's prediction history"""
     
-    predictions = db.query(PCOSPrediction).filter(
-        PCOSPrediction.user_id == current_user.id
-    ).order_by(PCOSPrediction.created_at.desc()).all()
+    result = await db.execute(
+        select(PCOSPrediction).where(
+            PCOSPrediction.user_id == current_user.id
+        ).order_by(PCOSPrediction.created_at.desc())
+    )
+    predictions = result.scalars().all()
     
     return predictions
 
@@ -237,13 +267,16 @@ async def get_prediction_history(
 @router.get("/predictions/latest", response_model=dict)
 async def get_latest_prediction(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user's latest prediction"""
     
-    prediction = db.query(PCOSPrediction).filter(
-        PCOSPrediction.user_id == current_user.id
-    ).order_by(PCOSPrediction.created_at.desc()).first()
+    result = await db.execute(
+        select(PCOSPrediction).where(
+            PCOSPrediction.user_id == current_user.id
+        ).order_by(PCOSPrediction.created_at.desc()).limit(1)
+    )
+    prediction = result.scalars().first()
     
     if not prediction:
         raise HTTPException(
@@ -252,35 +285,31 @@ async def get_latest_prediction(
         )
     
     # Get profile for recommendations
-    profile = db.query(UserHealthProfile).filter(
-        UserHealthProfile.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(UserHealthProfile).where(UserHealthProfile.user_id == current_user.id)
+    )
+    profile = result.scalars().first()
     
     recommendations = generate_recommendations(profile, prediction.prediction, prediction.risk_score)
     
     # Calculate Risk Level
     risk_percentage = prediction.risk_score * 100
-    if risk_percentage < 20:
-        risk_level = "Low"
-        risk_color = "#10B981"
-    elif risk_percentage < 50:
-        risk_level = "Moderate"
-        risk_color = "#F59E0B"
-    elif risk_percentage < 80:
-        risk_level = "High"
-        risk_color = "#EF4444"
-    else:
-        risk_level = "Very High"
-        risk_color = "#B91C1C"
+    risk_level, risk_color = risk_band(risk_percentage)
 
+    # Explain the row that was scored (a cache hit right after /predict);
+    # older predictions didn't store it, so fall back to the current profile
     contributing_factors = []
-    if profile:
-        if profile.has_irregular_periods: contributing_factors.append("Irregular menstrual cycles")
-        if profile.is_overweight: contributing_factors.append("Higher Body Mass Index (BMI)")
-        if profile.has_acne: contributing_factors.append("Adult acne issues")
-        if profile.has_hair_loss: contributing_factors.append("Androgenic alopecia (hair thinning)")
-        if profile.hair_chin or profile.hair_cheeks or profile.hair_upper_lips: contributing_factors.append("Hirsutism (excessive hair growth)")
-        if profile.has_dark_patches: contributing_factors.append("Acanthosis nigricans (dark skin patches)")
+    pcos_model = load_model()
+    if pcos_model:
+        if prediction.features_json:
+            scored = json.loads(prediction.features_json)
+            features = [scored.get(name, 0) for name in pcos_model.feature_names]
+        else:
+            features = pcos_model.row(profile) if profile else None
+        if features is not None:
+            contributing_factors = attribution_service.factors(pcos_model, features)
+    if not contributing_factors and profile:
+        contributing_factors = profile_factors(profile)
 
     return {
         "id": prediction.id,
@@ -302,7 +331,8 @@ def generate_recommendations(profile: UserHealthProfile, prediction: str, risk_s
     lifestyle = []
     dietary = []
     
-    if prediction == "PCOS" or risk_score > 0.5:
+    # Predictions stored before calibration were labelled from the raw score
+    if risk_score >= PCOS_THRESHOLD or prediction == "PCOS":
         medical.append("⚕️ Consult with a gynecologist or endocrinologist for proper diagnosis and treatment plan")
         
         if profile.is_overweight:
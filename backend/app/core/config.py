@@ -1,4 +1,5 @@
 import os
+import tempfile
 from enum import Enum
 from dotenv import load_dotenv
 
@@ -14,6 +15,27 @@ class Config:
     # Ollama configuration
     OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     OLLAMA_BASE_MODEL = os.getenv("OLLAMA_BASE_MODEL", "llama3.2:latest")
+    # Pool of Ollama servers (comma separated); defaults to the single base URL
+    OLLAMA_BASE_URLS = [u.strip() for u in os.getenv("OLLAMA_BASE_URLS", OLLAMA_BASE_URL).split(",") if u.strip()]
+    # Keep a user on the same server (warm KV cache) for this long, unless it
+    # has more than OLLAMA_STICKY_SLACK requests over the least loaded one
+    OLLAMA_STICKY_TTL = float(os.getenv("OLLAMA_STICKY_TTL", "600"))
+    OLLAMA_STICKY_SLACK = int(os.getenv("OLLAMA_STICKY_SLACK", "2"))
+    OLLAMA_NUM_THREAD = int(os.getenv("OLLAMA_NUM_THREAD", "8"))
+
+    # Adaptive generation budget - tiers are name:num_ctx:num_predict, full budget first.
+    # Queue depths count in-flight generations per worker process, not across workers
+    GEN_PROFILE_TIERS = os.getenv("GEN_PROFILE_TIERS", "full:2048:512,reduced:1536:384,minimal:1024:256")
+    GEN_BUSY_QUEUE_DEPTH = int(os.getenv("GEN_BUSY_QUEUE_DEPTH", "2"))
+    GEN_HEAVY_QUEUE_DEPTH = int(os.getenv("GEN_HEAVY_QUEUE_DEPTH", "4"))
+    GEN_SLOW_TOKENS_PER_SEC = float(os.getenv("GEN_SLOW_TOKENS_PER_SEC", "4"))
+    GEN_LONG_MESSAGE_CHARS = int(os.getenv("GEN_LONG_MESSAGE_CHARS", "800"))
+    GEN_URDU_PREDICT_FACTOR = float(os.getenv("GEN_URDU_PREDICT_FACTOR", "1.25"))
+    # Background /api/tags + /api/ps polling (seconds)
+    OLLAMA_MONITOR_INTERVAL = float(os.getenv("OLLAMA_MONITOR_INTERVAL", "15"))
+    OLLAMA_MONITOR_TIMEOUT = float(os.getenv("OLLAMA_MONITOR_TIMEOUT", "5"))
+    # Re-warm models Ollama has evicted from RAM (warmup-lock holder only)
+    OLLAMA_REWARM = os.getenv("OLLAMA_REWARM", "true").lower() == "true"
 
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./pcos_tracker.db")
@@ -26,6 +48,54 @@ class Config:
     # Chat configuration
     MAX_CHAT_HISTORY = int(os.getenv("MAX_CHAT_HISTORY", "10"))
     MAX_RESPONSE_LENGTH = int(os.getenv("MAX_RESPONSE_LENGTH", "512"))
+    # Share one Ollama stream between concurrent requests with an identical prompt
+    CHAT_COALESCE = os.getenv("CHAT_COALESCE", "true").lower() == "true"
+
+    # Server / deployment
+    HOST = os.getenv("HOST", "0.0.0.0")
+    PORT = int(os.getenv("PORT", "8000"))
+    WORKERS = int(os.getenv("WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+    # Seconds to let in-flight requests (incl. SSE chat streams) finish on SIGTERM
+    GRACEFUL_SHUTDOWN_TIMEOUT = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "120"))
+    WARMUP_LOCK_FILE = os.getenv("WARMUP_LOCK_FILE", os.path.join(tempfile.gettempdir(), "ovula-warmup.lock"))
+
+    # Text-to-speech audio cache
+    TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "./tts_cache")
+    TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "256"))
+    # Sentences synthesized in parallel by the chat-to-speech pipeline
+    TTS_PIPELINE_CONCURRENCY = int(os.getenv("TTS_PIPELINE_CONCURRENCY", "3"))
+    # Synthesize off-topic replies and disclaimers at startup and keep them in memory
+    PRECOMPUTE_CANNED_AUDIO = os.getenv("PRECOMPUTE_CANNED_AUDIO", "true").lower() == "true"
+
+    # Chat write-behind (batched ChatMessage inserts)
+    CHAT_WRITE_BATCH_SIZE = int(os.getenv("CHAT_WRITE_BATCH_SIZE", "50"))
+    CHAT_WRITE_FLUSH_MS = int(os.getenv("CHAT_WRITE_FLUSH_MS", "200"))
+    # Failed rows are retried with later flushes, then appended to this file
+    CHAT_WRITE_MAX_ATTEMPTS = int(os.getenv("CHAT_WRITE_MAX_ATTEMPTS", "3"))
+    CHAT_DEAD_LETTER_PATH = os.getenv("CHAT_DEAD_LETTER_PATH", "./chat_dead_letter.jsonl")
+
+    # Request tracing - comma separated sinks: log, memory, otel
+    TRACE_SINKS = os.getenv("TRACE_SINKS", "log,memory")
+    TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+
+    # PCOS model rollout: a newly trained model is scored in shadow on this
+    # fraction of predictions until an admin promotes it
+    MODEL_ROLLOUT_DIR = os.getenv("MODEL_ROLLOUT_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "models", "rollout"))
+    MODEL_SHADOW_FRACTION = float(os.getenv("MODEL_SHADOW_FRACTION", "0.2"))
+    # Single-row feature attributions kept per (model version, features)
+    ATTRIBUTION_CACHE_SIZE = int(os.getenv("ATTRIBUTION_CACHE_SIZE", "4096"))
+    # Comma separated emails allowed to promote / roll back models and read /traces
+    ADMIN_EMAILS = [e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()]
+
+    @classmethod
+    def worker_count(cls, workers: int) -> int:
+        """Worker processes to actually run: one with SQLite, which allows a single
+        writer, so concurrent workers' chat flushes would fail with "database is locked"."""
+        if workers > 1 and cls.DATABASE_URL.startswith("sqlite"):
+            print(f"DATABASE_URL is SQLite, running 1 worker instead of {workers} "
+                  "(use PostgreSQL for multiple workers)")
+            return 1
+        return workers
 
     @classmethod
     def get_model_config(cls):
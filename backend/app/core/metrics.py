@@ -0,0 +1,315 @@
+"""
+In-process Prometheus-style metrics, served as text by GET /metrics.
+
+Counters, gauges and histograms are plain dicts keyed by label values and
+guarded by one lock, so recording is a few dict operations per event and no
+client library is needed. Values are per worker process; with several
+uvicorn workers each scrape reports the worker that answered it, which is
+identified by the `ovula_process_info{pid=...}` sample.
+
+Chat timings are derived from finished request traces (see
+app.core.tracing), so the chat code records each measurement once.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+_lock = threading.Lock()
+
+# Seconds - request latency and Ollama timings on CPU span ms to minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+RATE_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 200)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._collect: Optional[Callable[[], Dict[Tuple, float]]] = None
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_function(self, fn: Callable[[], Dict[Tuple, float]]):
+        """Read values from an existing counter at scrape time ({label values: total})."""
+        self._collect = fn
+
+    def _samples(self):
+        with _lock:
+            values = dict(self._values)
+        if self._collect:
+            values.update(self._collect())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._collect: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with _lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, fn: Callable[[], float]):
+        """Compute the (unlabelled) value at scrape time."""
+        self._collect = fn
+
+    def _samples(self):
+        if self._collect:
+            return [f"{self.name} {_format_value(self._collect())}"]
+        with _lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with _lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def _samples(self):
+        with _lock:
+            values = {k: list(v) for k, v in self._values.items()}
+        lines = []
+        for key, row in values.items():
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += row[i]
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(row[-2])}")
+            lines.append(f"{self.name}_count{labels} {row[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ──────────────────────────────────────────────
+# Application metrics
+# ──────────────────────────────────────────────
+
+http_request_duration = Histogram(
+    "ovula_http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+
+chat_ttft = Histogram(
+    "ovula_chat_time_to_first_token_seconds", "Time from Ollama request to first token", ("model",))
+chat_generation = Histogram(
+    "ovula_chat_generation_seconds", "Total Ollama generation time per reply", ("model",))
+chat_tokens_per_sec = Histogram(
+    "ovula_chat_tokens_per_second", "Ollama eval tokens/sec per reply", ("model",), buckets=RATE_BUCKETS)
+off_topic_rejections = Counter(
+    "ovula_chat_off_topic_rejections_total", "Chat messages rejected as off-topic", ("lang",))
+
+prediction_calls = Counter(
+    "ovula_prediction_calls_total", "PCOS prediction requests by outcome", ("outcome",))
+prediction_model_latency = Histogram(
+    "ovula_prediction_model_seconds", "PCOS model predict_proba time by role and version", ("role", "version"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1))
+shadow_comparisons = Counter(
+    "ovula_prediction_shadow_total", "Shadow scorings of the candidate model by agreement", ("version", "result"))
+shadow_probability_delta = Histogram(
+    "ovula_prediction_shadow_delta", "|candidate - active| PCOS probability per shadow scoring", ("version",),
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 1))
+cache_requests = Counter(
+    "ovula_cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+otp_sends = Counter(
+    "ovula_otp_emails_total", "OTP emails sent by result", ("result",))
+db_pool_checkouts = Counter(
+    "ovula_db_pool_checkouts_total", "Connections checked out of the async DB pool")
+db_pool_in_use = Gauge(
+    "ovula_db_pool_checked_out", "Async DB pool connections currently checked out")
+active_sse_streams = Gauge(
+    "ovula_active_sse_streams", "Server-Sent Event streams currently open", ("endpoint",))
+process_info = Gauge(
+    "ovula_process_info", "Worker process serving this scrape", ("pid",))
+process_info.set(1, pid=os.getpid())
+
+
+class TraceMetricsSink:
+    """Trace sink that turns chat spans into the chat histograms/counters."""
+
+    def export(self, trace):
+        lang = "ur" if trace.attributes.get("use_urdu") else "en"
+        for span in trace.spans:
+            if span.name == "is_off_topic" and span.attributes.get("off_topic"):
+                off_topic_rejections.inc(lang=lang)
+            elif span.name == "ollama.time_to_first_token":
+                chat_ttft.observe(span.duration_ms / 1000, model=span.attributes.get("model", ""))
+            elif span.name == "ollama.generate":
+                model = span.attributes.get("model", "")
+                chat_generation.observe(span.duration_ms / 1000, model=model)
+                if span.attributes.get("tokens_per_sec"):
+                    chat_tokens_per_sec.observe(span.attributes["tokens_per_sec"], model=model)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request until its last body chunk is sent.
+
+    Timing at the ASGI level (rather than when the endpoint returns) makes
+    streamed responses count their full duration. Routes are labelled by
+    their path template so ids in URLs don't explode the label set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = [500]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=_route_label(scope),
+                status=status_code[0],
+            )
+
+
+def _route_label(scope) -> str:
+    """Full path template of the matched route, e.g. /logs/{log_id}."""
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    # Routes of included routers may only know their path below the prefix;
+    # recover the prefix from the concrete request path.
+    try:
+        concrete = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    if path.endswith(concrete):
+        return path[: len(path) - len(concrete)] + template
+    return template
+
+
+_installed = False
+
+
+def install():
+    """Hook metrics into the tracer, DB pool and caches. Called once at startup."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    from sqlalchemy import event
+
+    from app.core.tracing import tracer
+    from app.db.session import async_engine
+    from app.services.tts_cache import tts_cache
+
+    tracer.add_sink(TraceMetricsSink())
+
+    pool = async_engine.sync_engine.pool
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(*args):
+        db_pool_checkouts.inc()
+
+    db_pool_in_use.set_function(lambda: pool.checkedout() if hasattr(pool, "checkedout") else 0)
+
+    # The TTS cache already counts hits/misses - read them at scrape time
+    cache_requests.set_function(lambda: {("tts", "hit"): tts_cache.hits, ("tts", "miss"): tts_cache.misses})
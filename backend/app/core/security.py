@@ -4,10 +4,12 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from dotenv import load_dotenv
 
+from app.core.config import Config
 from app.db.session import get_db
 from app.models.user import User
 
@@ -55,11 +57,18 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def get_current_user(email: str = Depends(verify_token), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == email).first()
+async def get_current_user(email: str = Depends(verify_token), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
-    return user
\ No newline at end of file
+    return user
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """The current user, if listed in ADMIN_EMAILS (model rollout, request traces)."""
+    if current_user.email.lower() not in Config.ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Administration is not allowed")
+    return current_user
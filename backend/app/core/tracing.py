@@ -0,0 +1,200 @@
+"""
+Lightweight per-request latency tracing.
+
+A `Trace` is started for each chat request and collects timed `Span`s
+(context query, history load, off-topic check, Ollama TTFT / generation,
+DB persistence). When the request finishes the trace is handed to every
+configured sink:
+
+    log     - one summary line per request via the `app.trace` logger
+    memory  - ring buffer of recent traces, served to admins by GET /traces
+    otel    - re-emitted through the OpenTelemetry API (needs
+              opentelemetry-api plus whatever SDK/exporter you configure)
+
+Sinks are chosen with TRACE_SINKS (comma separated, default "log,memory").
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+trace_logger = logging.getLogger("app.trace")
+
+
+def _new_id(n_bytes: int) -> str:
+    # Same widths as OpenTelemetry trace (16 bytes) and span (8 bytes) ids
+    return os.urandom(n_bytes).hex()
+
+
+class Span:
+    __slots__ = ("name", "span_id", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, name: str, start_ns: int, end_ns: int, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.span_id = _new_id(8)
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.attributes = attributes or {}
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """Spans for one request. Timestamps are epoch nanoseconds."""
+
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.trace_id = _new_id(16)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = attributes
+        self.spans: List[Span] = []
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block; attributes may be added to the yielded dict."""
+        start = time.time_ns()
+        try:
+            yield attributes
+        finally:
+            self.spans.append(Span(name, start, time.time_ns(), attributes))
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, **attributes):
+        """Record a span measured elsewhere (e.g. in a worker thread)."""
+        self.spans.append(Span(name, start_ns, end_ns, attributes))
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns or time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 2),
+            "attributes": self.attributes,
+            "spans": [
+                {
+                    "name": s.name,
+                    "span_id": s.span_id,
+                    "offset_ms": round((s.start_ns - self.start_ns) / 1e6, 2),
+                    "duration_ms": round(s.duration_ms, 2),
+                    "attributes": s.attributes,
+                }
+                for s in self.spans
+            ],
+        }
+
+
+# ──────────────────────────────────────────────
+# Sinks
+# ──────────────────────────────────────────────
+
+class LogSink:
+    def export(self, trace: Trace):
+        spans = " ".join(f"{s.name}={s.duration_ms:.1f}ms" for s in trace.spans)
+        trace_logger.info(f"{trace.name} {trace.duration_ms:.1f}ms {spans} {json.dumps(trace.attributes)}")
+
+
+class MemorySink:
+    """Keeps the most recent traces for the /traces endpoint."""
+
+    def __init__(self, size: int):
+        self._buffer = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        with self._lock:
+            self._buffer.append(trace)
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._buffer)[-limit:]
+        return [t.to_dict() for t in reversed(traces)]
+
+
+class OpenTelemetrySink:
+    """Replays finished traces through the OpenTelemetry tracer API."""
+
+    def __init__(self):
+        from opentelemetry import trace as otel_trace
+
+        self._otel = otel_trace
+        self._tracer = otel_trace.get_tracer("ovula")
+
+    def export(self, trace: Trace):
+        root = self._tracer.start_span(trace.name, start_time=trace.start_ns, attributes=_otel_attrs(trace.attributes))
+        ctx = self._otel.set_span_in_context(root)
+        for s in trace.spans:
+            child = self._tracer.start_span(s.name, context=ctx, start_time=s.start_ns, attributes=_otel_attrs(s.attributes))
+            child.end(end_time=s.end_ns)
+        root.end(end_time=trace.end_ns)
+
+
+def _otel_attrs(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    # OTel only accepts primitive attribute values
+    return {k: v if isinstance(v, (str, bool, int, float)) else str(v) for k, v in attributes.items() if v is not None}
+
+
+# ──────────────────────────────────────────────
+# Tracer
+# ──────────────────────────────────────────────
+
+class Tracer:
+    def __init__(self, sinks: Optional[str] = None, buffer_size: Optional[int] = None):
+        self.enabled = True
+        self.memory: Optional[MemorySink] = None
+        self.sinks = []
+        for name in (sinks if sinks is not None else Config.TRACE_SINKS).split(","):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name == "log":
+                self.sinks.append(LogSink())
+            elif name == "memory":
+                self.memory = MemorySink(buffer_size or Config.TRACE_BUFFER_SIZE)
+                self.sinks.append(self.memory)
+            elif name == "otel":
+                try:
+                    self.sinks.append(OpenTelemetrySink())
+                except ImportError:
+                    logger.warning("TRACE_SINKS includes 'otel' but opentelemetry-api is not installed")
+            else:
+                logger.warning(f"Unknown trace sink: {name}")
+        self.enabled = bool(self.sinks)
+
+    def add_sink(self, sink):
+        """Register a custom sink (any object with `export(trace)`)."""
+        self.sinks.append(sink)
+        self.enabled = True
+
+    def start(self, name: str, **attributes) -> Trace:
+        return Trace(name, **attributes)
+
+    def finish(self, trace: Trace):
+        trace.end_ns = time.time_ns()
+        if not self.enabled:
+            return
+        for sink in self.sinks:
+            try:
+                sink.export(trace)
+            except Exception as e:
+                logger.warning(f"Trace sink {type(sink).__name__} failed: {e}")
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return self.memory.recent(limit) if self.memory else []
+
+
+# Global tracer instance
+tracer = Tracer()
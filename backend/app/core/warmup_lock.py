@@ -0,0 +1,57 @@
+"""
+Cross-process lock so only one worker performs Ollama warmup.
+
+With N uvicorn workers every process runs the app lifespan. The first
+process to grab an exclusive, non-blocking file lock becomes the warmup
+leader and keeps the lock for its whole lifetime; the others skip warmup.
+If the leader dies the OS releases the lock and a restarted worker can
+take over.
+"""
+import logging
+import os
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows - no flock, every process warms up
+    fcntl = None
+
+_lock_file = None
+
+
+def acquire_warmup_lock() -> bool:
+    """Return True if this process is (or just became) the warmup leader."""
+    global _lock_file
+    if _lock_file is not None:
+        return True
+    if fcntl is None:
+        return True
+
+    path = Config.WARMUP_LOCK_FILE
+    handle = open(path, "a+")
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    _lock_file = handle
+    logger.info(f"Process {os.getpid()} holds the warmup lock ({path})")
+    return True
+
+
+def release_warmup_lock():
+    global _lock_file
+    if _lock_file is None:
+        return
+    if fcntl is not None:
+        fcntl.flock(_lock_file.fileno(), fcntl.LOCK_UN)
+    _lock_file.close()
+    _lock_file = None
@@ -1,35 +1,72 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-import uvicorn
 import asyncio
 import threading
 from dotenv import load_dotenv
 
-from app.db.session import engine, Base
+from app.db.session import async_engine, Base
 from app.api.v1 import auth, logs, insights, prediction, chat
 from app.core.config import Config
+from app.core.security import require_admin
+from app.core.warmup_lock import acquire_warmup_lock, release_warmup_lock
+from app.core import metrics
 
 # Load environment variables
 load_dotenv()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Warm up BOTH LLM models on startup so first request is instant.
+    """Create tables, then warm up BOTH LLM models so first request is instant.
     Pins English (llama3.2) and Urdu (qalb-llm) in memory permanently.
+
+    Nothing heavy runs at import time, so worker starts and --reload cycles
+    stay fast; table creation happens here instead. With several workers only
+    the process holding the warmup file lock talks to Ollama.
     """
     from app.services.llm import llm_service
+    from app.services.chat_writer import chat_writer
+    from app.services.canned import canned_responses
+    from app.services.ollama_monitor import ollama_monitor
+
+    metrics.install()
+
+    # Create database tables
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    await chat_writer.start()
+
+    # Canned replies: SSE frames now, audio in the background (may need TTS)
+    canned_responses.precompute()
+    canned_audio_task = None
+    if Config.PRECOMPUTE_CANNED_AUDIO:
+        canned_audio_task = asyncio.create_task(canned_responses.warm_audio())
+
     def _warmup():
         try:
             # No arg = warm up both English + Urdu models
             asyncio.run(llm_service.warmup_model())
         except Exception as e:
             print(f"[warmup] non-fatal: {e}")
-    threading.Thread(target=_warmup, daemon=True).start()
+    is_warmup_leader = acquire_warmup_lock()
+    # Every worker polls Ollama for status; only the warmup leader re-warms.
+    # With re-warm on, the monitor's first poll also does the initial warmup
+    # (and retries it if Ollama comes up after the API).
+    rewarm = llm_service.warmup_model if (is_warmup_leader and Config.OLLAMA_REWARM) else None
+    if is_warmup_leader and rewarm is None:
+        threading.Thread(target=_warmup, daemon=True).start()
+    elif not is_warmup_leader:
+        print("[warmup] another worker holds the warmup lock, skipping")
+
+    await ollama_monitor.start([Config.OLLAMA_BASE_MODEL, llm_service.urdu_model], warmup=rewarm)
     yield
+    await ollama_monitor.stop()
+    if canned_audio_task and not canned_audio_task.done():
+        canned_audio_task.cancel()
+    # Flush any queued chat messages before the process exits
+    await chat_writer.stop()
+    release_warmup_lock()
 
 app = FastAPI(
     title="Ovula API",
@@ -47,6 +84,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(logs.router, prefix="/logs", tags=["Logs"])
@@ -64,7 +103,29 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "model_type": Config.MODEL_TYPE}
+    from app.services.ollama_monitor import ollama_monitor
+    return {"status": "healthy", "model_type": Config.MODEL_TYPE, "ollama": ollama_monitor.healthy}
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of this worker's in-process metrics."""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/traces")
+async def recent_traces(limit: int = 50, current_user=Depends(require_admin)):
+    """Most recent request traces from the in-memory sink (newest first).
+
+    Traces carry user ids and per-user timings, so only admins may read them.
+    """
+    from app.core.tracing import tracer
+    return {"traces": tracer.recent(min(limit, Config.TRACE_BUFFER_SIZE))}
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8001, reload=False)
\ No newline at end of file
+    import uvicorn
+    uvicorn.run(
+        "app.main:app",
+        host=Config.HOST,
+        port=Config.PORT,
+        workers=Config.worker_count(Config.WORKERS),
+        timeout_graceful_shutdown=Config.GRACEFUL_SHUTDOWN_TIMEOUT,
+    )
\ No newline at end of file
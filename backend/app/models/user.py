@@ -58,6 +58,13 @@ class ChatMessage(Base):
     # Relationships
     user = relationship("User", back_populates="chats")
 
+class IdAllocation(Base):
+    """Next unused id per table, for databases without sequences (SQLite)."""
+    __tablename__ = "id_allocations"
+
+    name = Column(String(50), primary_key=True)
+    next_id = Column(Integer, nullable=False)
+
 class CycleData(Base):
     __tablename__ = "cycle_data"
     
@@ -34,4 +34,5 @@ class ModelStatusResponse(BaseModel):
     current_model: str
     available_models: List[ModelInfo]
     lora_loaded: bool
-    config: dict
\ No newline at end of file
+    config: dict
+    ollama: Optional[dict] = None
\ No newline at end of file
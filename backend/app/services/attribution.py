@@ -0,0 +1,294 @@
+"""
+Per-prediction feature attributions for tree-based and logistic PCOS models.
+
+Each tree's decision path is decomposed into per-feature steps: moving from
+a node to its child changes the tree's PCOS probability by
+value(child) - value(node), and that change is credited to the feature the
+node splits on (the Saabas path attribution, the path-dependent
+approximation of TreeSHAP). Averaged over the forest,
+
+    predict_proba(x)[PCOS] == bias + contributions(x).sum()
+
+exactly, where bias is the mean root probability (the training base rate).
+
+TreeExplainer flattens every tree of the forest into shared arrays once per
+model version. All trees (and, in batch mode, all rows) are then walked
+together, one depth level per NumPy step, so one row takes a few dozen
+array operations instead of a Python loop over ~150 trees.
+
+Logistic regression (model selection may pick it, usually behind a
+StandardScaler) is explained by LinearExplainer: each feature's share of
+the log-odds relative to the training mean, coef * (x - mean), rescaled so
+the shares satisfy the same identity in probability units. Single-row
+results are cached per (model version, feature row).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from app.core.config import Config
+from app.core.metrics import cache_requests
+from app.services.pcos_model import LoadedModel
+
+# Training column -> factor shown to the user; several hair-growth features
+# roll up into one factor
+FACTOR_LABELS = {
+    "Period Length": "Period length",
+    "Cycle Length": "Menstrual cycle length",
+    "Age": "Age group",
+    "Overweight": "Higher Body Mass Index (BMI)",
+    "loss weight gain / weight loss": "Weight fluctuation",
+    "irregular or missed periods": "Irregular menstrual cycles",
+    "Difficulty in conceiving": "Difficulty conceiving",
+    "Hair growth on Chin": "Hirsutism (excessive hair growth)",
+    "Hair growth  on Cheeks": "Hirsutism (excessive hair growth)",
+    "Hair growth Between breasts": "Hirsutism (excessive hair growth)",
+    "Hair growth  on Upper lips ": "Hirsutism (excessive hair growth)",
+    "Hair growth in Arms": "Hirsutism (excessive hair growth)",
+    "Hair growth on Inner thighs": "Hirsutism (excessive hair growth)",
+    "Acne or skin tags": "Adult acne issues",
+    "Hair thinning or hair loss ": "Androgenic alopecia (hair thinning)",
+    "Dark patches": "Acanthosis nigricans (dark skin patches)",
+    "always tired": "Persistent fatigue",
+    "more Mood Swings": "Frequent mood swings",
+    "exercise per week": "Exercise habits",
+    "eat outside per week": "Eating out frequency",
+    "canned food often": "Canned food consumption",
+}
+
+# Factors below this share of PCOS probability aren't worth showing
+MIN_CONTRIBUTION = 0.01
+
+
+class UnsupportedModelError(TypeError):
+    """The model isn't a decision tree, a forest of them or a logistic regression."""
+
+
+class TreeExplainer:
+    """Path attributions for a fitted DecisionTreeClassifier or tree ensemble."""
+
+    def __init__(self, model, positive_class=1):
+        import numpy as np
+
+        trees = getattr(model, "estimators_", None)
+        trees = [model] if trees is None else list(np.ravel(trees))
+        # Classification trees only: boosted (regression) trees add up log-odds
+        if not all(hasattr(t, "tree_") and hasattr(t, "classes_") for t in trees):
+            raise UnsupportedModelError(f"{type(model).__name__} has no decision trees to explain")
+        classes = list(model.classes_)
+        k = classes.index(positive_class) if positive_class in classes else len(classes) - 1
+
+        left, right, feature, threshold, value, roots = [], [], [], [], [], []
+        offset = 0
+        for est in trees:
+            tree = est.tree_
+            is_leaf = tree.children_left == -1
+            left.append(np.where(is_leaf, -1, tree.children_left + offset))
+            right.append(np.where(is_leaf, -1, tree.children_right + offset))
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            counts = tree.value[:, 0, :]
+            value.append(counts[:, k] / counts.sum(axis=1))
+            roots.append(offset)
+            offset += tree.node_count
+
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.feature = np.concatenate(feature).astype(np.intp)
+        # sklearn compares float32 features against float64 thresholds
+        self.threshold = np.concatenate(threshold)
+        self.value = np.concatenate(value)
+        self.roots = np.array(roots, dtype=np.intp)
+        self.n_trees = len(trees)
+        self.n_features = model.n_features_in_
+        self.max_depth = max(est.tree_.max_depth for est in trees)
+        self.bias = float(self.value[self.roots].mean())
+
+    def contributions(self, X):
+        """(n_rows, n_features) PCOS-probability contribution of each feature."""
+        import numpy as np
+
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self.n_features)
+        n = len(X)
+        rows = np.repeat(np.arange(n), self.n_trees)
+        nodes = np.tile(self.roots, n)
+        out = np.zeros(n * self.n_features)
+        for _ in range(self.max_depth):
+            internal = self.left[nodes] != -1
+            if not internal.any():
+                break
+            rows, nodes = rows[internal], nodes[internal]
+            split = self.feature[nodes]
+            go_left = X[rows, split] <= self.threshold[nodes]
+            child = np.where(go_left, self.left[nodes], self.right[nodes])
+            out += np.bincount(rows * self.n_features + split, weights=self.value[child] - self.value[nodes],
+                               minlength=out.size)
+            nodes = child
+        return out.reshape(n, self.n_features) / self.n_trees
+
+
+class LinearExplainer:
+    """Attributions for a binary LogisticRegression, optionally after a StandardScaler."""
+
+    def __init__(self, model, positive_class=1):
+        import numpy as np
+
+        steps = [step for _, step in getattr(model, "steps", [(None, model)])]
+        estimator, transforms = steps[-1], steps[:-1]
+        coef = getattr(estimator, "coef_", None)
+        scalers_ok = len(transforms) <= 1 and all(hasattr(t, "mean_") and hasattr(t, "scale_") for t in transforms)
+        if coef is None or coef.shape[0] != 1 or not scalers_ok or not hasattr(estimator, "predict_proba"):
+            raise UnsupportedModelError(f"{type(model).__name__} is not a logistic regression to explain")
+
+        self.n_features = coef.shape[1]
+        # log-odds(x) = intercept + weights . (x - center), with the scaler folded in
+        self.weights = coef[0].astype(np.float64)
+        self.center = np.zeros(self.n_features)
+        for scaler in transforms:
+            if scaler.scale_ is not None:
+                self.weights = self.weights / scaler.scale_
+            if scaler.mean_ is not None:
+                self.center = scaler.mean_.astype(np.float64)
+        self.intercept = float(estimator.intercept_[0])
+        # coef_ is for classes_[1]; flip it if PCOS is the other class
+        classes = list(estimator.classes_)
+        if positive_class in classes and classes.index(positive_class) == 0:
+            self.weights, self.intercept = -self.weights, -self.intercept
+        self.bias = float(1 / (1 + np.exp(-self.intercept)))
+
+    def contributions(self, X):
+        """(n_rows, n_features) PCOS-probability contribution of each feature."""
+        import numpy as np
+
+        X = np.asarray(X, dtype=np.float64).reshape(-1, self.n_features)
+        log_odds = (X - self.center) * self.weights
+        total = log_odds.sum(axis=1)
+        delta = 1 / (1 + np.exp(-(self.intercept + total))) - self.bias
+        # Same sign as `total` (the sigmoid is increasing), so no share flips sign
+        scale = np.divide(delta, total, out=np.zeros_like(delta), where=total != 0)
+        return log_odds * scale[:, None]
+
+
+Explainer = Union[TreeExplainer, LinearExplainer]
+
+
+def make_explainer(model, positive_class=1) -> Explainer:
+    """TreeExplainer or LinearExplainer for `model`; raises UnsupportedModelError otherwise."""
+    try:
+        return TreeExplainer(model, positive_class)
+    except UnsupportedModelError:
+        return LinearExplainer(model, positive_class)
+
+
+def top_factors(contributions: Sequence[float], feature_names: Sequence[str],
+                limit: int = 6, min_contribution: float = MIN_CONTRIBUTION) -> List[Tuple[str, float]]:
+    """(factor, contribution) raising PCOS risk the most, grouped by FACTOR_LABELS."""
+    totals: Dict[str, float] = {}
+    for name, value in zip(feature_names, contributions):
+        label = FACTOR_LABELS.get(name, name)
+        totals[label] = totals.get(label, 0.0) + float(value)
+    ranked = sorted(((label, v) for label, v in totals.items() if v >= min_contribution), key=lambda p: -p[1])
+    return ranked[:limit]
+
+
+def profile_factors(profile) -> List[str]:
+    """Symptoms read straight off the health profile.
+
+    Shown when the model's attributions give nothing, e.g. for naive Bayes
+    or KNN, which have no explainer.
+    """
+    factors = []
+    if profile.has_irregular_periods: factors.append("Irregular menstrual cycles")
+    if profile.is_overweight: factors.append("Higher Body Mass Index (BMI)")
+    if profile.has_acne: factors.append("Adult acne issues")
+    if profile.has_hair_loss: factors.append("Androgenic alopecia (hair thinning)")
+    if profile.hair_chin or profile.hair_cheeks or profile.hair_upper_lips:
+        factors.append("Hirsutism (excessive hair growth)")
+    if profile.has_dark_patches: factors.append("Acanthosis nigricans (dark skin patches)")
+    return factors
+
+
+class AttributionService:
+    """Explainers per model version and an LRU of single-row attributions."""
+
+    def __init__(self, cache_size: Optional[int] = None):
+        self.cache_size = Config.ATTRIBUTION_CACHE_SIZE if cache_size is None else cache_size
+        self._explainers: Dict[str, Optional[Explainer]] = {}
+        self._cache: "OrderedDict[Tuple, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def explainer(self, loaded: LoadedModel) -> Optional[Explainer]:
+        if loaded.version not in self._explainers:
+            try:
+                explainer = make_explainer(loaded.model, positive_class=loaded.manifest["classes"][-1])
+            except UnsupportedModelError:
+                explainer = None
+            with self._lock:
+                # Only the active and candidate versions are ever in use
+                if len(self._explainers) >= 4:
+                    self._explainers.clear()
+                self._explainers[loaded.version] = explainer
+        return self._explainers[loaded.version]
+
+    def explain(self, loaded: LoadedModel, row: Sequence[float]) -> Optional[List[float]]:
+        """Contribution per model feature for one row, or None if the model can't be explained."""
+        key = (loaded.version, tuple(row))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            cache_requests.inc(cache="attribution", result="hit")
+            return cached
+
+        cache_requests.inc(cache="attribution", result="miss")
+        explainer = self.explainer(loaded)
+        if explainer is None:
+            return None
+        contributions = explainer.contributions([row])[0].tolist()
+        with self._lock:
+            self._cache[key] = contributions
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return contributions
+
+    def factors(self, loaded: LoadedModel, row: Sequence[float]) -> List[str]:
+        """Labels of the factors raising this row's PCOS risk, largest first."""
+        contributions = self.explain(loaded, row)
+        if contributions is None:
+            return []
+        return [label for label, _ in top_factors(contributions, loaded.feature_names)]
+
+    def cohort(self, loaded: LoadedModel, rows) -> Optional[dict]:
+        """Batch attributions summarized over a cohort of feature rows."""
+        import numpy as np
+
+        explainer = self.explainer(loaded)
+        if explainer is None or not len(rows):
+            return None
+        contributions = explainer.contributions(rows)
+        risk = explainer.bias + contributions.sum(axis=1)
+        features = [
+            {
+                "feature": name,
+                "factor": FACTOR_LABELS.get(name, name),
+                "mean_contribution": float(contributions[:, i].mean()),
+                "mean_abs_contribution": float(np.abs(contributions[:, i]).mean()),
+                # Share of the cohort this feature pushes towards PCOS
+                "raises_risk_share": float((contributions[:, i] >= MIN_CONTRIBUTION).mean()),
+            }
+            for i, name in enumerate(loaded.feature_names)
+        ]
+        features.sort(key=lambda f: -f["mean_abs_contribution"])
+        return {
+            "model_version": loaded.version,
+            "profiles": len(rows),
+            "base_rate": explainer.bias,
+            # Uncalibrated: contributions add up to the raw model score
+            "mean_raw_risk": float(risk.mean()),
+            "features": features,
+        }
+
+
+attribution_service = AttributionService()
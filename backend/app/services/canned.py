@@ -0,0 +1,72 @@
+import json
+import logging
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.services.llm import CANNED_RESPONSES
+from app.services.tts_cache import tts_cache
+
+logger = logging.getLogger(__name__)
+
+
+class CannedAudio(NamedTuple):
+    key: str
+    data: bytes
+
+
+def _frame(payload: dict) -> bytes:
+    return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+
+class CannedResponses:
+    """Precomputed payloads for the fixed off-topic replies and disclaimers.
+
+    `precompute()` serializes each canned text once as SSE frames, and
+    `warm_audio()` loads its synthesized MP3 into memory, so serving them is
+    a dict lookup instead of per-request JSON encoding or TTS.
+    """
+
+    def __init__(self):
+        self._final_frames: Dict[str, bytes] = {}
+        self._token_frames: Dict[str, bytes] = {}
+        self._audio: Dict[Tuple[str, str], CannedAudio] = {}
+
+    @staticmethod
+    def lang_for(use_urdu: bool) -> str:
+        return "ur" if use_urdu else "en"
+
+    def precompute(self):
+        for text, _ in CANNED_RESPONSES:
+            self._final_frames[text] = _frame({"token": text, "done": True, "full": text})
+            self._token_frames[text] = _frame({"token": text, "done": False})
+        logger.info(f"Precomputed SSE frames for {len(CANNED_RESPONSES)} canned responses")
+
+    async def warm_audio(self):
+        """Synthesize (or load from the disk cache) audio for every canned text."""
+        for text, use_urdu in CANNED_RESPONSES:
+            speech = text.strip()
+            lang = self.lang_for(use_urdu)
+            try:
+                audio = await tts_cache.get_or_create(speech, lang)
+                if audio is None:
+                    logger.warning(f"No audio for canned response ({lang}): {speech[:40]}")
+                    continue
+                with open(audio.path, "rb") as f:
+                    self._audio[(speech, lang)] = CannedAudio(audio.key, f.read())
+            except Exception as e:
+                logger.warning(f"Canned audio warmup failed ({lang}): {e}")
+        logger.info(f"Canned audio ready for {len(self._audio)}/{len(CANNED_RESPONSES)} responses")
+
+    def final_frame(self, text: str) -> bytes:
+        """Single closing SSE frame carrying the whole reply (off-topic path)."""
+        frame = self._final_frames.get(text)
+        return frame if frame is not None else _frame({"token": text, "done": True, "full": text})
+
+    def token_frame(self, text: str) -> bytes:
+        frame = self._token_frames.get(text)
+        return frame if frame is not None else _frame({"token": text, "done": False})
+
+    def audio(self, text: str, lang: str) -> Optional[CannedAudio]:
+        return self._audio.get((text.strip(), lang))
+
+
+canned_responses = CannedResponses()
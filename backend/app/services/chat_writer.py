@@ -0,0 +1,244 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Optional, List, Dict, Any
+
+from sqlalchemy import insert, select, func, text, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import Config
+from app.core.tracing import tracer
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models.user import ChatMessage, IdAllocation
+
+logger = logging.getLogger(__name__)
+
+
+class ChatWriteBehind:
+    """Write-behind queue that batches ChatMessage inserts off the request path.
+
+    Rows are flushed every `batch_size` rows or `flush_interval` seconds,
+    whichever comes first. Ids are pre-allocated from the database (a
+    PostgreSQL sequence, or the id_allocations table elsewhere) in blocks,
+    so callers can return them to the client before the row is committed
+    and several worker processes never hand out the same id.
+
+    A row that fails to insert is kept and retried with the next flush; after
+    CHAT_WRITE_MAX_ATTEMPTS it is appended to the CHAT_DEAD_LETTER_PATH JSON
+    lines file. `stop()` drains the queue and retries, so nothing accepted
+    before shutdown is dropped.
+    """
+
+    def __init__(self, batch_size: int = None, flush_interval: float = None):
+        self.batch_size = batch_size or Config.CHAT_WRITE_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else Config.CHAT_WRITE_FLUSH_MS / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._id_lock = asyncio.Lock()
+        self._reserved_ids: List[int] = []
+        # Rows that failed to insert, with how often they were tried
+        self._retry: List[Dict[str, Any]] = []
+        self._attempts: Dict[int, int] = {}
+        self.max_attempts = Config.CHAT_WRITE_MAX_ATTEMPTS
+        self.dead_letter_path = Config.CHAT_DEAD_LETTER_PATH
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ──────────────────────────────────────────────
+    # Lifecycle
+    # ──────────────────────────────────────────────
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Chat write-behind started (batch={self.batch_size}, interval={self.flush_interval}s)")
+
+    async def stop(self):
+        """Flush everything still queued and stop the writer task."""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        # Last attempt for failed rows; whatever still fails is dead-lettered
+        if self._retry:
+            max_attempts, self.max_attempts = self.max_attempts, 1
+            await self._flush([])
+            self.max_attempts = max_attempts
+        logger.info("Chat write-behind stopped, queue drained")
+
+    # ──────────────────────────────────────────────
+    # Public API
+    # ──────────────────────────────────────────────
+
+    async def enqueue(
+        self,
+        user_id: int,
+        message: str,
+        response: str,
+        model_used: Optional[str] = None,
+        response_time: Optional[float] = None,
+    ) -> int:
+        """Queue a chat row for insertion and return its pre-allocated id."""
+        message_id = await self._allocate_id()
+        row = {
+            "id": message_id,
+            "user_id": user_id,
+            "message": message,
+            "response": response,
+            "model_used": model_used,
+            "response_time": response_time,
+        }
+        if self.running:
+            self._queue.put_nowait(row)
+        else:
+            # No writer running (scripts, tests without lifespan) - write inline
+            await self._flush([row])
+        return message_id
+
+    # ──────────────────────────────────────────────
+    # Id pre-allocation
+    # ──────────────────────────────────────────────
+
+    async def _allocate_id(self) -> int:
+        async with self._id_lock:
+            if not self._reserved_ids:
+                if async_engine.dialect.name == "postgresql":
+                    self._reserved_ids = await self._reserve_sequence_block(self.batch_size)
+                else:
+                    self._reserved_ids = await self._reserve_table_block(self.batch_size)
+            return self._reserved_ids.pop(0)
+
+    async def _reserve_sequence_block(self, size: int) -> List[int]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                text(
+                    "SELECT nextval(pg_get_serial_sequence('chat_messages', 'id')) "
+                    "FROM generate_series(1, :n)"
+                ),
+                {"n": size},
+            )
+            return [row[0] for row in result]
+
+    async def _reserve_table_block(self, size: int) -> List[int]:
+        """Reserve `size` ids in id_allocations - SQLite has no sequences.
+
+        The UPDATE takes the database write lock, so concurrent processes
+        get disjoint blocks. The counter is seeded from max(id) on first use.
+        """
+        name = ChatMessage.__tablename__
+        while True:
+            async with AsyncSessionLocal() as session:
+                end = await session.scalar(
+                    update(IdAllocation)
+                    .where(IdAllocation.name == name)
+                    .values(next_id=IdAllocation.next_id + size)
+                    .returning(IdAllocation.next_id)
+                )
+                if end is None:
+                    current_max = await session.scalar(select(func.max(ChatMessage.id)))
+                    end = (current_max or 0) + 1 + size
+                    session.add(IdAllocation(name=name, next_id=end))
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    # Another process seeded the counter first - reserve from it
+                    continue
+            return list(range(end - size, end))
+
+    # ──────────────────────────────────────────────
+    # Writer loop
+    # ──────────────────────────────────────────────
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                # Don't leave failed rows waiting for the next message
+                row = await asyncio.wait_for(self._queue.get(), self.flush_interval if self._retry else None)
+            except asyncio.TimeoutError:
+                await self._flush([])
+                continue
+            if row is None:
+                break
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._flush(batch)
+
+        # Drain anything enqueued after the stop sentinel
+        remaining = []
+        while not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is not None:
+                remaining.append(row)
+        if remaining:
+            await self._flush(remaining)
+
+    async def _insert(self, rows: List[Dict[str, Any]]):
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(ChatMessage), rows)
+            await session.commit()
+
+    async def _flush(self, rows: List[Dict[str, Any]]):
+        # Rows that failed earlier go out again with this batch
+        rows, self._retry = self._retry + rows, []
+        if not rows:
+            return
+        trace = tracer.start("chat_writer.flush", rows=len(rows))
+        try:
+            with trace.span("db.commit"):
+                await self._insert(rows)
+            for row in rows:
+                self._attempts.pop(row["id"], None)
+            logger.debug(f"Flushed {len(rows)} chat messages")
+        except Exception as e:
+            logger.error(f"Batch insert of {len(rows)} chat messages failed: {e}")
+            # Retry row-by-row so one bad row doesn't hold back the batch
+            for row in rows:
+                try:
+                    await self._insert([row])
+                    self._attempts.pop(row["id"], None)
+                except Exception as row_error:
+                    self._failed(row, row_error)
+        finally:
+            tracer.finish(trace)
+
+    def _failed(self, row: Dict[str, Any], error: Exception):
+        attempts = self._attempts.get(row["id"], 0) + 1
+        if attempts < self.max_attempts:
+            self._attempts[row["id"]] = attempts
+            self._retry.append(row)
+            logger.warning(f"Chat message {row['id']} not stored (attempt {attempts}), will retry: {error}")
+            return
+        self._attempts.pop(row["id"], None)
+        try:
+            directory = os.path.dirname(self.dead_letter_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.dead_letter_path, "a") as f:
+                f.write(json.dumps({**row, "error": str(error)}) + "\n")
+            logger.error(f"Chat message {row['id']} dead-lettered to {self.dead_letter_path}: {error}")
+        except OSError as e:
+            logger.critical(f"Chat message lost, dead-letter write failed ({e}): {row}")
+
+
+# Global writer instance
+chat_writer = ChatWriteBehind()
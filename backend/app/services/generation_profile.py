@@ -0,0 +1,121 @@
+import logging
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationProfile(NamedTuple):
+    name: str
+    num_ctx: int
+    num_predict: int
+    num_thread: int
+
+    def options(self) -> Dict[str, Any]:
+        """Ollama `options` for this profile (sampling settings are fixed)."""
+        return {
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "top_k": 40,
+            "num_ctx": self.num_ctx,
+            "num_predict": self.num_predict,
+            "num_thread": self.num_thread,
+            "repeat_penalty": 1.1,  # Reduce repetitive output
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+def parse_tiers(spec: str) -> List[GenerationProfile]:
+    """Parse "name:num_ctx:num_predict,..." (largest budget first)."""
+    tiers = []
+    for part in spec.split(","):
+        name, num_ctx, num_predict = part.strip().split(":")
+        tiers.append(GenerationProfile(name, int(num_ctx), int(num_predict), Config.OLLAMA_NUM_THREAD))
+    return tiers
+
+
+class GenerationPolicy:
+    """Chooses num_ctx / num_predict / num_thread for a request from load.
+
+    Tiers go from the full budget (idle) down to the smallest (heavy load):
+
+    - queue depth (generations in flight in this process) at or above
+      `busy_depth` drops one tier, at or above `heavy_depth` two;
+    - recent tokens/sec for the model below `slow_tps` drops one more;
+    - a long user message keeps at least the full tier's context window so
+      the prompt is not truncated;
+    - Urdu gets `urdu_predict_factor` x num_predict, since the same answer
+      takes more tokens than in English.
+
+    `choose()` is a pure function of its inputs; `record()` feeds the
+    tokens/sec moving average that `current()` uses.
+
+    Queue depth and tokens/sec are per process: the depth is this worker's
+    outstanding requests (OllamaRouter.outstanding), not Ollama's queue.
+    With N workers sharing one Ollama server the real load can be up to N
+    times higher than what a worker sees, so lower GEN_BUSY_QUEUE_DEPTH /
+    GEN_HEAVY_QUEUE_DEPTH accordingly.
+    """
+
+    def __init__(
+        self,
+        tiers: Optional[List[GenerationProfile]] = None,
+        busy_depth: Optional[int] = None,
+        heavy_depth: Optional[int] = None,
+        slow_tps: Optional[float] = None,
+        long_message_chars: Optional[int] = None,
+        urdu_predict_factor: Optional[float] = None,
+    ):
+        self.tiers = tiers or parse_tiers(Config.GEN_PROFILE_TIERS)
+        self.busy_depth = busy_depth if busy_depth is not None else Config.GEN_BUSY_QUEUE_DEPTH
+        self.heavy_depth = heavy_depth if heavy_depth is not None else Config.GEN_HEAVY_QUEUE_DEPTH
+        self.slow_tps = slow_tps if slow_tps is not None else Config.GEN_SLOW_TOKENS_PER_SEC
+        self.long_message_chars = long_message_chars if long_message_chars is not None else Config.GEN_LONG_MESSAGE_CHARS
+        self.urdu_predict_factor = urdu_predict_factor if urdu_predict_factor is not None else Config.GEN_URDU_PREDICT_FACTOR
+        self._tps: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def choose(
+        self,
+        queue_depth: int,
+        tokens_per_sec: Optional[float],
+        message_length: int,
+        use_urdu: bool,
+    ) -> GenerationProfile:
+        """Profile for a request; `queue_depth` counts this process's generations only."""
+        level = 0
+        if queue_depth >= self.heavy_depth:
+            level = 2
+        elif queue_depth >= self.busy_depth:
+            level = 1
+        if tokens_per_sec is not None and tokens_per_sec < self.slow_tps:
+            level += 1
+        profile = self.tiers[min(level, len(self.tiers) - 1)]
+
+        if message_length >= self.long_message_chars and profile.num_ctx < self.tiers[0].num_ctx:
+            profile = profile._replace(num_ctx=self.tiers[0].num_ctx)
+        if use_urdu:
+            profile = profile._replace(num_predict=int(profile.num_predict * self.urdu_predict_factor))
+        return profile
+
+    def record(self, model: str, tokens_per_sec: float, alpha: float = 0.3):
+        """Update the exponential moving average of tokens/sec for `model`."""
+        with self._lock:
+            prev = self._tps.get(model)
+            self._tps[model] = tokens_per_sec if prev is None else prev + alpha * (tokens_per_sec - prev)
+
+    def tokens_per_sec(self, model: str) -> Optional[float]:
+        with self._lock:
+            return self._tps.get(model)
+
+    def current(self, model: str, queue_depth: int, message_length: int, use_urdu: bool) -> GenerationProfile:
+        """Profile for a request right now, using the recorded tokens/sec."""
+        return self.choose(queue_depth, self.tokens_per_sec(model), message_length, use_urdu)
+
+
+# Global policy instance
+generation_policy = GenerationPolicy()
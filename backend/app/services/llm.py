@@ -1,41 +1,124 @@
 import requests
 import json
+import asyncio
+import hashlib
+import time
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 from app.core.config import Config
+from app.core.tracing import Trace
+from app.services.ollama_monitor import ollama_monitor
+from app.services.llm_router import OllamaRouter, ollama_router
+from app.services.generation_profile import GenerationProfile, generation_policy
 from app.models.user import DailyLog, ChatMessage
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ENGLISH_DISCLAIMER = (
+    "\n\n⚠️ Medical Disclaimer: This information is for educational purposes only "
+    "and is not a substitute for professional medical advice, diagnosis, or treatment. "
+    "Always consult qualified healthcare providers for personalized medical guidance, "
+    "especially for PCOS management."
+)
+URDU_DISCLAIMER = (
+    "\n\n⚠️ طبی انتباہ: یہ معلومات صرف تعلیمی مقاصد کے لیے ہیں اور پیشہ ورانہ طبی مشورے کا متبادل نہیں ہیں۔ "
+    "PCOS کے علاج اور ذاتی مشورے کے لیے ہمیشہ مستند ڈاکٹر سے رجوع کریں۔"
+)
+
+_OFF_TOPIC_PREFIX = "I'm specifically designed to help with PCOS and women's health questions. "
+_OFF_TOPIC_REDIRECT = " Is there anything about PCOS, hormones, periods, fertility, or related health topics I can help you with?"
+OFF_TOPIC_RESPONSES = {
+    "coding": _OFF_TOPIC_PREFIX + "I cannot assist with programming or coding." + _OFF_TOPIC_REDIRECT,
+    "general": _OFF_TOPIC_PREFIX + "I cannot assist with general knowledge topics." + _OFF_TOPIC_REDIRECT,
+    "math": _OFF_TOPIC_PREFIX + "I cannot solve general math problems." + _OFF_TOPIC_REDIRECT,
+    "non_medical": _OFF_TOPIC_PREFIX + "I cannot create non-medical content." + _OFF_TOPIC_REDIRECT,
+    "unrelated": _OFF_TOPIC_PREFIX + "Your question doesn't seem to be related to PCOS or women's health." + _OFF_TOPIC_REDIRECT,
+}
+URDU_OFF_TOPIC_RESPONSE = "معذرت، میں صرف PCOS اور خواتین کی صحت کے بارے میں بات کر سکتی ہوں۔"
+
+# Every fixed reply the service can produce, as (text, use_urdu) -
+# precomputed at startup by app.services.canned
+CANNED_RESPONSES = [(text, False) for text in OFF_TOPIC_RESPONSES.values()] + [
+    (URDU_OFF_TOPIC_RESPONSE, True),
+    (ENGLISH_DISCLAIMER, False),
+    (URDU_DISCLAIMER, True),
+]
+
+
+class _Flight:
+    """One in-flight Ollama stream shared by every request with the same prompt.
+
+    Tokens are published on the event loop; each subscriber has its own
+    queue, and late joiners first receive the tokens already generated.
+    """
+
+    def __init__(self, key: Optional[str]):
+        self.key = key
+        self.tokens: List[str] = []
+        self.subscribers: List[asyncio.Queue] = []
+        self.stats: Dict[str, Any] = {}
+        self.done = False
+        self.abandoned = False
+        self.submitted_ns = time.time_ns()
+        self.started_ns: Optional[int] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        for token in self.tokens:
+            queue.put_nowait(token)
+        if self.done:
+            queue.put_nowait(None)
+        self.subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> bool:
+        """Drop a subscriber; True if nobody is listening any more."""
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+        return not self.subscribers
+
+    def publish(self, token: Optional[str]):
+        if token is None:
+            self.done = True
+        else:
+            self.tokens.append(token)
+        for queue in self.subscribers:
+            queue.put_nowait(token)
+
 
 class LLMService:
     """English-only PCOS chatbot service using Ollama."""
 
-    def __init__(self):
+    def __init__(self, router: Optional[OllamaRouter] = None):
         self.config = Config()
         self.model_type = self.config.MODEL_TYPE
         self.urdu_model = "mtaimoorhassan/qalb-llm-urdu-improved:latest"
+        # Pool of Ollama endpoints (OLLAMA_BASE_URLS)
+        self.router = router or ollama_router
+        # prompt key -> in-flight stream, for single-flight coalescing
+        self._flights: Dict[str, _Flight] = {}
 
     # ──────────────────────────────────────────────
     # Context helpers
     # ──────────────────────────────────────────────
 
-    def get_user_context(self, user_id: int, db: Session) -> str:
+    async def get_user_context(self, user_id: int, db: AsyncSession) -> str:
         """Get recent user tracking data for personalized responses."""
         try:
             seven_days_ago = datetime.now() - timedelta(days=7)
-            recent_logs = (
-                db.query(DailyLog)
-                .filter(DailyLog.user_id == user_id, DailyLog.log_date >= seven_days_ago)
+            result = await db.execute(
+                select(DailyLog)
+                .where(DailyLog.user_id == user_id, DailyLog.log_date >= seven_days_ago)
                 .order_by(DailyLog.log_date.desc())
                 .limit(7)
-                .all()
             )
+            recent_logs = result.scalars().all()
 
             if not recent_logs:
                 return "No recent tracking data available."
@@ -60,11 +143,11 @@ class LLMService:
             logger.error(f"Error getting user context: {e}")
             return "Unable to retrieve recent tracking data."
 
-    def build_chat_messages(
+    async def build_chat_messages(
         self,
         system_prompt: str,
         user_id: int,
-        db: Session,
+        db: AsyncSession,
         current_message: str,
         max_history: int = None,
     ) -> list:
@@ -80,13 +163,13 @@ class LLMService:
             max_history = min(self.config.MAX_CHAT_HISTORY, 6)
 
         try:
-            recent = (
-                db.query(ChatMessage)
-                .filter(ChatMessage.user_id == user_id)
+            result = await db.execute(
+                select(ChatMessage)
+                .where(ChatMessage.user_id == user_id)
                 .order_by(ChatMessage.created_at.desc())
                 .limit(max_history)
-                .all()
             )
+            recent = result.scalars().all()
 
             if recent:
                 for msg in reversed(recent):  # chronological order
@@ -179,17 +262,7 @@ IMPORTANT: If a question is not clearly about PCOS or women's health, politely d
 
     def create_medical_disclaimer(self, use_urdu: bool = False) -> str:
         """Standard medical disclaimer appended to every response."""
-        if use_urdu:
-            return (
-                "\n\n⚠️ طبی انتباہ: یہ معلومات صرف تعلیمی مقاصد کے لیے ہیں اور پیشہ ورانہ طبی مشورے کا متبادل نہیں ہیں۔ "
-                "PCOS کے علاج اور ذاتی مشورے کے لیے ہمیشہ مستند ڈاکٹر سے رجوع کریں۔"
-            )
-        return (
-            "\n\n⚠️ Medical Disclaimer: This information is for educational purposes only "
-            "and is not a substitute for professional medical advice, diagnosis, or treatment. "
-            "Always consult qualified healthcare providers for personalized medical guidance, "
-            "especially for PCOS management."
-        )
+        return URDU_DISCLAIMER if use_urdu else ENGLISH_DISCLAIMER
 
     # ──────────────────────────────────────────────
     # Off-topic filter
@@ -202,7 +275,7 @@ IMPORTANT: If a question is not clearly about PCOS or women's health, politely d
         if use_urdu:
             coding_keywords = ["python", "javascript", "code", "programming", "html", "react"]
             if any(kw in message_lower for kw in coding_keywords):
-                return True, "معذرت، میں صرف PCOS اور خواتین کی صحت کے بارے میں بات کر سکتی ہوں۔"
+                return True, URDU_OFF_TOPIC_RESPONSE
             return False, ""
 
         # Allow basic greetings
@@ -266,22 +339,22 @@ IMPORTANT: If a question is not clearly about PCOS or women's health, politely d
         ]
 
         if any(kw in message_lower for kw in coding_keywords):
-            return True, "I'm specifically designed to help with PCOS and women's health questions. I cannot assist with programming or coding. Is there anything about PCOS, hormones, periods, fertility, or related health topics I can help you with?"
+            return True, OFF_TOPIC_RESPONSES["coding"]
 
         if any(kw in message_lower for kw in general_keywords):
-            return True, "I'm specifically designed to help with PCOS and women's health questions. I cannot assist with general knowledge topics. Is there anything about PCOS, hormones, periods, fertility, or related health topics I can help you with?"
+            return True, OFF_TOPIC_RESPONSES["general"]
 
         if any(p in message_lower for p in math_patterns) and not has_health_context:
-            return True, "I'm specifically designed to help with PCOS and women's health questions. I cannot solve general math problems. Is there anything about PCOS, hormones, periods, fertility, or related health topics I can help you with?"
+            return True, OFF_TOPIC_RESPONSES["math"]
 
         if any(p in message_lower for p in non_medical_patterns):
-            return True, "I'm specifically designed to help with PCOS and women's health questions. I cannot create non-medical content. Is there anything about PCOS, hormones, periods, fertility, or related health topics I can help you with?"
+            return True, OFF_TOPIC_RESPONSES["non_medical"]
 
         # Question with no health context → likely off-topic
         question_words = ["what", "how", "why", "when", "where", "who", "which", "tell me", "explain"]
         is_question = any(w in message_lower for w in question_words)
         if is_question and not has_health_context and len(message.split()) > 3:
-            return True, "I'm specifically designed to help with PCOS and women's health questions. Your question doesn't seem to be related to PCOS or women's health. Is there anything about PCOS, hormones, periods, fertility, or related health topics I can help you with?"
+            return True, OFF_TOPIC_RESPONSES["unrelated"]
 
         return False, ""
 
@@ -289,7 +362,7 @@ IMPORTANT: If a question is not clearly about PCOS or women's health, politely d
     # Model warmup
     # ──────────────────────────────────────────────
 
-    async def warmup_model(self, model_name: Optional[str] = None):
+    async def warmup_model(self, model_name: Optional[str] = None, base_url: Optional[str] = None):
         """Pre-warm Ollama model(s) to eliminate first-request cold start.
         Uses keep_alive=-1 to pin models permanently in RAM.
         """
@@ -303,18 +376,19 @@ IMPORTANT: If a question is not clearly about PCOS or women's health, politely d
             models_to_warm.append(self.config.OLLAMA_BASE_MODEL)
             models_to_warm.append(self.urdu_model)
 
-        for model in models_to_warm:
+        urls = [base_url] if base_url else self.router.urls
+        for url, model in [(u, m) for u in urls for m in models_to_warm]:
             try:
-                logger.info(f"Warming up Ollama model: {model}")
+                logger.info(f"Warming up Ollama model: {model} on {url}")
                 async with httpx.AsyncClient(timeout=180) as client:
                     await client.post(
-                        f"{self.config.OLLAMA_BASE_URL}/api/generate",
+                        f"{url}/api/generate",
                         json={
                             "model": model,
                             "prompt": "Hi",
                             "stream": False,
                             "keep_alive": -1,
-                            "options": {"num_predict": 1, "num_thread": 8},
+                            "options": {"num_predict": 1, "num_thread": self.config.OLLAMA_NUM_THREAD},
                         },
                     )
                 logger.info(f"Model {model} warmed up and pinned in memory")
@@ -325,113 +399,250 @@ IMPORTANT: If a question is not clearly about PCOS or women's health, politely d
     # Ollama API calls
     # ──────────────────────────────────────────────
 
-    async def generate_response_ollama(self, prompt, model_name: str) -> str:
+    @staticmethod
+    def eval_stats(chunk: Dict[str, Any]) -> Dict[str, Any]:
+        """Timing fields from Ollama's final chunk, plus derived tokens/sec."""
+        stats = {k: chunk[k] for k in (
+            "total_duration", "load_duration",
+            "prompt_eval_count", "prompt_eval_duration",
+            "eval_count", "eval_duration",
+        ) if k in chunk}
+        if stats.get("eval_count") and stats.get("eval_duration"):
+            stats["tokens_per_sec"] = round(stats["eval_count"] / (stats["eval_duration"] / 1e9), 2)
+        if stats.get("prompt_eval_count") and stats.get("prompt_eval_duration"):
+            stats["prompt_tokens_per_sec"] = round(stats["prompt_eval_count"] / (stats["prompt_eval_duration"] / 1e9), 2)
+        return stats
+
+    def choose_profile(self, prompt, model_name: str) -> GenerationProfile:
+        """Generation budget for this request given current load."""
+        messages = prompt if isinstance(prompt, list) else [{"role": "user", "content": prompt}]
+        return generation_policy.current(
+            model_name,
+            queue_depth=sum(self.router.snapshot().values()),
+            message_length=len(messages[-1].get("content", "")) if messages else 0,
+            use_urdu=model_name == self.urdu_model,
+        )
+
+    def _chat_payload(self, prompt, model_name: str, stream: bool, profile: Optional[GenerationProfile] = None):
+        """Build the /api/chat body shared by the streaming and blocking calls."""
+        messages = prompt if isinstance(prompt, list) else [{"role": "user", "content": prompt}]
+        profile = profile or self.choose_profile(messages, model_name)
+        payload = {
+            "model": model_name,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": -1,
+            "options": profile.options(),
+        }
+        return payload, profile
+
+    def _record_stats(self, stats: Optional[Dict[str, Any]], result: Dict[str, Any], url: str, model_name: str, profile: GenerationProfile):
+        eval_stats = self.eval_stats(result)
+        if eval_stats.get("tokens_per_sec"):
+            generation_policy.record(model_name, eval_stats["tokens_per_sec"])
+        if stats is not None:
+            stats.update(eval_stats)
+            stats["backend"] = url
+            stats["profile"] = profile.name
+            stats["num_ctx"] = profile.num_ctx
+            stats["num_predict"] = profile.num_predict
+
+    async def generate_response_ollama(self, prompt, model_name: str, stats: Optional[Dict[str, Any]] = None, user_id: Optional[int] = None, profile: Optional[GenerationProfile] = None) -> str:
         """Generate a non-streaming response using Ollama /api/chat.
         Optimized for CPU-only inference with reduced context and threading.
+        If `stats` is given it is filled with Ollama's eval timings.
+        Fails over to the next endpoint in the pool on connection errors,
+        5xx and 404 (model missing there); other 4xx are returned as is.
         """
-        try:
-            messages = prompt if isinstance(prompt, list) else [{"role": "user", "content": prompt}]
-
-            payload = {
-                "model": model_name,
-                "messages": messages,
-                "stream": False,
-                "keep_alive": -1,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "top_k": 40,
-                    "num_ctx": 2048,       # Smaller context = faster (was 4096)
-                    "num_predict": 512,     # Cap output tokens (was 4096)
-                    "num_thread": 8,        # Use all 8 CPU cores
-                    "repeat_penalty": 1.1,  # Reduce repetitive output
-                },
-            }
-
-            response = requests.post(
-                f"{self.config.OLLAMA_BASE_URL}/api/chat",
-                json=payload,
-                timeout=180,
-            )
+        payload, profile = self._chat_payload(prompt, model_name, stream=False, profile=profile)
 
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("message", {}).get("content", "Sorry, I couldn't generate a response.")
-            else:
-                logger.error(f"Ollama API error: {response.status_code}")
-                return f"Error: Unable to connect to AI service (Status: {response.status_code})"
+        error = "Error: AI service unavailable. Please ensure Ollama is running."
+        for url in self.router.candidates(model_name, user_id):
+            try:
+                with self.router.acquire(url):
+                    response = requests.post(f"{url}/api/chat", json=payload, timeout=180)
+
+                if response.status_code == 200:
+                    result = response.json()
+                    self.router.remember(user_id, model_name, url)
+                    self._record_stats(stats, result, url, model_name, profile)
+                    return result.get("message", {}).get("content", "Sorry, I couldn't generate a response.")
+
+                logger.error(f"Ollama API error from {url}: {response.status_code}")
+                error = f"Error: Unable to connect to AI service (Status: {response.status_code})"
+                if not self.router.report_status(url, model_name, response.status_code):
+                    break
+
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Ollama request error from {url}: {e}")
+                self.router.mark_failed(url, str(e))
+            except Exception as e:
+                logger.error(f"Unexpected error in Ollama generation: {e}")
+                return f"Error: {str(e)}"
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ollama request error: {e}")
-            return "Error: AI service unavailable. Please ensure Ollama is running."
-        except Exception as e:
-            logger.error(f"Unexpected error in Ollama generation: {e}")
-            return f"Error: {str(e)}"
+        return error
 
-    def stream_ollama_tokens(self, prompt, model_name: str):
+    def stream_ollama_tokens(self, prompt, model_name: str, stats: Optional[Dict[str, Any]] = None, user_id: Optional[int] = None, profile: Optional[GenerationProfile] = None):
         """Generator: yields tokens from Ollama /api/chat (streaming).
         Optimized for CPU-only inference with reduced context and threading.
+        If `stats` is given it is filled from the final chunk's eval timings.
+        Fails over to the next endpoint in the pool if a request fails before
+        its first token; once tokens have been sent the error is reported.
+        A 4xx other than 404 is reported without trying other endpoints.
+        """
+        payload, profile = self._chat_payload(prompt, model_name, stream=True, profile=profile)
+        error = "no Ollama endpoint available"
+        for url in self.router.candidates(model_name, user_id):
+            logger.info(f"Streaming from Ollama: model={model_name}, url={url}/api/chat")
+            started = False
+            try:
+                with self.router.acquire(url), requests.post(
+                    f"{url}/api/chat",
+                    json=payload,
+                    stream=True,
+                    timeout=180,
+                ) as resp:
+                    if resp.status_code != 200:
+                        error = f"HTTP {resp.status_code}"
+                        logger.error(f"Ollama stream error from {url}: {error}")
+                        if self.router.report_status(url, model_name, resp.status_code):
+                            continue
+                        break
+                    for line in resp.iter_lines():
+                        if line:
+                            try:
+                                chunk = json.loads(line.decode("utf-8"))
+                                token = chunk.get("message", {}).get("content", "")
+                                if token:
+                                    started = True
+                                    yield token
+                                if chunk.get("done"):
+                                    self._record_stats(stats, chunk, url, model_name, profile)
+                                    break
+                            except json.JSONDecodeError:
+                                continue
+                self.router.remember(user_id, model_name, url)
+                return
+            except Exception as e:
+                logger.error(f"Ollama stream error from {url}: {e}")
+                self.router.mark_failed(url, str(e))
+                error = str(e)
+                if started:
+                    break
+        yield f"[Error: {error}]"
+
+    # ──────────────────────────────────────────────
+    # Single-flight streaming
+    # ──────────────────────────────────────────────
+
+    @staticmethod
+    def prompt_key(prompt, model_name: str) -> str:
+        """Coalescing key: model plus whitespace/case-normalized messages.
+
+        The messages include the system prompt (with any personal tracking
+        data) and history, so only requests that would send Ollama the same
+        prompt share a key.
         """
         messages = prompt if isinstance(prompt, list) else [{"role": "user", "content": prompt}]
+        digest = hashlib.sha256(model_name.encode("utf-8"))
+        for m in messages:
+            digest.update(b"\0" + m.get("role", "").encode("utf-8") + b"\0")
+            digest.update(" ".join(m.get("content", "").split()).casefold().encode("utf-8"))
+        return digest.hexdigest()
+
+    async def stream_tokens(self, prompt, model_name: str, stats: Optional[Dict[str, Any]] = None, user_id: Optional[int] = None):
+        """Async iterator over Ollama tokens with single-flight coalescing.
+
+        The first request for a prompt key starts the blocking HTTP stream in
+        a worker thread; identical requests arriving while it runs subscribe
+        to it instead of starting another generation. `stats` receives the
+        shared eval stats plus `coalesced` (True for followers) and, for the
+        request that started the stream, `executor_wait_ns`.
+        """
+        key = self.prompt_key(prompt, model_name) if self.config.CHAT_COALESCE else None
+        flight = self._flights.get(key) if key else None
+        leader = flight is None
+
+        if leader:
+            flight = _Flight(key)
+            if key:
+                self._flights[key] = flight
+            loop = asyncio.get_running_loop()
+
+            def _produce():
+                flight.started_ns = time.time_ns()
+                tokens = self.stream_ollama_tokens(prompt, model_name, flight.stats, user_id=user_id)
+                try:
+                    for token in tokens:
+                        if flight.abandoned:
+                            break
+                        loop.call_soon_threadsafe(flight.publish, token)
+                finally:
+                    # Closing the generator closes the HTTP stream to Ollama
+                    tokens.close()
+                    loop.call_soon_threadsafe(self._finish_flight, flight)
+
+            loop.run_in_executor(None, _produce)
+        else:
+            logger.info(f"Coalescing request into in-flight generation for {model_name}")
 
-        logger.info(f"Streaming from Ollama: model={model_name}, url={self.config.OLLAMA_BASE_URL}/api/chat")
-        payload = {
-            "model": model_name,
-            "messages": messages,
-            "stream": True,
-            "keep_alive": -1,
-            "options": {
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "top_k": 40,
-                "num_ctx": 2048,       # Smaller context = faster (was 4096)
-                "num_predict": 512,     # Cap output tokens (was 4096)
-                "num_thread": 8,        # Use all 8 CPU cores
-                "repeat_penalty": 1.1,  # Reduce repetitive output
-            },
-        }
+        queue = flight.subscribe()
         try:
-            with requests.post(
-                f"{self.config.OLLAMA_BASE_URL}/api/chat",
-                json=payload,
-                stream=True,
-                timeout=180,
-            ) as resp:
-                for line in resp.iter_lines():
-                    if line:
-                        try:
-                            chunk = json.loads(line.decode("utf-8"))
-                            token = chunk.get("message", {}).get("content", "")
-                            if token:
-                                yield token
-                            if chunk.get("done"):
-                                break
-                        except json.JSONDecodeError:
-                            continue
-        except Exception as e:
-            logger.error(f"Ollama stream error: {e}")
-            yield f"[Error: {str(e)}]"
+            while True:
+                token = await queue.get()
+                if token is None:
+                    break
+                yield token
+        finally:
+            if flight.unsubscribe(queue) and not flight.done:
+                # Everyone disconnected - stop generating and let new
+                # requests start fresh
+                flight.abandoned = True
+                self._forget_flight(flight)
+            if stats is not None:
+                stats.update(flight.stats)
+                stats["coalesced"] = not leader
+                if leader and flight.started_ns:
+                    stats["executor_wait_ns"] = flight.started_ns - flight.submitted_ns
+
+    def _finish_flight(self, flight: _Flight):
+        self._forget_flight(flight)
+        flight.publish(None)
+
+    def _forget_flight(self, flight: _Flight):
+        if flight.key and self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
 
     # ──────────────────────────────────────────────
     # Main generate (non-streaming)
     # ──────────────────────────────────────────────
 
-    async def generate_response(self, user_message: str, user_id: int, db: Session, model_override: Optional[str] = None, use_urdu: bool = False) -> str:
+    async def generate_response(self, user_message: str, user_id: int, db: AsyncSession, model_override: Optional[str] = None, use_urdu: bool = False, trace: Optional[Trace] = None) -> str:
         """Generate a complete response for the given user message."""
+        trace = trace or Trace("chat")
         try:
             # Off-topic check
-            is_off, off_response = self.is_off_topic(user_message, use_urdu)
+            with trace.span("is_off_topic") as attrs:
+                is_off, off_response = self.is_off_topic(user_message, use_urdu)
+                attrs["off_topic"] = is_off
             if is_off:
                 return off_response
 
             # Build prompt with user context + history
-            user_context = self.get_user_context(user_id, db)
+            with trace.span("get_user_context"):
+                user_context = await self.get_user_context(user_id, db)
             system_prompt = self.create_system_prompt(user_context, use_urdu)
-            chat_messages = self.build_chat_messages(system_prompt, user_id, db, user_message)
+            with trace.span("build_chat_messages") as attrs:
+                chat_messages = await self.build_chat_messages(system_prompt, user_id, db, user_message)
+                attrs["messages"] = len(chat_messages)
 
             # Pick Ollama model name
             model_name = self.urdu_model if use_urdu else self.config.OLLAMA_BASE_MODEL
-            response = await self.generate_response_ollama(chat_messages, model_name)
+            stats: Dict[str, Any] = {}
+            with trace.span("ollama.generate", model=model_name) as attrs:
+                response = await self.generate_response_ollama(chat_messages, model_name, stats, user_id=user_id)
+                attrs.update(stats)
+            trace.attributes["profile"] = stats.get("profile")
 
             # Append disclaimer
             response += self.create_medical_disclaimer(use_urdu)
@@ -446,28 +657,29 @@ IMPORTANT: If a question is not clearly about PCOS or women's health, politely d
     # ──────────────────────────────────────────────
 
     def get_available_models(self) -> List[Dict[str, Any]]:
-        """Get list of available Ollama models."""
-        models = [
+        """Get list of Ollama models, answered from the monitor's cached /api/tags."""
+        def _available(model: str) -> bool:
+            installed = ollama_monitor.has_model(model)
+            # Assume available until the first poll has completed
+            return True if installed is None else installed
+
+        return [
             {
                 "id": "base",
                 "name": "Base Model",
                 "description": "Primary PCOS assistant model",
                 "type": "ollama_base",
-                "available": True,
-            }
+                "available": _available(self.config.OLLAMA_BASE_MODEL),
+            },
+            {
+                "id": "urdu",
+                "name": "Urdu Model",
+                "description": "Urdu PCOS assistant model",
+                "type": "ollama_urdu",
+                "available": _available(self.urdu_model),
+            },
         ]
 
-        try:
-            response = requests.get(f"{self.config.OLLAMA_BASE_URL}/api/tags", timeout=5)
-            if response.status_code == 200:
-                ollama_models = response.json().get("models", [])
-                model_names = [m["name"] for m in ollama_models]
-                logger.info(f"Available Ollama models: {model_names}")
-        except Exception:
-            logger.warning("Could not reach Ollama to list models")
-
-        return models
-
     def get_model_status(self) -> Dict[str, Any]:
         """Get current model status and configuration."""
         return {
@@ -476,6 +688,7 @@ IMPORTANT: If a question is not clearly about PCOS or women's health, politely d
             "available_models": self.get_available_models(),
             "lora_loaded": False,
             "lora_dependencies_available": False,
+            "ollama": {**ollama_monitor.snapshot(), "outstanding": self.router.snapshot()},
         }
 
 
@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import Config
+from app.services.ollama_monitor import OllamaMonitor, normalize_model_name, ollama_monitor
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaRouter:
+    """Picks which Ollama endpoint serves a generation.
+
+    Candidates are the endpoints the monitor considers healthy (or has not
+    polled yet) that have the model installed, ordered by:
+
+    1. the user's sticky endpoint, so follow-up turns hit a warm KV cache,
+       as long as it is not much busier than the least loaded candidate;
+    2. endpoints where the model is already resident in RAM;
+    3. fewest outstanding requests from this process.
+
+    Callers try candidates in order. Connection errors and 5xx responses
+    (`mark_failed`) take the endpoint out of rotation until the monitor sees
+    it healthy; a 404 only drops the model from that endpoint; other 4xx
+    responses are the request's fault and leave routing alone (see
+    `report_status`). Counters are lock-protected because streams run in
+    worker threads.
+    """
+
+    def __init__(
+        self,
+        monitor: Optional[OllamaMonitor] = None,
+        sticky_ttl: Optional[float] = None,
+        sticky_slack: Optional[int] = None,
+    ):
+        self.monitor = monitor or ollama_monitor
+        self.sticky_ttl = sticky_ttl if sticky_ttl is not None else Config.OLLAMA_STICKY_TTL
+        self.sticky_slack = sticky_slack if sticky_slack is not None else Config.OLLAMA_STICKY_SLACK
+        self.outstanding: Dict[str, int] = {}
+        self._sticky: Dict[Tuple[int, str], Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self) -> List[str]:
+        return list(self.monitor.endpoints)
+
+    def candidates(self, model: str, user_id: Optional[int] = None) -> List[str]:
+        """Endpoints to try for `model`, best first."""
+        endpoints = list(self.monitor.endpoints.values())
+        usable = [
+            ep for ep in endpoints
+            if ep.healthy is not False and (ep.healthy is None or ep.has_model(model))
+        ]
+        if not usable:
+            # Nothing known-good - try everything rather than failing outright
+            usable = endpoints
+
+        with self._lock:
+            load = {ep.url: self.outstanding.get(ep.url, 0) for ep in usable}
+            sticky = self._sticky.get((user_id, model)) if user_id is not None else None
+
+        order = {ep.url: i for i, ep in enumerate(endpoints)}
+        ranked = sorted(usable, key=lambda ep: (not ep.is_resident(model), load[ep.url], order[ep.url]))
+        urls = [ep.url for ep in ranked]
+
+        if sticky and sticky[1] > time.monotonic() and sticky[0] in load:
+            url = sticky[0]
+            if load[url] <= min(load.values()) + self.sticky_slack:
+                urls.remove(url)
+                urls.insert(0, url)
+        return urls
+
+    @contextmanager
+    def acquire(self, url: str):
+        """Count a request as outstanding on `url` for the duration of the block."""
+        with self._lock:
+            self.outstanding[url] = self.outstanding.get(url, 0) + 1
+        try:
+            yield url
+        finally:
+            with self._lock:
+                self.outstanding[url] -= 1
+
+    def remember(self, user_id: Optional[int], model: str, url: str):
+        if user_id is None:
+            return
+        with self._lock:
+            self._sticky[(user_id, model)] = (url, time.monotonic() + self.sticky_ttl)
+            if len(self._sticky) > 10000:
+                now = time.monotonic()
+                self._sticky = {k: v for k, v in self._sticky.items() if v[1] > now}
+
+    def mark_failed(self, url: str, error: str):
+        ep = self.monitor.endpoints.get(url)
+        if ep is None:
+            return
+        if ep.healthy is not False:
+            logger.warning(f"Ollama at {url} failed, routing around it: {error}")
+        ep.healthy = False
+        ep.last_error = error
+
+    def mark_model_missing(self, url: str, model: str, error: str):
+        """`url` is up but can't serve `model`; other models keep using it."""
+        ep = self.monitor.endpoints.get(url)
+        if ep is None:
+            return
+        logger.warning(f"Ollama at {url} can't serve {model}, routing it elsewhere: {error}")
+        # Until the next poll refreshes the model lists
+        ep.installed.pop(normalize_model_name(model), None)
+        ep.resident.pop(normalize_model_name(model), None)
+
+    def report_status(self, url: str, model: str, status_code: int) -> bool:
+        """Handle a non-200 from `url`; True if another endpoint may succeed."""
+        error = f"HTTP {status_code}"
+        if status_code >= 500:
+            self.mark_failed(url, error)
+            return True
+        if status_code == 404:
+            # Ollama's "model not found"
+            self.mark_model_missing(url, model, error)
+            return True
+        # Any other 4xx: the request itself was rejected, every endpoint would
+        return False
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.outstanding)
+
+
+# Global router instance
+ollama_router = OllamaRouter()
@@ -0,0 +1,351 @@
+"""
+Shadow / canary rollout of retrained PCOS models.
+
+A model that lands in one of the model_store paths no longer goes live
+immediately. The first model ever seen becomes the active one. Later, any
+model with a different version becomes the *candidate*:
+
+- every prediction is answered by the active model;
+- for MODEL_SHADOW_FRACTION of them the candidate also scores the same
+  profile after the response has been sent (a FastAPI background task),
+  and we record whether the two disagree on the result, the calibrated
+  probability delta and each model's latency;
+- an admin promotes the candidate (it becomes active, the old active is
+  kept as `previous`) or rolls back (previous becomes active again and the
+  demoted version is never proposed as a candidate again).
+
+Each version is snapshotted under MODEL_ROLLOUT_DIR/versions, so the active
+model survives the landing path being overwritten; a snapshot is only used
+once it loads with the manifest the store validated. If snapshotting fails
+(a half-written bundle, a read-only directory) the active model keeps
+serving and the snapshot is retried later. The active/previous/
+rejected versions live in MODEL_ROLLOUT_DIR/state.json. Other workers see a
+promotion by that file's mtime. Shadow statistics are per worker (and also
+exported through /metrics).
+"""
+
+import json
+import logging
+import os
+import random
+import shutil
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import Config
+from app.core.metrics import prediction_model_latency, shadow_comparisons, shadow_probability_delta
+from app.services.pcos_model import LoadedModel, ModelSchemaError, ModelStore, load, model_store
+from app.services.risk import calibrate, classify
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per model version for the status percentiles
+LATENCY_WINDOW = 1000
+# Seconds before snapshotting a landed model is tried again after a failure
+SNAPSHOT_RETRY_SECONDS = 60
+
+
+class RolloutError(RuntimeError):
+    """Promote or rollback isn't possible in the current state."""
+
+
+class ShadowStats:
+    """Running comparison of a candidate against the active model."""
+
+    def __init__(self, active_version: str):
+        self.active_version = active_version
+        self.comparisons = 0
+        self.disagreements = 0
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+
+    def add(self, disagree: bool, delta: float):
+        self.comparisons += 1
+        self.disagreements += disagree
+        self.delta_sum += delta
+        self.abs_delta_sum += abs(delta)
+        self.max_abs_delta = max(self.max_abs_delta, abs(delta))
+
+    def summary(self) -> dict:
+        n = self.comparisons or 1
+        return {
+            "against": self.active_version,
+            "comparisons": self.comparisons,
+            "disagreement_rate": self.disagreements / n,
+            # candidate - active calibrated PCOS probability
+            "mean_delta": self.delta_sum / n,
+            "mean_abs_delta": self.abs_delta_sum / n,
+            "max_abs_delta": self.max_abs_delta,
+        }
+
+
+def _remove(path: str):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _matching(snapshot: LoadedModel, model: LoadedModel) -> LoadedModel:
+    if snapshot.manifest != model.manifest:
+        raise ModelSchemaError(f"copy of {model.version} doesn't match the loaded model (changed while copying)")
+    return snapshot
+
+
+def _percentile_ms(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000
+
+
+class ModelRollout:
+    def __init__(self, store: ModelStore, directory: Optional[str] = None, fraction: Optional[float] = None):
+        self.store = store
+        self.directory = directory or Config.MODEL_ROLLOUT_DIR
+        self.fraction = Config.MODEL_SHADOW_FRACTION if fraction is None else fraction
+        self.state_path = os.path.join(self.directory, "state.json")
+        self._state = {"active": None, "previous": None, "rejected": []}
+        self._state_mtime = None
+        self._models: Dict[str, LoadedModel] = {}
+        self._candidate: Optional[LoadedModel] = None
+        self._stats: Dict[str, ShadowStats] = {}
+        self._latency: Dict[str, deque] = {}
+        # version -> time.monotonic() of its last failed snapshot
+        self._snapshot_failed: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    # ──────────────────────────────────────────────
+    # State and snapshots
+    # ──────────────────────────────────────────────
+
+    def _snapshot_path(self, model: LoadedModel) -> str:
+        suffix = "" if os.path.isdir(model.path) else ".pkl"
+        return os.path.join(self.directory, "versions", model.version + suffix)
+
+    def _snapshot(self, model: LoadedModel) -> LoadedModel:
+        """Copy `model` under versions/ and load it from there.
+
+        The landing path can be rewritten while it is copied (a bundle is a
+        model file plus a manifest), so the copy is loaded and must carry the
+        manifest of the model the store already validated before it is moved
+        into place. An existing snapshot that doesn't load is replaced.
+        """
+        target = self._snapshot_path(model)
+        if os.path.exists(target):
+            try:
+                return _matching(load(target), model)
+            except Exception as e:
+                logger.warning("Replacing PCOS model snapshot %s: %s", target, e)
+                _remove(target)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = target + ".tmp"
+        _remove(tmp)
+        try:
+            if os.path.isdir(model.path):
+                shutil.copytree(model.path, tmp)
+            else:
+                shutil.copy2(model.path, tmp)
+            _matching(load(tmp), model)
+        except Exception:
+            _remove(tmp)
+            raise
+        os.replace(tmp, target)
+        return load(target)
+
+    def _model(self, version: str) -> Optional[LoadedModel]:
+        if version not in self._models:
+            for suffix in ("", ".pkl"):
+                path = os.path.join(self.directory, "versions", version + suffix)
+                if os.path.exists(path):
+                    self._models[version] = load(path)
+                    break
+        return self._models.get(version)
+
+    def _read_state(self):
+        try:
+            mtime = os.path.getmtime(self.state_path)
+        except OSError:
+            return
+        if mtime != self._state_mtime:
+            with open(self.state_path) as f:
+                self._state = json.load(f)
+            self._state_mtime = mtime
+
+    def _write_state(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.state_path + ".tmp", "w") as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(self.state_path + ".tmp", self.state_path)
+        self._state_mtime = os.path.getmtime(self.state_path)
+
+    def refresh(self):
+        """Pick up a newly landed model (as candidate) and state changes from other workers.
+
+        Errors are logged and leave the current active model serving.
+        """
+        try:
+            self._refresh()
+        except Exception as e:
+            logger.error("PCOS model rollout refresh failed: %s", e)
+
+    def _refresh(self):
+        landed = self.store.get()
+        with self._lock:
+            self._read_state()
+            if landed is not None and landed.version not in self._models:
+                failed_at = self._snapshot_failed.get(landed.version)
+                if failed_at is not None and time.monotonic() - failed_at < SNAPSHOT_RETRY_SECONDS:
+                    landed = None
+                else:
+                    # Serve from the snapshot: the landing file can be overwritten
+                    # under a memory-mapped model
+                    try:
+                        self._models[landed.version] = self._snapshot(landed)
+                        self._snapshot_failed.pop(landed.version, None)
+                    except Exception as e:
+                        self._snapshot_failed[landed.version] = time.monotonic()
+                        logger.error("Could not snapshot PCOS model %s, not using it yet: %s", landed.version, e)
+                        landed = None
+            if self._state["active"] is None and landed is not None:
+                self._state["active"] = landed.version
+                self._write_state()
+                logger.info("PCOS model %s is active", landed.version)
+
+            candidate = None
+            if landed is not None and landed.version != self._state["active"] \
+                    and landed.version not in self._state["rejected"]:
+                candidate = self._models[landed.version]
+            if candidate is not None and (self._candidate is None or self._candidate.version != candidate.version):
+                logger.info("PCOS model %s is the shadow candidate", candidate.version)
+            self._candidate = candidate
+
+    # ──────────────────────────────────────────────
+    # Serving
+    # ──────────────────────────────────────────────
+
+    def active(self) -> Optional[LoadedModel]:
+        self.refresh()
+        with self._lock:
+            version = self._state["active"]
+            try:
+                if version:
+                    return self._model(version)
+            except Exception as e:
+                logger.error("Could not load active PCOS model %s: %s", version, e)
+                return None
+        # No model could be snapshotted yet (e.g. MODEL_ROLLOUT_DIR isn't
+        # writable): serve the landed one as it is
+        return self.store.get()
+
+    def candidate(self) -> Optional[LoadedModel]:
+        return self._candidate
+
+    def shadow_candidate(self) -> Optional[LoadedModel]:
+        """The candidate, if this prediction is sampled for shadow scoring."""
+        candidate = self._candidate
+        if candidate is not None and random.random() < self.fraction:
+            return candidate
+        return None
+
+    def predict_proba(self, model: LoadedModel, features: List[float], role: str = "active") -> Tuple[list, float]:
+        """(class probabilities, seconds) for one row, recording the latency."""
+        start = time.perf_counter()
+        proba = model.model.predict_proba([features])[0]
+        seconds = time.perf_counter() - start
+        prediction_model_latency.observe(seconds, role=role, version=model.version)
+        with self._lock:
+            self._latency.setdefault(model.version, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+        return proba, seconds
+
+    def shadow_score(self, candidate: LoadedModel, active: LoadedModel, profile, active_proba):
+        """Score `profile` with the candidate and compare with the active result.
+
+        The row is built from the candidate's own manifest, which may order
+        or select features differently from the active model's. Runs after
+        the response has been sent; failures are only logged.
+        """
+        try:
+            proba, _ = self.predict_proba(candidate, candidate.row(profile), role="candidate")
+            # Compare what users would be shown: calibrated risk and the result from it
+            active_risk = calibrate(active, float(active_proba[-1]))
+            risk = calibrate(candidate, float(proba[-1]))
+            delta = risk - active_risk
+            disagree = classify(risk)[0] != classify(active_risk)[0]
+            shadow_comparisons.inc(version=candidate.version, result="disagree" if disagree else "agree")
+            shadow_probability_delta.observe(abs(delta), version=candidate.version)
+            with self._lock:
+                stats = self._stats.get(candidate.version)
+                if stats is None or stats.active_version != active.version:
+                    stats = self._stats[candidate.version] = ShadowStats(active.version)
+                stats.add(disagree, delta)
+        except Exception as e:
+            logger.error("Shadow scoring with %s failed: %s", candidate.version, e)
+
+    # ──────────────────────────────────────────────
+    # Promote / rollback
+    # ──────────────────────────────────────────────
+
+    def promote(self) -> dict:
+        self.refresh()
+        with self._lock:
+            if self._candidate is None:
+                raise RolloutError("No candidate model to promote")
+            version = self._candidate.version
+            self._state["previous"] = self._state["active"]
+            self._state["active"] = version
+            self._write_state()
+            self._candidate = None
+            logger.info("Promoted PCOS model %s (previous %s)", version, self._state["previous"])
+        return self.status()
+
+    def rollback(self) -> dict:
+        self.refresh()
+        with self._lock:
+            previous = self._state["previous"]
+            if previous is None:
+                raise RolloutError("No previous model to roll back to")
+            demoted = self._state["active"]
+            self._state["active"] = previous
+            self._state["previous"] = None
+            if demoted not in self._state["rejected"]:
+                self._state["rejected"].append(demoted)
+            self._write_state()
+            logger.info("Rolled back PCOS model %s to %s", demoted, previous)
+        self.refresh()
+        return self.status()
+
+    def status(self) -> dict:
+        self.refresh()
+        with self._lock:
+            def describe(version):
+                if version is None:
+                    return None
+                model = self._models.get(version)
+                latency = list(self._latency.get(version, ()))
+                return {
+                    "version": version,
+                    "metrics": model.manifest.get("metrics", {}) if model else {},
+                    "latency_ms": {
+                        "samples": len(latency),
+                        "p50": _percentile_ms(latency, 0.5),
+                        "p95": _percentile_ms(latency, 0.95),
+                    },
+                }
+
+            candidate = self._candidate.version if self._candidate else None
+            stats = self._stats.get(candidate) if candidate else None
+            return {
+                "active": describe(self._state["active"]),
+                "candidate": describe(candidate),
+                "previous": self._state["previous"],
+                "rejected": list(self._state["rejected"]),
+                "shadow_fraction": self.fraction,
+                "shadow": stats.summary() if stats else None,
+            }
+
+
+model_rollout = ModelRollout(model_store)
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# async (model_name, base_url) -> None - same shape as LLMService.warmup_model
+Warmup = Callable[[str, str], Awaitable[None]]
+
+
+def normalize_model_name(name: str) -> str:
+    """Ollama reports untagged models as `name:latest`."""
+    return name if ":" in name else f"{name}:latest"
+
+
+class EndpointStatus:
+    """Last known state of one Ollama server, refreshed by the monitor."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy: Optional[bool] = None  # None until the first poll
+        self.last_checked: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.latency_ms: Optional[float] = None
+        self.installed: Dict[str, Dict[str, Any]] = {}
+        self.resident: Dict[str, Dict[str, Any]] = {}
+
+    def has_model(self, model: str) -> bool:
+        return normalize_model_name(model) in self.installed
+
+    def is_resident(self, model: str) -> bool:
+        return normalize_model_name(model) in self.resident
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "last_checked": self.last_checked,
+            "last_error": self.last_error,
+            "latency_ms": self.latency_ms,
+            "installed": sorted(self.installed),
+            "resident": [
+                {
+                    "name": name,
+                    "size": info.get("size"),
+                    "size_vram": info.get("size_vram"),
+                    "expires_at": info.get("expires_at"),
+                }
+                for name, info in sorted(self.resident.items())
+            ],
+            "resident_bytes": sum(info.get("size") or 0 for info in self.resident.values()),
+        }
+
+
+class OllamaMonitor:
+    """Polls Ollama's /api/tags and /api/ps in the background.
+
+    Status endpoints read the cached `EndpointStatus` instead of calling
+    Ollama per request. When `rewarm` is enabled (only in the worker that
+    holds the warmup lock) models we serve that are installed but no longer
+    resident are warmed up again.
+    """
+
+    def __init__(self, urls: Optional[List[str]] = None, interval: Optional[float] = None, timeout: Optional[float] = None):
+        self.interval = interval if interval is not None else Config.OLLAMA_MONITOR_INTERVAL
+        self.timeout = timeout if timeout is not None else Config.OLLAMA_MONITOR_TIMEOUT
+        self.endpoints: Dict[str, EndpointStatus] = {}
+        for url in urls or Config.OLLAMA_BASE_URLS:
+            self.add_endpoint(url)
+        self.models: List[str] = []
+        self._warmup: Optional[Warmup] = None
+        self._warming: set = set()
+        # Running re-warm tasks - referenced so they aren't garbage collected
+        # mid-flight, and cancelled by stop()
+        self._rewarm_tasks: set = set()
+        self._task: Optional[asyncio.Task] = None
+        self._client = None
+
+    def add_endpoint(self, url: str) -> EndpointStatus:
+        url = url.rstrip("/")
+        return self.endpoints.setdefault(url, EndpointStatus(url))
+
+    async def start(self, models: List[str], warmup: Optional[Warmup] = None):
+        """Begin polling. Pass `warmup` to re-warm evicted `models`."""
+        import httpx
+
+        self.models = [normalize_model_name(m) for m in models]
+        self._warmup = warmup
+        self._client = httpx.AsyncClient(timeout=self.timeout)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Ollama monitor polling {len(self.endpoints)} endpoint(s) every {self.interval}s")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in self._rewarm_tasks:
+            task.cancel()
+        await asyncio.gather(*self._rewarm_tasks, return_exceptions=True)
+        self._rewarm_tasks.clear()
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    async def _run(self):
+        while True:
+            await self.poll()
+            await asyncio.sleep(self.interval)
+
+    async def poll(self):
+        """Refresh every endpoint once."""
+        await asyncio.gather(*(self._poll_endpoint(ep) for ep in self.endpoints.values()))
+
+    async def _poll_endpoint(self, ep: EndpointStatus):
+        start = time.perf_counter()
+        try:
+            tags, ps = await asyncio.gather(
+                self._client.get(f"{ep.url}/api/tags"),
+                self._client.get(f"{ep.url}/api/ps"),
+            )
+            tags.raise_for_status()
+            ps.raise_for_status()
+            ep.installed = {normalize_model_name(m["name"]): m for m in tags.json().get("models", [])}
+            ep.resident = {normalize_model_name(m["name"]): m for m in ps.json().get("models", [])}
+            if ep.healthy is False:
+                logger.info(f"Ollama at {ep.url} is reachable again")
+            ep.healthy = True
+            ep.last_error = None
+        except Exception as e:
+            if ep.healthy is not False:
+                logger.warning(f"Ollama at {ep.url} unreachable: {e}")
+            ep.healthy = False
+            ep.last_error = str(e) or type(e).__name__
+            ep.resident = {}
+        finally:
+            ep.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            ep.last_checked = time.time()
+
+        if ep.healthy and self._warmup:
+            for model in self.models:
+                if ep.has_model(model) and not ep.is_resident(model):
+                    self._rewarm(ep, model)
+
+    def _rewarm(self, ep: EndpointStatus, model: str):
+        key = (ep.url, model)
+        if key in self._warming:
+            return
+        self._warming.add(key)
+        logger.info(f"Model {model} was evicted from {ep.url}, re-warming")
+
+        async def _run():
+            try:
+                await self._warmup(model, ep.url)
+            except Exception as e:
+                logger.warning(f"Re-warming {model} on {ep.url} failed: {e}")
+            finally:
+                self._warming.discard(key)
+
+        task = asyncio.create_task(_run())
+        self._rewarm_tasks.add(task)
+        task.add_done_callback(self._rewarm_tasks.discard)
+
+    # ──────────────────────────────────────────────
+    # Cached lookups
+    # ──────────────────────────────────────────────
+
+    @property
+    def healthy(self) -> Optional[bool]:
+        """True if any endpoint is up, None before the first poll."""
+        states = [ep.healthy for ep in self.endpoints.values()]
+        if all(s is None for s in states):
+            return None
+        return any(states)
+
+    def has_model(self, model: str) -> Optional[bool]:
+        """Whether any endpoint has `model` installed, None if not yet known."""
+        known = [ep for ep in self.endpoints.values() if ep.healthy is not None]
+        if not known:
+            return None
+        return any(ep.healthy and ep.has_model(model) for ep in known)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "endpoints": [ep.to_dict() for ep in self.endpoints.values()],
+        }
+
+
+# Global monitor instance
+ollama_monitor = OllamaMonitor()
@@ -6,6 +6,8 @@ from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+from app.core.metrics import otp_sends
+
 load_dotenv()
 
 
@@ -49,10 +51,12 @@ class OTPService:
                 server.sendmail(self.from_email, to_email, msg.as_string())
 
             print(f"Email sent successfully to {to_email}")
+            otp_sends.inc(result="sent")
             return True
 
         except Exception as e:
             print(f"Email error: {e}")
+            otp_sends.inc(result="failed")
             return False
 
     def send_verification_email(self, username: str, email: str, otp_code: str) -> bool:
@@ -80,11 +84,12 @@ class OTPService:
 
     # ---------------- CLEANUP ----------------
     @staticmethod
-    def cleanup_expired_otps(db_session) -> int:
+    async def cleanup_expired_otps(db_session) -> int:
         """
         Delete expired and used OTPs from database
         Returns the number of deleted records
         """
+        from sqlalchemy import delete
         from app.models.user import OTPToken
         from datetime import datetime
         
@@ -93,14 +98,16 @@ class OTPService:
         # 2. Used (is_used = True)
         # 3. Older than 24 hours (regardless of status)
         
-        deleted_count = db_session.query(OTPToken).filter(
-            (OTPToken.otp_expires_at < datetime.utcnow()) |
-            (OTPToken.is_used == True) |
-            (OTPToken.created_at < datetime.utcnow() - timedelta(hours=24))
-        ).delete(synchronize_session=False)
-
-        db_session.commit()
-        return deleted_count
+        result = await db_session.execute(
+            delete(OTPToken).where(
+                (OTPToken.otp_expires_at < datetime.utcnow()) |
+                (OTPToken.is_used == True) |
+                (OTPToken.created_at < datetime.utcnow() - timedelta(hours=24))
+            ).execution_options(synchronize_session=False)
+        )
+
+        await db_session.commit()
+        return result.rowcount
 
 
 otp_service = OTPService()
\ No newline at end of file
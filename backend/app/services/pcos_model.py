@@ -0,0 +1,210 @@
+"""
+PCOS model bundles: loading, schema validation and feature mapping.
+
+Training (ml-models/src/models/train_best_model.py) writes a bundle
+directory with model.joblib and a manifest.json describing the features the
+model was fit on (names, order, dtypes), its classes, version, the sha256
+of the model file and optionally a probability calibration table (applied
+by app.services.risk). Before a bundle is served the manifest is checked
+against the model and against FEATURE_FIELDS, which maps each training
+column to the UserHealthProfile field that feeds it, so rows are built by
+name rather than by a hand-copied position list.
+
+A bare pcos_model.pkl from before bundles is still accepted; it is
+described by LEGACY_MANIFEST.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.metrics import cache_requests
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+# Training column -> (UserHealthProfile field, value used when it is unset)
+FEATURE_FIELDS = {
+    "Period Length": ("typical_period_length", 5),
+    "Cycle Length": ("typical_cycle_length", 28),
+    "Age": ("age_group", 2),
+    "Overweight": ("is_overweight", 0),
+    "loss weight gain / weight loss": ("has_weight_fluctuation", 0),
+    "irregular or missed periods": ("has_irregular_periods", 0),
+    "Difficulty in conceiving": ("difficulty_conceiving", 0),
+    "Hair growth on Chin": ("hair_chin", 0),
+    "Hair growth  on Cheeks": ("hair_cheeks", 0),
+    "Hair growth Between breasts": ("hair_breasts", 0),
+    "Hair growth  on Upper lips ": ("hair_upper_lips", 0),
+    "Hair growth in Arms": ("hair_arms", 0),
+    "Hair growth on Inner thighs": ("hair_thighs", 0),
+    "Acne or skin tags": ("has_acne", 0),
+    "Hair thinning or hair loss ": ("has_hair_loss", 0),
+    "Dark patches": ("has_dark_patches", 0),
+    "always tired": ("always_tired", 0),
+    "more Mood Swings": ("frequent_mood_swings", 0),
+    "exercise per week": ("exercise_per_week", 0),
+    "eat outside per week": ("eat_outside_per_week", 0),
+    "canned food often": ("consumes_canned_food", 0),
+}
+
+# What a pre-bundle pcos_model.pkl was trained on
+LEGACY_MANIFEST = {
+    "format_version": 0,
+    "model_version": "v1.1",
+    "features": [{"name": name, "dtype": "int64"} for name in FEATURE_FIELDS],
+    "classes": [0, 1],
+}
+
+
+class ModelSchemaError(ValueError):
+    """The bundle doesn't describe the model, or asks for unknown features."""
+
+
+class LoadedModel(NamedTuple):
+    model: Any
+    manifest: dict
+    path: str
+    # UserHealthProfile (field, default) per model feature, in model order
+    fields: Tuple[Tuple[str, Any], ...]
+
+    @property
+    def version(self) -> str:
+        return self.manifest["model_version"]
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [f["name"] for f in self.manifest["features"]]
+
+    def row(self, profile) -> List[float]:
+        """The profile as one feature row, in the order the model expects."""
+        return [float(getattr(profile, field) or default) for field, default in self.fields]
+
+    def rows(self, profiles: Sequence):
+        import numpy as np
+
+        return np.array([self.row(p) for p in profiles], dtype=np.float64).reshape(len(profiles), len(self.fields))
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def validate(model, manifest: dict) -> Tuple[Tuple[str, Any], ...]:
+    """Check `manifest` against `model` and FEATURE_FIELDS; returns the field mapping."""
+    import numpy as np
+
+    if manifest.get("format_version", 0) > SUPPORTED_FORMAT_VERSION:
+        raise ModelSchemaError(f"bundle format {manifest['format_version']} is newer than this server supports")
+
+    names = [f["name"] for f in manifest["features"]]
+    unknown = [name for name in names if name not in FEATURE_FIELDS]
+    if unknown:
+        raise ModelSchemaError(f"model expects features the health profile doesn't provide: {unknown}")
+    non_numeric = [f["name"] for f in manifest["features"] if np.dtype(f["dtype"]).kind not in "biuf"]
+    if non_numeric:
+        raise ModelSchemaError(f"non-numeric features: {non_numeric}")
+
+    n_features = getattr(model, "n_features_in_", len(names))
+    if n_features != len(names):
+        raise ModelSchemaError(f"model takes {n_features} features, manifest lists {len(names)}")
+    fitted_names = getattr(model, "feature_names_in_", None)
+    if fitted_names is not None and list(fitted_names) != names:
+        raise ModelSchemaError("manifest feature order differs from the order the model was fit on")
+    if [int(c) for c in model.classes_] != manifest["classes"]:
+        raise ModelSchemaError(f"model classes {list(model.classes_)} != manifest {manifest['classes']}")
+
+    table = manifest.get("calibration")
+    if table:
+        raw, calibrated = np.asarray(table["raw"]), np.asarray(table["calibrated"])
+        if raw.shape != calibrated.shape or len(raw) < 2 or (np.diff(raw) <= 0).any() \
+                or (np.diff(calibrated) < 0).any() or calibrated.min() < 0 or calibrated.max() > 1:
+            raise ModelSchemaError("calibration table must map increasing raw scores to non-decreasing probabilities")
+
+    return tuple(FEATURE_FIELDS[name] for name in names)
+
+
+def load(path: str) -> LoadedModel:
+    """Load and validate a bundle directory or a legacy .pkl file."""
+    if os.path.isdir(path):
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        model_file = os.path.join(path, manifest["model_file"])
+        if _sha256(model_file) != manifest["model_sha256"]:
+            raise ModelSchemaError(f"{model_file} doesn't match the manifest's sha256")
+        import joblib
+
+        # Uncompressed dump: tree arrays are memory-mapped rather than copied
+        model = joblib.load(model_file, mmap_mode="r")
+    else:
+        import pickle
+
+        manifest = LEGACY_MANIFEST
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+    return LoadedModel(model, manifest, path, validate(model, manifest))
+
+
+class ModelStore:
+    """The serving model, reloaded when the file on disk changes.
+
+    `paths` are tried in order; the first that exists is served. A bundle is
+    tracked by its manifest's mtime (the manifest is written last). If a new
+    file fails to load or validate, the previous model keeps serving.
+    """
+
+    def __init__(self, paths: Sequence[str]):
+        self.paths = list(paths)
+        self._loaded: Optional[LoadedModel] = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _current(self) -> Optional[Tuple[str, float]]:
+        for path in self.paths:
+            marker = os.path.join(path, MANIFEST_FILE) if os.path.isdir(path) else path
+            if os.path.isfile(marker):
+                return path, os.path.getmtime(marker)
+        return None
+
+    def get(self) -> Optional[LoadedModel]:
+        current = self._current()
+        if current is None:
+            return self._loaded
+        if current == self._stamp:
+            cache_requests.inc(cache="model", result="hit")
+            return self._loaded
+        with self._lock:
+            if current != self._stamp:
+                cache_requests.inc(cache="model", result="miss")
+                try:
+                    self._loaded = load(current[0])
+                    logger.info("Loaded PCOS model %s from %s", self._loaded.version, current[0])
+                except Exception as e:
+                    logger.error("Could not load PCOS model from %s: %s", current[0], e)
+                # Don't retry a bad file on every request
+                self._stamp = current
+        return self._loaded
+
+
+_backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # backend/
+_local_dir = os.path.join(_backend_dir, "..", "ml-models", "models", "saved")
+_deploy_dir = os.path.join(_backend_dir, "models")
+
+# Local training output first, then what's deployed with the backend
+MODEL_PATHS = [
+    os.path.join(_local_dir, "pcos_model"),
+    os.path.join(_deploy_dir, "pcos_model"),
+    os.path.join(_local_dir, "pcos_model.pkl"),
+    os.path.join(_deploy_dir, "pcos_model.pkl"),
+]
+
+model_store = ModelStore(MODEL_PATHS)
@@ -0,0 +1,64 @@
+"""
+PCOS risk: calibrated probability, the PCOS / No PCOS result and the
+Low / Moderate / High / Very High band shown to the user.
+
+Bundles trained with a calibration stage carry a lookup table (raw model
+probability -> observed PCOS rate, see ml-models/src/models/calibration.py)
+in their manifest. `calibrate` interpolates it, and `risk_bands` maps scores
+onto the bands with one searchsorted call. Both work on a single score or an
+array, so the prediction endpoints and cohort analysis share one definition
+of the cutoffs. `classify` derives the result and its confidence from the
+same calibrated probability, so they never contradict the risk score.
+"""
+
+from typing import List, Sequence, Tuple
+
+from app.services.pcos_model import LoadedModel
+
+# Calibrated PCOS probability at or above which the result is "PCOS"
+PCOS_THRESHOLD = 0.5
+
+# Upper cutoffs in percent - a score below 20 is Low, 80 and above Very High
+RISK_CUTOFFS = (20, 50, 80)
+RISK_LEVELS = ("Low", "Moderate", "High", "Very High")
+RISK_COLORS = (
+    "#10B981",  # Emerald
+    "#F59E0B",  # Amber
+    "#EF4444",  # Red
+    "#B91C1C",  # Dark Red
+)
+
+
+def calibrate(loaded: LoadedModel, raw):
+    """Calibrated PCOS probability for raw predict_proba scores (float or array).
+
+    Models without a calibration table (legacy pickles) pass through.
+    """
+    table = loaded.manifest.get("calibration")
+    if not table:
+        return raw
+    import numpy as np
+
+    calibrated = np.interp(raw, table["raw"], table["calibrated"])
+    return float(calibrated) if np.ndim(calibrated) == 0 else calibrated
+
+
+def classify(risk_score: float) -> Tuple[str, float]:
+    """("PCOS" or "No PCOS", confidence in that result) for a calibrated probability."""
+    if risk_score >= PCOS_THRESHOLD:
+        return "PCOS", risk_score
+    return "No PCOS", 1.0 - risk_score
+
+
+def risk_bands(risk_percentages: Sequence[float]) -> Tuple[List[str], List[str]]:
+    """(levels, colors) for each risk percentage (a list or NumPy array)."""
+    import numpy as np
+
+    band = np.searchsorted(RISK_CUTOFFS, np.asarray(risk_percentages, dtype=np.float64), side="right")
+    return [RISK_LEVELS[b] for b in band], [RISK_COLORS[b] for b in band]
+
+
+def risk_band(risk_percentage: float) -> Tuple[str, str]:
+    """(level, color) for one risk percentage."""
+    levels, colors = risk_bands([risk_percentage])
+    return levels[0], colors[0]
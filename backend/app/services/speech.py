@@ -1,32 +1,67 @@
-import edge_tts
 import asyncio
 import os
 import logging
-from typing import Optional
+from typing import Optional, AsyncIterator
 
 logger = logging.getLogger(__name__)
 
+
+class EdgeTTSBackend:
+    """Synthesizer backend using edge-tts (Free Microsoft Edge TTS).
+
+    A backend is any object with an async generator `stream(text, voice)`
+    yielding MP3 bytes, so a local fake can stand in for tests.
+    """
+
+    async def stream(self, text: str, voice: str) -> AsyncIterator[bytes]:
+        # Imported lazily - edge_tts pulls in aiohttp and is slow to import
+        import edge_tts
+
+        communicate = edge_tts.Communicate(text, voice)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+
 class SpeechService:
-    def __init__(self):
+    def __init__(self, backend=None):
         # Urdu voices: ur-PK-UzmaNeural (Female), ur-PK-AsadNeural (Male)
         self.urdu_voice = "ur-PK-UzmaNeural"
         self.english_voice = "en-US-AvaNeural"
         self.pashto_voice = "ps-AF-GulNawazNeural"
+        self.backend = backend or EdgeTTSBackend()
+
+    def set_backend(self, backend):
+        """Swap the synthesizer backend (e.g. a local fake in tests)."""
+        self.backend = backend
+
+    def voice_for(self, lang: str = "ur") -> str:
+        """Edge TTS voice used for a language code (defaults to Urdu)."""
+        if lang == "en":
+            return self.english_voice
+        if lang == "ps":
+            return self.pashto_voice
+        return self.urdu_voice
+
+    async def stream_speech(self, text: str, lang: str = "ur") -> AsyncIterator[bytes]:
+        """Yield MP3 chunks as the backend produces them (no file on disk)."""
+        async for chunk in self.backend.stream(text, self.voice_for(lang)):
+            yield chunk
 
     async def text_to_speech(self, text: str, output_path: str, lang: str = "ur") -> bool:
         """
-        Convert text to speech using edge-tts (Free Microsoft Edge TTS)
+        Convert text to speech and write the whole MP3 to output_path.
+        Returns False if synthesis failed or produced no audio.
         """
         try:
-            voice = self.urdu_voice
-            if lang == "en":
-                voice = self.english_voice
-            elif lang == "ps":
-                voice = self.pashto_voice
-            
-            communicate = edge_tts.Communicate(text, voice)
-            await communicate.save(output_path)
-            return True
+            size = 0
+            with open(output_path, "wb") as f:
+                async for chunk in self.stream_speech(text, lang):
+                    f.write(chunk)
+                    size += len(chunk)
+            if not size:
+                logger.error("TTS Error: backend returned no audio")
+            return size > 0
         except Exception as e:
             logger.error(f"TTS Error: {e}")
             return False
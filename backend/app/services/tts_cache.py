@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from typing import Optional, Callable, Awaitable, NamedTuple
+
+from app.core.config import Config
+from app.services.speech import speech_service
+
+logger = logging.getLogger(__name__)
+
+# async (text, output_path, lang) -> bool - same shape as SpeechService.text_to_speech
+Synthesizer = Callable[[str, str, str], Awaitable[bool]]
+
+# Files used this recently are never evicted: a FileResponse that was just
+# handed the path hasn't necessarily opened it yet
+EVICT_GRACE_SECONDS = 60
+
+
+class CachedAudio(NamedTuple):
+    key: str
+    path: str
+    hit: bool
+
+
+class TTSCache:
+    """Content-addressed on-disk MP3 cache for synthesized speech.
+
+    Files are named by sha256(text, lang, voice), so the same reply (or the
+    fixed disclaimers) is synthesized once and served from disk afterwards.
+    The directory is capped at `max_bytes`; least recently used files are
+    evicted first (hits bump the file mtime), except the file just written
+    and files used within EVICT_GRACE_SECONDS. Audio is written to a unique
+    temp file and renamed into place, so concurrent writers of the same
+    text (other requests or worker processes) never share a partial file.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        synthesize: Optional[Synthesizer] = None,
+    ):
+        self.directory = directory or Config.TTS_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else Config.TTS_CACHE_MAX_MB * 1024 * 1024
+        # Injectable so the cache can be exercised offline with a stub
+        self.synthesize = synthesize or speech_service.text_to_speech
+        self.hits = 0
+        self.misses = 0
+        self._locks: dict = {}
+        # Estimated directory size; the directory is only scanned when over the cap
+        self._bytes: Optional[int] = None
+
+    @staticmethod
+    def cache_key(text: str, lang: str, voice: str) -> str:
+        digest = hashlib.sha256()
+        for part in (voice, lang, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def lookup(self, text: str, lang: str) -> Optional[CachedAudio]:
+        """Return the cached file for (text, lang) without synthesizing."""
+        key = self.cache_key(text, lang, speech_service.voice_for(lang))
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        self._touch(path)
+        return CachedAudio(key, path, True)
+
+    async def get_or_create(self, text: str, lang: str = "ur") -> Optional[CachedAudio]:
+        """Return the cached MP3 for (text, lang), synthesizing it on a miss."""
+        cached = self.lookup(text, lang)
+        if cached:
+            self.hits += 1
+            return cached
+
+        key = self.cache_key(text, lang, speech_service.voice_for(lang))
+        path = self.path_for(key)
+        # One synthesis per key even if several requests miss at once
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            try:
+                if os.path.exists(path):
+                    self.hits += 1
+                    self._touch(path)
+                    return CachedAudio(key, path, True)
+
+                self.misses += 1
+                tmp_path = self._temp_path()
+                ok = await self.synthesize(text, tmp_path, lang)
+                if not ok or not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    return None
+                os.replace(tmp_path, path)
+            finally:
+                self._locks.pop(key, None)
+
+        self._evict(keep=path)
+        return CachedAudio(key, path, False)
+
+    def put(self, text: str, lang: str, data: bytes) -> str:
+        """Store audio that was synthesized elsewhere (e.g. streamed) and return its key."""
+        key = self.cache_key(text, lang, speech_service.voice_for(lang))
+        path = self.path_for(key)
+        tmp_path = self._temp_path()
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._evict(keep=path)
+        return key
+
+    def _temp_path(self) -> str:
+        """A new, uniquely named file in the cache directory (same filesystem, so rename is atomic)."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        return tmp_path
+
+    # ──────────────────────────────────────────────
+    # LRU bookkeeping
+    # ──────────────────────────────────────────────
+
+    @staticmethod
+    def _touch(path: str):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _evict(self, keep: str):
+        """Trim the directory to `max_bytes` after `keep` was written.
+
+        `keep` is never evicted, even if it alone is over the cap.
+        """
+        try:
+            if self._bytes is not None:
+                self._bytes += os.path.getsize(keep)
+                if self._bytes <= self.max_bytes:
+                    return
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(".mp3"):
+                        continue
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+            entries.sort()  # oldest access first
+            in_use = time.time() - EVICT_GRACE_SECONDS
+            for mtime, size, path in entries:
+                if total <= self.max_bytes or mtime >= in_use:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # another worker evicted it
+                total -= size
+                logger.debug(f"Evicted TTS cache entry {os.path.basename(path)}")
+            self._bytes = total
+        except OSError as e:
+            logger.warning(f"TTS cache eviction failed: {e}")
+
+
+# Global cache instance
+tts_cache = TTSCache()
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from typing import List, Optional, Callable, Awaitable
+
+from app.core.config import Config
+from app.services.speech import speech_service
+from app.services.tts_cache import tts_cache
+from app.services.canned import canned_responses
+
+logger = logging.getLogger(__name__)
+
+# Sentence terminators, including Urdu full stop (۔) and question mark (؟)
+SENTENCE_ENDINGS = ".!?۔؟…"
+# Terminators that are never part of a number/abbreviation and can cut immediately
+HARD_ENDINGS = "۔؟\n"
+
+
+class SentenceSegmenter:
+    """Cuts a token stream into complete sentences for speech synthesis.
+
+    A latin terminator (., !, ?) only ends a sentence once it is followed by
+    whitespace, so decimals like "2.5" are not split. Urdu terminators and
+    newlines cut immediately. Fragments shorter than `min_chars` are merged
+    into the next sentence to avoid many tiny synthesis calls.
+    """
+
+    def __init__(self, min_chars: int = 12):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        self._buffer += token
+        sentences = []
+        start = 0
+        i = 0
+        while i < len(self._buffer):
+            ch = self._buffer[i]
+            cut = None
+            if ch in HARD_ENDINGS:
+                cut = i + 1
+            elif ch in SENTENCE_ENDINGS:
+                # Need the next char to decide; wait for more tokens otherwise
+                if i + 1 < len(self._buffer) and self._buffer[i + 1].isspace():
+                    cut = i + 1
+            if cut is not None:
+                sentence = self._buffer[start:cut].strip()
+                if len(sentence) >= self.min_chars:
+                    sentences.append(sentence)
+                    start = cut
+            i += 1
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is left once the token stream has ended."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return rest or None
+
+
+# emit(seq, chunk) - chunk is None once a sentence's audio is complete
+AudioEmitter = Callable[[int, Optional[bytes]], Awaitable[None]]
+
+
+class SpeechPipeline:
+    """Synthesizes sentences concurrently but emits their audio in order.
+
+    `submit()` starts synthesis for a sentence right away (bounded by a
+    semaphore); a single pump task forwards each sentence's chunks to
+    `emit` strictly in submission order, so sentence 2 can be synthesized
+    while sentence 1 is still playing.
+    """
+
+    def __init__(self, lang: str, emit: AudioEmitter, concurrency: int = None):
+        self.lang = lang
+        self.emit = emit
+        self._semaphore = asyncio.Semaphore(concurrency or Config.TTS_PIPELINE_CONCURRENCY)
+        self._order: asyncio.Queue = asyncio.Queue()
+        self._tasks = []
+        self._seq = 0
+        self._pump_task = asyncio.create_task(self._pump())
+
+    @property
+    def submitted(self) -> int:
+        return self._seq
+
+    def submit(self, sentence: str):
+        chunks: asyncio.Queue = asyncio.Queue()
+        self._tasks.append(asyncio.create_task(self._synthesize(sentence, chunks)))
+        self._order.put_nowait((self._seq, chunks))
+        self._seq += 1
+
+    async def close(self):
+        """Wait until every submitted sentence has been emitted."""
+        self._order.put_nowait(None)
+        await self._pump_task
+
+    async def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+        self._pump_task.cancel()
+
+    async def _synthesize(self, sentence: str, chunks: asyncio.Queue):
+        try:
+            canned = canned_responses.audio(sentence, self.lang)
+            if canned:
+                chunks.put_nowait(canned.data)
+                return
+
+            cached = tts_cache.lookup(sentence, self.lang)
+            if cached:
+                tts_cache.hits += 1
+                with open(cached.path, "rb") as f:
+                    chunks.put_nowait(f.read())
+                return
+
+            tts_cache.misses += 1
+            audio = []
+            async with self._semaphore:
+                async for chunk in speech_service.stream_speech(sentence, self.lang):
+                    audio.append(chunk)
+                    chunks.put_nowait(chunk)
+            if audio:
+                tts_cache.put(sentence, self.lang, b"".join(audio))
+        except Exception as e:
+            logger.error(f"Sentence synthesis failed: {e}")
+        finally:
+            chunks.put_nowait(None)
+
+    async def _pump(self):
+        while True:
+            item = await self._order.get()
+            if item is None:
+                return
+            seq, chunks = item
+            while True:
+                chunk = await chunks.get()
+                await self.emit(seq, chunk)
+                if chunk is None:
+                    break
@@ -176,6 +176,13 @@ CREATE INDEX IF NOT EXISTS idx_chat_created_at ON chat_messages(created_at DESC)
 CREATE INDEX IF NOT EXISTS idx_chat_model_used ON chat_messages(model_used);
 CREATE INDEX IF NOT EXISTS idx_chat_user_created ON chat_messages(user_id, created_at DESC);
 
+-- Chat message ids handed out before the row is written (write-behind);
+-- one row per table, blocks are reserved with UPDATE ... RETURNING
+CREATE TABLE IF NOT EXISTS id_allocations (
+    name VARCHAR(50) PRIMARY KEY,
+    next_id INTEGER NOT NULL
+);
+
 -- ============================================================================
 -- CYCLE_DATA TABLE
 -- ============================================================================
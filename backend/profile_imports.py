@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Import-time profile for the API process.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter,
+writes a report of the slowest imports and exits non-zero when startup
+regresses: either the total import time exceeds the budget, or one of the
+heavy optional modules (edge_tts, numpy, sklearn, ...) is imported eagerly.
+tests/test_import_time.py runs the same check as part of the test suite.
+
+Usage:
+    python profile_imports.py [--budget-ms 2500] [--report import_time_report.txt]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Modules that must only be imported lazily, on first use
+LAZY_MODULES = ["edge_tts", "numpy", "sklearn", "pandas", "uvicorn"]
+BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2500"))
+
+
+def run_importtime(target: str, cwd: str) -> list:
+    """Return [(self_us, cumulative_us, depth, module)] for a fresh import of `target`."""
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "import-profile")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        raise SystemExit(f"Importing {target} failed")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def summarize(rows: list, target: str, lazy_modules=LAZY_MODULES):
+    """(total import ms of `target`, lazy modules that were imported anyway)."""
+    total_us = next(cum for _, cum, _, name in rows if name == target)
+    imported = {name for _, _, _, name in rows}
+    return total_us / 1000, [m for m in lazy_modules if m in imported]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile API import time")
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--report", default="import_time_report.txt")
+    parser.add_argument("--top", type=int, default=30)
+    args = parser.parse_args()
+
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    rows = run_importtime(args.target, backend_dir)
+
+    total_ms, eager = summarize(rows, args.target)
+
+    lines = [
+        f"Import-time profile for {args.target}",
+        f"Total: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)",
+        f"Eagerly imported heavy modules: {', '.join(eager) or 'none'}",
+        "",
+        f"{'cumulative ms':>14} {'self ms':>9}  module",
+    ]
+    for self_us, cum_us, depth, name in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        lines.append(f"{cum_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {'  ' * depth}{name}")
+    report = "\n".join(lines) + "\n"
+
+    with open(args.report, "w") as f:
+        f.write(report)
+    print(report)
+    print(f"Report written to {args.report}")
+
+    failed = False
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time {total_ms:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+        failed = True
+    if eager:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(eager)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK: startup import time within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,61 @@
 #!/usr/bin/env python3
-import uvicorn
+"""
+Start the Ovula API.
+
+Development (default): single process with auto-reload.
+    python start_server.py
+
+Production: N worker processes, no reload. On SIGTERM each worker stops
+accepting connections and lets in-flight requests - including SSE chat
+streams - finish for up to --graceful-timeout seconds before exiting.
+Only one worker performs the Ollama warmup (see app/core/warmup_lock.py).
+    python start_server.py --prod --workers 4
+
+Several workers need a server database (DATABASE_URL=postgresql://...).
+With SQLite, --prod runs a single worker: SQLite allows one writer at a
+time, so concurrent workers' chat write-behind flushes and id reservations
+would queue on its file lock or fail with "database is locked" (Config.worker_count,
+also used by `python -m app.main`).
+"""
+import argparse
 import os
+import uvicorn
+
+from app.core.config import Config
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Ovula API server")
+    parser.add_argument("--prod", action="store_true", help="production mode (no reload, multiple workers)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes in --prod mode (default: WORKERS env or CPU count)")
+    parser.add_argument("--host", default=Config.HOST)
+    parser.add_argument("--port", type=int, default=Config.PORT)
+    parser.add_argument("--graceful-timeout", type=int, default=Config.GRACEFUL_SHUTDOWN_TIMEOUT,
+                        help="seconds to drain in-flight requests on SIGTERM")
+    args = parser.parse_args()
+
     # Change to the backend directory
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
-    # Start the server
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+
+    if args.prod:
+        env_workers = os.getenv("WORKERS") or os.getenv("WEB_CONCURRENCY")
+        workers = Config.worker_count(args.workers or (int(env_workers) if env_workers else os.cpu_count() or 1))
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            workers=workers,
+            reload=False,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            log_level="info"
+        )
+    else:
+        # Start the server
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            log_level="info"
+        )
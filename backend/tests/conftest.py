@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+# Settings are read at import time: point everything at a scratch directory
+# before any app module is imported
+_scratch = tempfile.mkdtemp(prefix="ovula-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_scratch}/test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("TRACE_SINKS", "memory")
+os.environ.setdefault("TTS_CACHE_DIR", os.path.join(_scratch, "tts_cache"))
+os.environ.setdefault("CHAT_DEAD_LETTER_PATH", os.path.join(_scratch, "chat_dead_letter.jsonl"))
+os.environ.setdefault("MODEL_ROLLOUT_DIR", os.path.join(_scratch, "rollout"))
+os.environ.setdefault("PRECOMPUTE_CANNED_AUDIO", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from app.services.attribution import (LinearExplainer, TreeExplainer, UnsupportedModelError, make_explainer,
+                                      top_factors)
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 4, size=(300, 5)).astype(np.float64)
+    y = (X[:, 0] + X[:, 2] + rng.normal(0, 1, 300) > 3).astype(int)
+    return X, y
+
+
+@pytest.mark.parametrize("model, kind", [
+    (DecisionTreeClassifier(max_depth=4, random_state=0), TreeExplainer),
+    (RandomForestClassifier(n_estimators=20, max_depth=5, random_state=0), TreeExplainer),
+    (LogisticRegression(), LinearExplainer),
+    (make_pipeline(StandardScaler(), LogisticRegression(C=0.1, class_weight="balanced")), LinearExplainer),
+])
+def test_contributions_add_up_to_predict_proba(data, model, kind):
+    X, y = data
+    model.fit(X, y)
+    explainer = make_explainer(model)
+
+    contributions = explainer.contributions(X[:50])
+
+    assert isinstance(explainer, kind)
+    assert contributions.shape == (50, 5)
+    np.testing.assert_allclose(explainer.bias + contributions.sum(axis=1), model.predict_proba(X[:50])[:, 1],
+                               atol=1e-9)
+
+
+def test_linear_contributions_follow_the_coefficients(data):
+    X, y = data
+    model = make_pipeline(StandardScaler(), LogisticRegression()).fit(X, y)
+    row = X.mean(axis=0)
+    row[0] += 2  # feature 0 raises the label, feature 1 is noise
+
+    contributions = make_explainer(model).contributions(row)[0]
+
+    assert contributions[0] > 0.05
+    assert abs(contributions[1]) < contributions[0] / 5
+
+
+def test_unsupported_models(data):
+    X, y = data
+    with pytest.raises(UnsupportedModelError):
+        make_explainer(GaussianNB().fit(X, y))
+
+
+def test_top_factors_groups_and_ranks():
+    names = ["Hair growth on Chin", "Hair growth in Arms", "Overweight", "Age"]
+
+    factors = top_factors([0.04, 0.03, 0.05, 0.001], names)
+
+    assert factors[0] == ("Hirsutism (excessive hair growth)", pytest.approx(0.07))
+    assert [label for label, _ in factors] == ["Hirsutism (excessive hair growth)", "Higher Body Mass Index (BMI)"]
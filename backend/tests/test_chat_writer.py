@@ -0,0 +1,73 @@
+import json
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal, Base, async_engine
+from app.models.user import ChatMessage, User
+from app.services.chat_writer import ChatWriteBehind
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def user_id():
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        user = User(name="t", email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+        session.add(user)
+        await session.commit()
+        return user.id
+
+
+async def test_writers_in_separate_processes_get_disjoint_ids(user_id):
+    # Two instances stand in for two worker processes: no shared memory,
+    # only the database
+    first, second = ChatWriteBehind(batch_size=3), ChatWriteBehind(batch_size=3)
+    ids = []
+    for _ in range(4):
+        ids.append(await first.enqueue(user_id, "hi", "hello"))
+        ids.append(await second.enqueue(user_id, "hi", "hello"))
+
+    assert len(set(ids)) == len(ids)
+    async with AsyncSessionLocal() as session:
+        stored = set(await session.scalars(select(ChatMessage.id).where(ChatMessage.id.in_(ids))))
+    assert stored == set(ids)
+
+
+async def test_failed_rows_are_retried_then_dead_lettered(user_id, tmp_path):
+    writer = ChatWriteBehind(batch_size=10, flush_interval=0.01)
+    writer.dead_letter_path = str(tmp_path / "dead.jsonl")
+    writer.max_attempts = 2
+    insert = writer._insert
+    outage = {"left": 2}
+
+    async def flaky_insert(rows):
+        if outage["left"]:
+            outage["left"] -= 1
+            raise RuntimeError("database is locked")
+        await insert(rows)
+
+    writer._insert = flaky_insert
+    # Batch and row-by-row insert both fail: kept for the next flush
+    message_id = await writer.enqueue(user_id, "hi", "hello")
+    assert [row["id"] for row in writer._retry] == [message_id]
+
+    await writer._flush([])
+    assert writer._retry == []
+    async with AsyncSessionLocal() as session:
+        assert await session.get(ChatMessage, message_id) is not None
+
+    # A row that can never be stored ends up in the dead-letter file
+    async def broken_insert(rows):
+        raise RuntimeError("constraint failed")
+
+    writer._insert = broken_insert
+    lost_id = await writer.enqueue(user_id, "hi again", "hello")
+    await writer._flush([])
+    assert writer._retry == []
+    with open(writer.dead_letter_path) as f:
+        dead = [json.loads(line) for line in f]
+    assert [(row["id"], row["message"]) for row in dead] == [(lost_id, "hi again")]
@@ -0,0 +1,14 @@
+import pytest
+
+from app.core.config import Config
+
+
+@pytest.mark.parametrize("url, workers, expected", [
+    ("sqlite:///./pcos_tracker.db", 4, 1),
+    ("sqlite+aiosqlite:///./pcos_tracker.db", 1, 1),
+    ("postgresql://db/ovula", 4, 4),
+])
+def test_worker_count(monkeypatch, url, workers, expected):
+    monkeypatch.setattr(Config, "DATABASE_URL", url)
+
+    assert Config.worker_count(workers) == expected
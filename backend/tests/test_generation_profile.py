@@ -0,0 +1,69 @@
+import pytest
+
+from app.services.generation_profile import GenerationPolicy, GenerationProfile, parse_tiers
+
+TIERS = [
+    GenerationProfile("full", 2048, 512, 8),
+    GenerationProfile("reduced", 1536, 384, 8),
+    GenerationProfile("minimal", 1024, 256, 8),
+]
+
+
+@pytest.fixture
+def policy():
+    return GenerationPolicy(tiers=TIERS, busy_depth=2, heavy_depth=4, slow_tps=4.0,
+                            long_message_chars=800, urdu_predict_factor=1.25)
+
+
+@pytest.mark.parametrize(
+    "queue_depth, tokens_per_sec, message_length, use_urdu, expected",
+    [
+        # Idle: full budget
+        (0, None, 10, False, ("full", 2048, 512)),
+        (1, 12.0, 10, False, ("full", 2048, 512)),
+        # Queue depth thresholds are inclusive
+        (2, None, 10, False, ("reduced", 1536, 384)),
+        (3, 12.0, 10, False, ("reduced", 1536, 384)),
+        (4, None, 10, False, ("minimal", 1024, 256)),
+        (50, None, 10, False, ("minimal", 1024, 256)),
+        # Slow generation drops one more tier, never below the last
+        (0, 3.9, 10, False, ("reduced", 1536, 384)),
+        (0, 4.0, 10, False, ("full", 2048, 512)),
+        (2, 1.0, 10, False, ("minimal", 1024, 256)),
+        (4, 1.0, 10, False, ("minimal", 1024, 256)),
+        # A long message keeps the full context window, with the reduced output budget
+        (2, None, 800, False, ("reduced", 2048, 384)),
+        (4, 1.0, 5000, False, ("minimal", 2048, 256)),
+        (0, None, 5000, False, ("full", 2048, 512)),
+        (2, None, 799, False, ("reduced", 1536, 384)),
+        # Urdu answers get more tokens
+        (0, None, 10, True, ("full", 2048, 640)),
+        (4, None, 10, True, ("minimal", 1024, 320)),
+        (2, None, 900, True, ("reduced", 2048, 480)),
+    ],
+)
+def test_choose(policy, queue_depth, tokens_per_sec, message_length, use_urdu, expected):
+    profile = policy.choose(queue_depth, tokens_per_sec, message_length, use_urdu)
+
+    assert (profile.name, profile.num_ctx, profile.num_predict) == expected
+    assert profile.num_thread == 8
+
+
+def test_current_uses_the_recorded_tokens_per_sec(policy):
+    assert policy.current("llama3.2", 0, 10, False).name == "full"
+
+    policy.record("llama3.2", 2.0)
+    assert policy.current("llama3.2", 0, 10, False).name == "reduced"
+    # Per model
+    assert policy.current("qalb", 0, 10, False).name == "full"
+
+    # Moving average: one fast sample doesn't undo the slow history
+    policy.record("llama3.2", 6.0, alpha=0.3)
+    assert policy.tokens_per_sec("llama3.2") == pytest.approx(3.2)
+    assert policy.current("llama3.2", 0, 10, False).name == "reduced"
+
+
+def test_parse_tiers():
+    tiers = parse_tiers("big:4096:1024, small:512:128")
+
+    assert [(t.name, t.num_ctx, t.num_predict) for t in tiers] == [("big", 4096, 1024), ("small", 512, 128)]
@@ -0,0 +1,23 @@
+import os
+
+from profile_imports import BUDGET_MS, LAZY_MODULES, run_importtime, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_app_import_stays_within_budget_and_lazy():
+    rows = run_importtime("app.main", BACKEND_DIR)
+
+    total_ms, eager = summarize(rows, "app.main")
+
+    assert eager == []
+    assert total_ms <= BUDGET_MS
+
+
+def test_lazy_modules_are_detected():
+    # The check itself must notice a heavy import
+    rows = run_importtime("app.main, numpy", BACKEND_DIR)
+
+    _, eager = summarize(rows, "app.main")
+
+    assert "numpy" in eager and set(eager) <= set(LAZY_MODULES)
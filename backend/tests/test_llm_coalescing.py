@@ -0,0 +1,170 @@
+"""Single-flight coalescing of identical chat generations in LLMService.stream_tokens."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.services.llm import LLMService
+
+MODEL = "llama3.2:latest"
+PROMPT = [{"role": "system", "content": "You are a PCOS assistant."}, {"role": "user", "content": "What is PCOS?"}]
+TOKENS = ["PCOS ", "is ", "a ", "hormonal ", "condition."]
+
+
+class FakeOllamaStream:
+    """Stands in for stream_ollama_tokens; the test releases tokens one by one."""
+
+    def __init__(self, tokens=TOKENS):
+        self.tokens = tokens
+        self.calls = 0
+        self.produced = 0
+        self.release = threading.Semaphore(0)
+        self.closed = threading.Event()
+
+    def __call__(self, prompt, model_name, stats=None, user_id=None, profile=None):
+        self.calls += 1
+        try:
+            for token in self.tokens:
+                self.release.acquire(timeout=5)
+                self.produced += 1
+                yield token
+            if stats is not None:
+                stats.update(eval_count=len(self.tokens), tokens_per_sec=20.0)
+        finally:
+            self.closed.set()
+
+    def release_all(self):
+        for _ in self.tokens:
+            self.release.release()
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    fake = FakeOllamaStream()
+    monkeypatch.setattr(LLMService, "stream_ollama_tokens", lambda self, *args, **kwargs: fake(*args, **kwargs))
+    yield fake
+    fake.release_all()
+
+
+@pytest.fixture
+def service():
+    return LLMService(router=object())
+
+
+async def _wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+async def _collect(stream):
+    return "".join([token async for token in stream])
+
+
+def _flight(service):
+    [flight] = service._flights.values()
+    return flight
+
+
+@pytest.mark.anyio
+async def test_concurrent_identical_prompts_share_one_generation(service, ollama):
+    leader_stats, follower_stats = {}, {}
+    # Whitespace and case differences still coalesce
+    variant = [dict(m, content=m["content"].upper() + "  ") for m in PROMPT]
+    replies = asyncio.gather(
+        _collect(service.stream_tokens(PROMPT, MODEL, leader_stats, user_id=1)),
+        _collect(service.stream_tokens(variant, MODEL, follower_stats, user_id=2)),
+    )
+    await _wait_for(lambda: service._flights and len(_flight(service).subscribers) == 2)
+    ollama.release_all()
+
+    assert await replies == ["".join(TOKENS)] * 2
+    assert ollama.calls == 1
+    assert service._flights == {}
+    assert leader_stats["coalesced"] is False and "executor_wait_ns" in leader_stats
+    assert follower_stats["coalesced"] is True and "executor_wait_ns" not in follower_stats
+    # Both see the shared eval stats
+    assert leader_stats["eval_count"] == follower_stats["eval_count"] == len(TOKENS)
+
+
+@pytest.mark.anyio
+async def test_late_joiner_receives_the_tokens_already_generated(service, ollama):
+    leader = service.stream_tokens(PROMPT, MODEL)
+    ollama.release.release()
+    ollama.release.release()
+    assert [await leader.__anext__(), await leader.__anext__()] == TOKENS[:2]
+
+    follower_stats = {}
+    follower = asyncio.ensure_future(_collect(service.stream_tokens(PROMPT, MODEL, follower_stats)))
+    await _wait_for(lambda: len(_flight(service).subscribers) == 2)
+    ollama.release_all()
+
+    assert await follower == "".join(TOKENS)
+    assert await _collect(leader) == "".join(TOKENS[2:])
+    assert ollama.calls == 1
+    assert follower_stats["coalesced"] is True
+
+
+@pytest.mark.anyio
+async def test_finished_flight_is_forgotten(service, ollama):
+    ollama.release_all()
+    reply = await _collect(service.stream_tokens(PROMPT, MODEL))
+
+    assert reply == "".join(TOKENS)
+    assert service._flights == {}
+    # The next identical request starts a fresh generation
+    ollama.release_all()
+    assert await _collect(service.stream_tokens(PROMPT, MODEL)) == reply
+    assert ollama.calls == 2
+
+
+@pytest.mark.anyio
+async def test_flight_is_abandoned_when_every_subscriber_disconnects(service, ollama):
+    first = service.stream_tokens(PROMPT, MODEL)
+    second = service.stream_tokens(PROMPT, MODEL)
+    ollama.release.release()
+    assert await first.__anext__() == TOKENS[0]
+    assert await second.__anext__() == TOKENS[0]
+    flight = _flight(service)
+
+    await first.aclose()
+    assert not flight.abandoned and service._flights
+
+    await second.aclose()
+    assert flight.abandoned
+    assert service._flights == {}
+
+    # The worker stops at the next token and closes the Ollama stream
+    ollama.release.release()
+    assert await asyncio.to_thread(ollama.closed.wait, 5)
+    assert ollama.produced == 2
+
+    # A new identical request is not attached to the abandoned flight
+    ollama.closed.clear()
+    ollama.release_all()
+    assert await _collect(service.stream_tokens(PROMPT, MODEL)) == "".join(TOKENS)
+    assert ollama.calls == 2
+
+
+@pytest.mark.anyio
+async def test_different_prompts_or_coalescing_off_generate_separately(service, ollama, monkeypatch):
+    other = [PROMPT[0], {"role": "user", "content": "What is insulin resistance?"}]
+    replies = asyncio.gather(_collect(service.stream_tokens(PROMPT, MODEL)),
+                             _collect(service.stream_tokens(other, MODEL)),
+                             _collect(service.stream_tokens(PROMPT, "qalb-llm:latest")))
+    await _wait_for(lambda: len(service._flights) == 3)
+    for _ in range(3):
+        ollama.release_all()
+    assert await replies == ["".join(TOKENS)] * 3
+    assert ollama.calls == 3
+
+    monkeypatch.setattr(service.config, "CHAT_COALESCE", False)
+    replies = asyncio.gather(_collect(service.stream_tokens(PROMPT, MODEL)),
+                             _collect(service.stream_tokens(PROMPT, MODEL)))
+    await _wait_for(lambda: ollama.calls == 5)
+    for _ in range(2):
+        ollama.release_all()
+    assert await replies == ["".join(TOKENS)] * 2
+    assert service._flights == {}
@@ -0,0 +1,156 @@
+"""Failover and sticky routing against fake Ollama servers on localhost."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.generation_profile import GenerationProfile
+from app.services.llm import LLMService
+from app.services.llm_router import OllamaRouter
+from app.services.ollama_monitor import OllamaMonitor
+
+MODEL = "llama3.2:latest"
+OTHER_MODEL = "qalb-llm:latest"
+PROFILE = GenerationProfile("test", num_ctx=512, num_predict=16, num_thread=1)
+
+
+class FakeOllama:
+    """Answers /api/chat with a fixed status, or with its own name as the reply."""
+
+    def __init__(self, name):
+        self.name = name
+        self.status = 200
+        self.requests = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                fake.requests.append(body["model"])
+                if fake.status != 200:
+                    self.send_response(fake.status)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.end_headers()
+                chunks = [{"message": {"content": f"hello from {fake.name}"}, "done": not body["stream"]}]
+                if body["stream"]:
+                    chunks.append({"message": {"content": ""}, "done": True, "eval_count": 4, "eval_duration": 10**8})
+                for chunk in chunks:
+                    self.wfile.write(json.dumps(chunk).encode() + b"\n")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def servers():
+    fakes = [FakeOllama("a"), FakeOllama("b")]
+    yield fakes
+    for fake in fakes:
+        fake.close()
+
+
+def _service(urls):
+    monitor = OllamaMonitor(urls=urls, interval=60, timeout=1)
+    for ep in monitor.endpoints.values():
+        ep.healthy = True
+        ep.installed = {MODEL: {}, OTHER_MODEL: {}}
+    return LLMService(OllamaRouter(monitor, sticky_ttl=60, sticky_slack=1)), monitor
+
+
+async def _generate(service, user_id=None, model=MODEL):
+    return await service.generate_response_ollama("hi", model, user_id=user_id, profile=PROFILE)
+
+
+def _stream(service, user_id=None, model=MODEL):
+    return "".join(service.stream_ollama_tokens("hi", model, user_id=user_id, profile=PROFILE))
+
+
+@pytest.mark.anyio
+async def test_server_error_fails_over_and_takes_endpoint_out(servers):
+    a, b = servers
+    a.status = 503
+    service, monitor = _service([a.url, b.url])
+
+    assert await _generate(service) == "hello from b"
+    assert monitor.endpoints[a.url].healthy is False
+    assert service.router.candidates(MODEL) == [b.url]
+
+
+def test_connection_error_fails_over_while_streaming(servers):
+    a, b = servers
+    dead = "http://127.0.0.1:9"  # nothing listens on the discard port
+    service, monitor = _service([dead, b.url])
+
+    assert _stream(service) == "hello from b"
+    assert monitor.endpoints[dead].healthy is False
+
+
+@pytest.mark.anyio
+async def test_missing_model_only_drops_that_model(servers):
+    a, b = servers
+    a.status = 404
+    service, monitor = _service([a.url, b.url])
+
+    assert await _generate(service) == "hello from b"
+    # The endpoint is still up and keeps serving its other models
+    assert monitor.endpoints[a.url].healthy is True
+    assert service.router.candidates(MODEL) == [b.url]
+    assert a.url in service.router.candidates(OTHER_MODEL)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("stream", [False, True])
+async def test_bad_request_is_not_an_endpoint_failure(servers, stream):
+    a, b = servers
+    a.status = b.status = 400
+    service, monitor = _service([a.url, b.url])
+
+    reply = _stream(service) if stream else await _generate(service)
+
+    assert "400" in reply
+    # Not retried elsewhere, and nobody taken out of rotation
+    assert len(a.requests) + len(b.requests) == 1
+    assert all(ep.healthy for ep in monitor.endpoints.values())
+
+
+@pytest.mark.anyio
+async def test_user_sticks_to_the_endpoint_that_served_them(servers):
+    a, b = servers
+    service, _ = _service([a.url, b.url])
+    # The least loaded endpoint would be a; user 7 was last served by b
+    service.router.remember(7, MODEL, b.url)
+
+    assert await _generate(service, user_id=7) == "hello from b"
+    assert _stream(service, user_id=7) == "hello from b"
+    assert await _generate(service, user_id=8) == "hello from a"
+
+    # Too busy compared to the alternative: the sticky endpoint is skipped
+    with service.router.acquire(b.url), service.router.acquire(b.url):
+        assert await _generate(service, user_id=7) == "hello from a"
+
+
+@pytest.mark.anyio
+async def test_sticky_endpoint_that_fails_is_replaced(servers):
+    a, b = servers
+    # Without stickiness b would be tried first
+    service, _ = _service([b.url, a.url])
+    service.router.remember(7, MODEL, b.url)
+    b.status = 500
+
+    assert await _generate(service, user_id=7) == "hello from a"
+    b.status = 200
+    service.router.monitor.endpoints[b.url].healthy = True
+    # The user now sticks to the endpoint that answered
+    assert await _generate(service, user_id=7) == "hello from a"
@@ -0,0 +1,133 @@
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.tracing import Trace
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """A fresh registry: metrics created in the test register here."""
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    return registry
+
+
+@pytest.mark.parametrize("value, expected", [
+    (3, "3"), (3.0, "3"), (0.25, "0.25"), (1e-4, "0.0001"), (float("inf"), "+Inf"), (-2, "-2"),
+])
+def test_format_value(value, expected):
+    assert metrics._format_value(value) == expected
+
+
+def test_render_counter_and_gauge(registry):
+    counter = metrics.Counter("t_events_total", "Events by kind", ("kind",))
+    counter.inc(kind='say "hi"\n')
+    counter.inc(2.5, kind="back\\slash")
+    counter.inc(kind="back\\slash")
+    gauge = metrics.Gauge("t_open", "Open things")
+    gauge.set_function(lambda: 4)
+    unlabelled = metrics.Counter("t_plain_total", "No labels")
+    unlabelled.inc()
+
+    assert registry.render() == "\n".join([
+        "# HELP t_events_total Events by kind",
+        "# TYPE t_events_total counter",
+        't_events_total{kind="say \\"hi\\"\\n"} 1',
+        't_events_total{kind="back\\\\slash"} 3.5',
+        "# HELP t_open Open things",
+        "# TYPE t_open gauge",
+        "t_open 4",
+        "# HELP t_plain_total No labels",
+        "# TYPE t_plain_total counter",
+        "t_plain_total 1",
+    ]) + "\n"
+
+
+def test_counter_set_function_overrides_recorded_values(registry):
+    counter = metrics.Counter("t_cache_total", "Lookups", ("cache", "result"))
+    counter.inc(cache="tts", result="hit")
+    counter.set_function(lambda: {("tts", "hit"): 7, ("tts", "miss"): 2})
+
+    assert counter._samples() == ['t_cache_total{cache="tts",result="hit"} 7',
+                                  't_cache_total{cache="tts",result="miss"} 2']
+
+
+def test_gauge_inc_dec(registry):
+    gauge = metrics.Gauge("t_streams", "Streams", ("endpoint",))
+    gauge.inc(endpoint="/chat")
+    gauge.inc(endpoint="/chat")
+    gauge.dec(endpoint="/chat")
+
+    assert gauge._samples() == ['t_streams{endpoint="/chat"} 1']
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = metrics.Histogram("t_seconds", "Latency", ("route",), buckets=(1, 0.25))
+    for value in (0.25, 0.5, 4):
+        histogram.observe(value, route="/a")
+
+    assert registry.render().splitlines() == [
+        "# HELP t_seconds Latency",
+        "# TYPE t_seconds histogram",
+        't_seconds_bucket{route="/a",le="0.25"} 1',
+        't_seconds_bucket{route="/a",le="1"} 2',
+        't_seconds_bucket{route="/a",le="+Inf"} 3',
+        't_seconds_sum{route="/a"} 4.75',
+        't_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_trace_metrics_sink(registry, monkeypatch):
+    for name in ("chat_ttft", "chat_generation"):
+        monkeypatch.setattr(metrics, name, metrics.Histogram(name, name, ("model",), buckets=(1,)))
+    monkeypatch.setattr(metrics, "chat_tokens_per_sec",
+                        metrics.Histogram("chat_tps", "chat_tps", ("model",), buckets=(10,)))
+    monkeypatch.setattr(metrics, "off_topic_rejections", metrics.Counter("off_topic", "off_topic", ("lang",)))
+
+    trace = Trace("chat_stream", use_urdu=True)
+    trace.add_span("is_off_topic", 0, 1_000, off_topic=True)
+    trace.add_span("ollama.time_to_first_token", 0, 500_000_000, model="qalb")
+    trace.add_span("ollama.generate", 0, 2_000_000_000, model="qalb", tokens_per_sec=6.5)
+    metrics.TraceMetricsSink().export(trace)
+
+    samples = [line for line in registry.render().splitlines() if not line.startswith("#")]
+    assert 'off_topic{lang="ur"} 1' in samples
+    assert 'chat_ttft_sum{model="qalb"} 0.5' in samples
+    assert 'chat_ttft_bucket{model="qalb",le="1"} 1' in samples
+    assert 'chat_generation_bucket{model="qalb",le="1"} 0' in samples
+    assert 'chat_generation_sum{model="qalb"} 2' in samples
+    assert 'chat_tps_sum{model="qalb"} 6.5' in samples
+
+
+def test_requests_are_labelled_by_full_route_template(registry, monkeypatch):
+    duration = metrics.Histogram("t_http_seconds", "HTTP", ("method", "route", "status"), buckets=(60,))
+    monkeypatch.setattr(metrics, "http_request_duration", duration)
+
+    router = APIRouter()
+
+    @router.get("/{log_id}")
+    async def get_log(log_id: int):
+        return {"id": log_id}
+
+    sub = FastAPI()
+    sub.include_router(router)
+    app = FastAPI()
+    app.include_router(router, prefix="/logs")
+    # A mounted app's route only knows its path below the mount point
+    app.mount("/v2", sub)
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    client = TestClient(app)
+    client.get("/logs/5")
+    client.get("/logs/6")
+    client.get("/v2/7")
+    client.get("/missing")
+
+    counts = [line for line in duration._samples() if line.startswith("t_http_seconds_count")]
+    assert counts == [
+        't_http_seconds_count{method="GET",route="/logs/{log_id}",status="200"} 2',
+        't_http_seconds_count{method="GET",route="/v2/{log_id}",status="200"} 1',
+        't_http_seconds_count{method="GET",route="unmatched",status="404"} 1',
+    ]
@@ -0,0 +1,186 @@
+import hashlib
+import itertools
+import json
+import os
+import types
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from app.services import model_rollout as rollout_module
+from app.services.model_rollout import ModelRollout
+from app.services.pcos_model import FEATURE_FIELDS, MANIFEST_FILE, LoadedModel, ModelStore, validate
+
+
+def _loaded(version, names, coef):
+    """A logistic model over `names` fit to the label `X @ coef > 0.5`."""
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 2, size=(200, len(names))).astype(np.float64)
+    y = (X @ np.asarray(coef) > 0.5).astype(int)
+    model = LogisticRegression(C=100).fit(X, y)
+    manifest = {"model_version": version, "features": [{"name": n, "dtype": "int64"} for n in names],
+                "classes": [0, 1]}
+    return LoadedModel(model, manifest, f"/models/{version}", validate(model, manifest))
+
+
+@pytest.fixture
+def rollout(tmp_path):
+    return ModelRollout(ModelStore([]), directory=str(tmp_path), fraction=1.0)
+
+
+def _profile(**values):
+    # Every feature set (a falsy field would read as its default, outside 0/1)
+    profile = types.SimpleNamespace(**{field: 1 for field, _ in FEATURE_FIELDS.values()})
+    profile.__dict__.update(values)
+    return profile
+
+
+@pytest.mark.parametrize("extra", [[], [list(FEATURE_FIELDS)[4]]])
+def test_candidate_is_scored_on_its_own_feature_order(rollout, extra):
+    names = list(FEATURE_FIELDS)[:4]
+    # Same rule (overweight -> PCOS), features listed in reverse order and
+    # possibly with an extra column. Read in the active model's order, the
+    # candidate would see Period Length where it expects Overweight.
+    active = _loaded("active", names, [0, 0, 0, 1])
+    candidate = _loaded("candidate", names[::-1] + extra, [1, 0, 0, 0] + [0] * len(extra))
+    profile = _profile(is_overweight=0)
+
+    active_proba, _ = rollout.predict_proba(active, active.row(profile))
+    rollout.shadow_score(candidate, active, profile, active_proba)
+
+    assert active_proba[1] < 0.1
+    stats = rollout._stats["candidate"].summary()
+    assert stats["comparisons"] == 1
+    assert stats["disagreement_rate"] == 0
+    assert stats["max_abs_delta"] < 0.05
+
+
+def test_disagreement_is_judged_on_calibrated_results(rollout):
+    names = list(FEATURE_FIELDS)[:4]
+    active = _loaded("active", names, [0, 0, 0, 1])
+    # Same model, but its calibration maps every raw score to a low risk
+    low = {"method": "isotonic", "raw": [0.0, 1.0], "calibrated": [0.0, 0.2]}
+    candidate = active._replace(manifest={**active.manifest, "model_version": "candidate", "calibration": low})
+    profile = _profile(is_overweight=1)
+
+    active_proba, _ = rollout.predict_proba(active, active.row(profile))
+    rollout.shadow_score(candidate, active, profile, active_proba)
+
+    stats = rollout._stats["candidate"].summary()
+    assert stats["disagreement_rate"] == 1
+    assert stats["mean_delta"] < -0.5
+
+
+# ──────────────────────────────────────────────
+# Snapshots of the landing path
+# ──────────────────────────────────────────────
+
+# Distinct manifest mtimes, so the store notices every rewrite
+_mtimes = itertools.count(1_000_000)
+
+
+def _write_bundle(path, version, coef, manifest_only=False):
+    """Write `version` of a bundle to `path`; `manifest_only` leaves the model file as it was."""
+    names = list(FEATURE_FIELDS)[:4]
+    loaded = _loaded(version, names, coef)
+    os.makedirs(path, exist_ok=True)
+    model_file = os.path.join(path, "model.joblib")
+    dump = os.path.join(path, "next.joblib")
+    joblib.dump(loaded.model, dump)
+    with open(dump, "rb") as f:
+        sha = hashlib.sha256(f.read()).hexdigest()
+    if manifest_only:
+        os.remove(dump)
+    else:
+        os.replace(dump, model_file)
+    manifest = dict(loaded.manifest, model_file="model.joblib", model_sha256=sha)
+    with open(os.path.join(path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f)
+    mtime = next(_mtimes)
+    os.utime(os.path.join(path, MANIFEST_FILE), (mtime, mtime))
+
+
+@pytest.fixture
+def landing(tmp_path):
+    path = str(tmp_path / "landing")
+    _write_bundle(path, "v1", [0, 0, 0, 1])
+    return path
+
+
+def _rollout(tmp_path, landing):
+    return ModelRollout(ModelStore([landing]), directory=str(tmp_path / "rollout"), fraction=1.0)
+
+
+def test_active_model_is_served_from_its_snapshot(tmp_path, landing):
+    rollout = _rollout(tmp_path, landing)
+
+    active = rollout.active()
+
+    assert active.version == "v1"
+    assert active.path == os.path.join(str(tmp_path / "rollout"), "versions", "v1")
+
+
+def test_half_written_landing_is_not_snapshotted(tmp_path, landing, monkeypatch):
+    rollout = _rollout(tmp_path, landing)
+    assert rollout.active().version == "v1"
+    _write_bundle(landing, "v2", [0, 0, 0, 1])
+    # v2 is loaded, then the trainer starts writing v3 before the copy: the
+    # new manifest is in place but model.joblib is still v2's
+    rollout.store.get()
+    copy = rollout_module.shutil.copytree
+    monkeypatch.setattr(rollout_module.shutil, "copytree",
+                        lambda src, dst: (_write_bundle(landing, "v3", [1, 0, 0, 0], manifest_only=True),
+                                          copy(src, dst)))
+
+    assert rollout.active().version == "v1"
+    assert rollout.candidate() is None
+    assert not os.path.exists(os.path.join(rollout.directory, "versions", "v2"))
+    assert not os.path.exists(os.path.join(rollout.directory, "versions", "v2.tmp"))
+
+    # Retried once the landing settles, after the back-off
+    monkeypatch.setattr(rollout_module.shutil, "copytree", copy)
+    _write_bundle(landing, "v2", [0, 0, 0, 1])
+    rollout._snapshot_failed.clear()
+    assert rollout.active().version == "v1"
+    assert rollout.candidate().version == "v2"
+
+
+def test_bad_existing_snapshot_is_replaced(tmp_path, landing):
+    broken = tmp_path / "rollout" / "versions" / "v1"
+    broken.mkdir(parents=True)
+    (broken / MANIFEST_FILE).write_text("{")
+
+    assert _rollout(tmp_path, landing).active().version == "v1"
+
+
+def test_snapshot_errors_keep_the_active_model_serving(tmp_path, landing, monkeypatch):
+    rollout = _rollout(tmp_path, landing)
+    assert rollout.active().version == "v1"
+
+    def read_only(*args):
+        raise PermissionError("read-only file system")
+
+    monkeypatch.setattr(rollout_module.shutil, "copytree", read_only)
+    _write_bundle(landing, "v2", [0, 0, 0, 1])
+
+    assert rollout.active().version == "v1"
+    assert rollout.candidate() is None
+    # Not retried on every request
+    calls = []
+    monkeypatch.setattr(rollout, "_snapshot", lambda model: calls.append(model))
+    rollout.active()
+    assert calls == []
+
+
+def test_unwritable_rollout_dir_serves_the_landed_model(tmp_path, landing, monkeypatch):
+    rollout = _rollout(tmp_path, landing)
+
+    def read_only(*args, **kwargs):
+        raise PermissionError("read-only file system")
+
+    monkeypatch.setattr(rollout_module.os, "makedirs", read_only)
+
+    assert rollout.active().version == "v1"
+    assert rollout.status()["active"] is None
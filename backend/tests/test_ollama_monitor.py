@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from app.services.ollama_monitor import EndpointStatus, OllamaMonitor
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_stop_cancels_running_rewarms():
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def slow_warmup(model, url):
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monitor = OllamaMonitor(urls=["http://ollama:11434"], interval=60, timeout=1)
+    monitor._warmup = slow_warmup
+    monitor._rewarm(EndpointStatus("http://ollama:11434"), "llama3.2:latest")
+    # A second poll while it's running doesn't start another
+    monitor._rewarm(EndpointStatus("http://ollama:11434"), "llama3.2:latest")
+    await started.wait()
+    assert len(monitor._rewarm_tasks) == 1
+
+    await monitor.stop()
+
+    assert cancelled.is_set()
+    assert not monitor._rewarm_tasks
+    assert not monitor._warming
+
+
+async def test_finished_rewarms_are_forgotten():
+    calls = []
+
+    async def failing_warmup(model, url):
+        calls.append((model, url))
+        raise ConnectionError("refused")
+
+    monitor = OllamaMonitor(urls=["http://ollama:11434"], interval=60, timeout=1)
+    monitor._warmup = failing_warmup
+    monitor._rewarm(EndpointStatus("http://ollama:11434"), "qalb-llm:latest")
+    await asyncio.gather(*monitor._rewarm_tasks)
+
+    assert calls == [("qalb-llm:latest", "http://ollama:11434")]
+    assert not monitor._rewarm_tasks
+    assert not monitor._warming
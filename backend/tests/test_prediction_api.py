@@ -0,0 +1,103 @@
+import asyncio
+import uuid
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+
+from app.api.v1 import prediction
+from app.core.config import Config
+from app.core.security import get_current_user
+from app.db.session import AsyncSessionLocal, Base, async_engine
+from app.models.user import User, UserHealthProfile
+from app.services.pcos_model import FEATURE_FIELDS, LoadedModel, validate
+
+SYMPTOMS = dict(has_irregular_periods=1, is_overweight=1, hair_chin=1, has_acne=0, has_hair_loss=0,
+                has_dark_patches=0)
+
+
+class LoopCheckingLogisticRegression(LogisticRegression):
+    """Records whether predict_proba ran on the event loop thread."""
+
+    on_event_loop = []
+
+    def predict_proba(self, X):
+        try:
+            asyncio.get_running_loop()
+            self.on_event_loop.append(True)
+        except RuntimeError:
+            self.on_event_loop.append(False)
+        return super().predict_proba(X)
+
+
+def _loaded(estimator, version):
+    names = list(FEATURE_FIELDS)
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 3, size=(200, len(names))).astype(np.float64)
+    y = (X[:, names.index("irregular or missed periods")] > 0).astype(int)
+    model = estimator.fit(X, y)
+    manifest = {"model_version": version, "features": [{"name": n, "dtype": "int64"} for n in names],
+                "classes": [0, 1]}
+    return LoadedModel(model, manifest, f"/models/{version}", validate(model, manifest))
+
+
+async def _user_with_profile():
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        user = User(name="t", email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        session.add(UserHealthProfile(user_id=user.id, age_group=2, typical_period_length=5,
+                                      typical_cycle_length=40, **SYMPTOMS))
+        await session.commit()
+        return User(id=user.id, email=user.email)
+
+
+@pytest.fixture
+def user():
+    return asyncio.run(_user_with_profile())
+
+
+@pytest.fixture
+def client(user, monkeypatch):
+    app = FastAPI()
+    app.include_router(prediction.router, prefix="/prediction")
+    app.dependency_overrides[get_current_user] = lambda: user
+    monkeypatch.setattr(Config, "ADMIN_EMAILS", [user.email])
+    monkeypatch.setattr(prediction.model_rollout, "shadow_candidate", lambda: None)
+    return TestClient(app)
+
+
+def test_unexplainable_model_falls_back_to_profile_factors(client, monkeypatch):
+    monkeypatch.setattr(prediction, "load_model", lambda: _loaded(GaussianNB(), "nb"))
+    expected = ["Irregular menstrual cycles", "Higher Body Mass Index (BMI)", "Hirsutism (excessive hair growth)"]
+
+    predicted = client.post("/prediction/predict")
+    latest = client.get("/prediction/predictions/latest")
+
+    assert predicted.status_code == 200
+    assert predicted.json()["contributing_factors"] == expected
+    assert latest.json()["contributing_factors"] == expected
+
+
+def test_explainable_model_reports_its_attributions(client, monkeypatch):
+    monkeypatch.setattr(prediction, "load_model", lambda: _loaded(LogisticRegression(max_iter=1000), "lr"))
+
+    factors = client.post("/prediction/predict").json()["contributing_factors"]
+
+    assert factors[0] == "Irregular menstrual cycles"
+
+
+def test_cohort_attributions_run_off_the_event_loop(client, monkeypatch):
+    monkeypatch.setattr(prediction, "load_model", lambda: _loaded(LoopCheckingLogisticRegression(max_iter=1000), "lr"))
+    LoopCheckingLogisticRegression.on_event_loop.clear()
+
+    response = client.get("/prediction/cohort/attributions")
+
+    assert response.status_code == 200
+    assert response.json()["profiles"] >= 1
+    assert LoopCheckingLogisticRegression.on_event_loop == [False]
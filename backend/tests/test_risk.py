@@ -0,0 +1,44 @@
+import pytest
+
+from app.services.pcos_model import LoadedModel
+from app.services.risk import RISK_LEVELS, calibrate, classify, risk_band, risk_bands
+
+TABLE = {"method": "isotonic", "raw": [0.0, 0.5, 1.0], "calibrated": [0.0, 0.2, 0.9]}
+
+
+def _loaded(calibration=None):
+    return LoadedModel(None, {"model_version": "v", "calibration": calibration}, "", ())
+
+
+@pytest.mark.parametrize("risk_score, expected", [
+    (0.0, ("No PCOS", 1.0)),
+    (0.3, ("No PCOS", 0.7)),
+    (0.4999, ("No PCOS", 0.5001)),
+    (0.5, ("PCOS", 0.5)),
+    (0.85, ("PCOS", 0.85)),
+])
+def test_classify(risk_score, expected):
+    result, confidence = classify(risk_score)
+
+    assert (result, confidence) == (expected[0], pytest.approx(expected[1]))
+
+
+def test_result_follows_the_calibrated_score():
+    # Raw 0.6 would be "PCOS"; calibrated it is 0.34
+    risk_score = calibrate(_loaded(TABLE), 0.6)
+
+    assert risk_score == pytest.approx(0.34)
+    assert classify(risk_score) == ("No PCOS", pytest.approx(0.66))
+    assert risk_band(risk_score * 100)[0] == "Moderate"
+
+
+def test_uncalibrated_models_pass_through():
+    assert calibrate(_loaded(), 0.6) == 0.6
+
+
+@pytest.mark.parametrize("pct, level", [(0, "Low"), (19.9, "Low"), (20, "Moderate"), (49.9, "Moderate"),
+                                        (50, "High"), (79.9, "High"), (80, "Very High"), (100, "Very High")])
+def test_risk_band_cutoffs(pct, level):
+    assert risk_band(pct)[0] == level
+    assert risk_bands([pct])[0] == [level]
+    assert level in RISK_LEVELS
@@ -0,0 +1,69 @@
+import sys
+import types
+
+import pytest
+
+from app.services.speech import EdgeTTSBackend, SpeechService
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeBackend:
+    """Yields canned chunks instead of calling Edge TTS."""
+
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.calls = []
+
+    async def stream(self, text, voice):
+        self.calls.append((text, voice))
+        for i, chunk in enumerate(self.chunks):
+            if i == self.fail_after:
+                raise ConnectionError("stream dropped")
+            yield chunk
+
+
+async def test_text_to_speech_writes_the_streamed_chunks(tmp_path):
+    backend = FakeBackend([b"ID3", b"\xff\xfb", b"frames"])
+    service = SpeechService(backend)
+    out = tmp_path / "speech.mp3"
+
+    assert await service.text_to_speech("salam", str(out), "ur")
+
+    assert out.read_bytes() == b"ID3\xff\xfbframes"
+    assert backend.calls == [("salam", service.urdu_voice)]
+
+
+@pytest.mark.parametrize("lang, voice", [("en", "en-US-AvaNeural"), ("ps", "ps-AF-GulNawazNeural"),
+                                         ("ur", "ur-PK-UzmaNeural"), ("xx", "ur-PK-UzmaNeural")])
+async def test_voice_follows_language(tmp_path, lang, voice):
+    backend = FakeBackend([b"audio"])
+    await SpeechService(backend).text_to_speech("hi", str(tmp_path / "a.mp3"), lang)
+
+    assert backend.calls == [("hi", voice)]
+
+
+async def test_text_to_speech_reports_failures(tmp_path):
+    out = str(tmp_path / "speech.mp3")
+
+    assert not await SpeechService(FakeBackend([b"ID3", b"frames"], fail_after=1)).text_to_speech("x", out)
+    assert not await SpeechService(FakeBackend([])).text_to_speech("x", out)
+
+
+async def test_edge_backend_yields_only_audio_chunks(tmp_path, monkeypatch):
+    class FakeCommunicate:
+        def __init__(self, text, voice):
+            self.args = (text, voice)
+
+        async def stream(self):
+            yield {"type": "WordBoundary", "offset": 0}
+            yield {"type": "audio", "data": b"ID3"}
+            yield {"type": "WordBoundary", "offset": 1}
+            yield {"type": "audio", "data": b"frames"}
+
+    monkeypatch.setitem(sys.modules, "edge_tts", types.SimpleNamespace(Communicate=FakeCommunicate))
+    out = tmp_path / "speech.mp3"
+
+    assert await SpeechService(EdgeTTSBackend()).text_to_speech("salam", str(out))
+    assert out.read_bytes() == b"ID3frames"
@@ -0,0 +1,148 @@
+import json
+import logging
+import sys
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import Config
+from app.core.security import get_current_user
+from app.core.tracing import MemorySink, OpenTelemetrySink, Tracer
+
+
+def _finished(tracer, name="chat", **attributes):
+    trace = tracer.start(name, **attributes)
+    with trace.span("context_query", rows=3) as attrs:
+        attrs["cached"] = False
+    trace.add_span("ollama_ttft", trace.start_ns + 1_000_000, trace.start_ns + 3_500_000, model="llama3.2")
+    tracer.finish(trace)
+    return trace
+
+
+def test_trace_to_dict():
+    trace = _finished(Tracer(sinks=""), user_id=7)
+
+    exported = trace.to_dict()
+
+    assert len(exported["trace_id"]) == 32 and exported["attributes"] == {"user_id": 7}
+    assert [s["name"] for s in exported["spans"]] == ["context_query", "ollama_ttft"]
+    assert exported["spans"][0]["attributes"] == {"rows": 3, "cached": False}
+    assert exported["spans"][1]["offset_ms"] == 1.0
+    assert exported["spans"][1]["duration_ms"] == 2.5
+    assert len({s["span_id"] for s in exported["spans"]}) == 2
+
+
+def test_log_sink(caplog):
+    tracer = Tracer(sinks="log")
+    with caplog.at_level(logging.INFO, logger="app.trace"):
+        _finished(tracer, user_id=7)
+
+    [record] = [r for r in caplog.records if r.name == "app.trace"]
+    message = record.getMessage()
+    assert message.startswith("chat ")
+    assert "ollama_ttft=2.5ms" in message
+    assert message.endswith(json.dumps({"user_id": 7}))
+
+
+def test_memory_sink_keeps_the_newest_traces():
+    tracer = Tracer(sinks="memory", buffer_size=3)
+    for i in range(5):
+        _finished(tracer, request=i)
+
+    assert [t["attributes"]["request"] for t in tracer.recent()] == [4, 3, 2]
+    assert [t["attributes"]["request"] for t in tracer.recent(2)] == [4, 3]
+
+
+def test_sink_configuration(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.core.tracing"):
+        tracer = Tracer(sinks=" Memory, bogus ,")
+
+    assert [type(s) for s in tracer.sinks] == [MemorySink]
+    assert "Unknown trace sink: bogus" in caplog.text
+    assert not Tracer(sinks="").enabled
+    assert Tracer(sinks="").recent() == []
+
+
+def test_failing_sink_does_not_stop_the_others():
+    class Broken:
+        def export(self, trace):
+            raise RuntimeError("exporter down")
+
+    tracer = Tracer(sinks="")
+    tracer.add_sink(Broken())
+    tracer.memory = MemorySink(10)
+    tracer.add_sink(tracer.memory)
+
+    _finished(tracer)
+
+    assert len(tracer.recent()) == 1
+
+
+class RecordingSpan:
+    def __init__(self, name, context, start_time, attributes):
+        self.name, self.context, self.start_time, self.attributes = name, context, start_time, attributes
+        self.end_time = None
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class RecordingTracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, context=None, start_time=None, attributes=None):
+        span = RecordingSpan(name, context, start_time, attributes)
+        self.spans.append(span)
+        return span
+
+
+def test_otel_sink_replays_spans_under_the_root():
+    pytest.importorskip("opentelemetry")
+    sink = OpenTelemetrySink()
+    sink._tracer = RecordingTracer()
+
+    trace = _finished(Tracer(sinks=""), user_id=7, voice=None, extra={"a": 1})
+    sink.export(trace)
+
+    root, context_query, ttft = sink._tracer.spans
+    assert (root.name, root.start_time, root.end_time) == ("chat", trace.start_ns, trace.end_ns)
+    # Primitive attributes only, None dropped
+    assert root.attributes == {"user_id": 7, "extra": "{'a': 1}"}
+    assert ttft.start_time == trace.start_ns + 1_000_000 and ttft.end_time == trace.start_ns + 3_500_000
+    assert ttft.attributes == {"model": "llama3.2"}
+    for child in (context_query, ttft):
+        assert list(child.context.values()) == [root]
+
+
+def test_otel_sink_without_opentelemetry(monkeypatch, caplog):
+    monkeypatch.setitem(sys.modules, "opentelemetry", None)
+    with caplog.at_level(logging.WARNING, logger="app.core.tracing"):
+        tracer = Tracer(sinks="otel,memory")
+
+    assert [type(s) for s in tracer.sinks] == [MemorySink]
+    assert "opentelemetry-api is not installed" in caplog.text
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(Config, "ADMIN_EMAILS", ["admin@example.com"])
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_traces_endpoint_is_admin_only(client):
+    from app.main import app
+
+    assert client.get("/traces").status_code in (401, 403)
+
+    app.dependency_overrides[get_current_user] = lambda: types.SimpleNamespace(id=2, email="user@example.com")
+    assert client.get("/traces").status_code == 403
+
+    app.dependency_overrides[get_current_user] = lambda: types.SimpleNamespace(id=1, email="Admin@example.com")
+    response = client.get("/traces")
+    assert response.status_code == 200
+    assert "traces" in response.json()
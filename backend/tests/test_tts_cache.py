@@ -0,0 +1,105 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.services.tts_cache import TTSCache
+
+pytestmark = pytest.mark.anyio
+
+
+class StubSynthesizer:
+    """Writes fake MP3 bytes derived from the text, slowly and in two parts."""
+
+    def __init__(self, size=64, ok=True):
+        self.size = size
+        self.ok = ok
+        self.calls = []
+
+    async def __call__(self, text, output_path, lang):
+        self.calls.append((text, lang))
+        payload = (text.encode() * self.size)[:self.size]
+        with open(output_path, "wb") as f:
+            f.write(payload[: self.size // 2])
+            await asyncio.sleep(0.01)
+            f.write(payload[self.size // 2:])
+        return self.ok
+
+
+def _files(directory):
+    return sorted(os.listdir(directory))
+
+
+async def test_miss_synthesizes_once_then_hits(tmp_path):
+    synth = StubSynthesizer()
+    cache = TTSCache(str(tmp_path), max_bytes=1 << 20, synthesize=synth)
+
+    results = await asyncio.gather(*(cache.get_or_create("salam", "ur") for _ in range(5)))
+
+    assert len(synth.calls) == 1
+    assert len({r.path for r in results}) == 1
+    assert [r.hit for r in results].count(False) == 1
+    assert (await cache.get_or_create("salam", "ur")).hit
+    assert _files(tmp_path) == [os.path.basename(results[0].path)]
+
+
+async def test_concurrent_writers_of_the_same_text_do_not_collide(tmp_path):
+    # Separate instances share no locks, like two worker processes
+    caches = [TTSCache(str(tmp_path), max_bytes=1 << 20, synthesize=StubSynthesizer()) for _ in range(4)]
+
+    results = await asyncio.gather(*(c.get_or_create("hello", "en") for c in caches))
+
+    path = results[0].path
+    assert all(r is not None and r.path == path for r in results)
+    with open(path, "rb") as f:
+        assert f.read() == (b"hello" * 64)[:64]
+    # No leftover temp files
+    assert _files(tmp_path) == [os.path.basename(path)]
+
+
+async def test_put_from_concurrent_writers(tmp_path):
+    caches = [TTSCache(str(tmp_path), max_bytes=1 << 20, synthesize=StubSynthesizer()) for _ in range(2)]
+    keys = {c.put("streamed", "ur", b"audio") for c in caches}
+
+    assert len(keys) == 1
+    assert _files(tmp_path) == [f"{keys.pop()}.mp3"]
+
+
+async def test_failed_synthesis_leaves_nothing_behind(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=1 << 20, synthesize=StubSynthesizer(ok=False))
+
+    assert await cache.get_or_create("nope", "ur") is None
+    assert _files(tmp_path) == []
+
+
+async def test_entry_larger_than_the_cap_is_kept(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10, synthesize=StubSynthesizer(size=100))
+
+    audio = await cache.get_or_create("a long reply", "ur")
+
+    assert audio is not None and os.path.exists(audio.path)
+
+
+async def test_evicts_least_recently_used_but_not_recent_files(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=150, synthesize=StubSynthesizer(size=64))
+    old = await cache.get_or_create("old", "ur")
+    older = await cache.get_or_create("older", "ur")
+    long_ago = time.time() - 3600
+    os.utime(older.path, (long_ago - 10, long_ago - 10))
+    os.utime(old.path, (long_ago, long_ago))
+
+    recent = await cache.get_or_create("recent", "ur")
+
+    # 192 bytes > 150: the least recently used file goes first
+    assert not os.path.exists(older.path)
+    assert os.path.exists(old.path)
+    assert os.path.exists(recent.path)
+
+
+async def test_recently_used_files_survive_eviction(tmp_path):
+    # A path just returned to a FileResponse may not be open yet
+    cache = TTSCache(str(tmp_path), max_bytes=100, synthesize=StubSynthesizer(size=64))
+    results = [await cache.get_or_create(text, "ur") for text in ("one", "two", "three")]
+
+    assert all(os.path.exists(r.path) for r in results)
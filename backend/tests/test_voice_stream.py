@@ -0,0 +1,101 @@
+import json
+import os
+import types
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import chat
+from app.core.security import get_current_user
+from app.db.session import get_db
+from app.services.speech import speech_service
+from app.services.tts_cache import tts_cache
+
+
+class FakeBackend:
+    def __init__(self, mode="ok"):
+        self.mode = mode
+
+    async def stream(self, text, voice):
+        if self.mode == "fail":
+            raise ConnectionError("TTS service unreachable")
+        if self.mode == "ok":
+            yield text.encode()
+
+
+class FakeSession:
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/chat")
+    app.dependency_overrides[get_current_user] = lambda: types.SimpleNamespace(id=1)
+
+    async def _db():
+        yield FakeSession()
+
+    app.dependency_overrides[get_db] = _db
+
+    async def _prompt(chat_request, user_id, db, trace):
+        return [{"role": "user", "content": chat_request.message}], "test-model"
+
+    monkeypatch.setattr(chat, "_load_chat_prompt", _prompt)
+    monkeypatch.setattr(chat.llm_service, "is_off_topic", lambda message, use_urdu: (False, None))
+    monkeypatch.setattr(tts_cache, "directory", str(tmp_path))
+    monkeypatch.setattr(speech_service, "backend", FakeBackend())
+    return TestClient(app)
+
+
+def _events(response):
+    return [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+
+
+def _stream_tokens(tokens, error=None):
+    async def stream_tokens(messages, model, stats, user_id=None):
+        for token in tokens:
+            yield token
+        if error:
+            raise error
+    return stream_tokens
+
+
+def test_llm_failure_ends_the_stream_with_an_error_event(client, monkeypatch):
+    tokens = ["The first sentence is complete. ", "And then the"]
+    monkeypatch.setattr(chat.llm_service, "stream_tokens", _stream_tokens(tokens, ConnectionError("Ollama went away")))
+
+    with client.stream("POST", "/chat/stream/voice", json={"message": "hi", "use_urdu": False}) as response:
+        events = _events(response)
+
+    assert response.status_code == 200
+    assert [e["token"] for e in events if "token" in e] == tokens
+    assert events[-1]["done"] is True
+    assert "error" in events[-1]
+    assert sum(1 for e in events if e.get("done")) == 1
+
+
+@pytest.mark.parametrize("mode", ["fail", "empty"])
+def test_tts_failure_still_completes_the_text(client, monkeypatch, mode):
+    monkeypatch.setattr(chat.llm_service, "stream_tokens", _stream_tokens(["A complete sentence here. "]))
+    monkeypatch.setattr(speech_service, "backend", FakeBackend(mode))
+    saved = {}
+
+    async def _save(chat_request, user_id, full_response, start_time, trace):
+        saved["response"] = full_response
+        return {"token": "", "done": True, "id": 7}
+
+    monkeypatch.setattr(chat, "_save_streamed_chat", _save)
+
+    with client.stream("POST", "/chat/stream/voice", json={"message": "hi", "use_urdu": False}) as response:
+        events = _events(response)
+
+    assert events[-1] == {"token": "", "done": True, "id": 7}
+    assert saved["response"].startswith("A complete sentence here. ")
+    # Every sentence is closed off even though no audio came through
+    assert not [e for e in events if "audio" in e]
+    assert [e["audio_end"] for e in events if "audio_end" in e] == [0, 1]
+    # Nothing empty was cached
+    assert not os.path.isdir(tts_cache.directory) or not os.listdir(tts_cache.directory)
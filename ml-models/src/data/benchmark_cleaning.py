@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""Benchmark cleaning.py against the old row-wise datacleaning2.py.
+
+Usage:
+    python benchmark_cleaning.py [--rows 1000000] [--skip-legacy]
+
+A synthetic survey export is sampled column by column from the answers
+(and missing-value rates) in data/interim/allData.csv, then both
+implementations clean it in their own temp directory. data.csv,
+data_final.csv and clean_data.csv must come out byte-identical.
+"""
+
+import argparse
+import filecmp
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import cleaning
+
+
+def legacy_run(source_dir, output_dir):
+    """The row-wise datacleaning2.py before cleaning.py, paths parameterized."""
+    data = pd.read_csv(os.path.join(source_dir, 'allData.csv'))
+
+    def label5(row):
+        if row['Hair growth on Chin'] == 'normal':
+            return 0
+        elif row['Hair growth on Chin'] == 'moderate':
+            return 1
+        else:
+            return 2
+
+    data['Hair growth on Chin'] = data.apply(lambda row: label5(row), axis=1)
+
+    def label16(row):
+        if row['relocated city'] == 'Yes':
+            return 1
+        else:
+            return 0
+
+    data['relocated city'] = data.apply(lambda row: label16(row), axis=1)
+    data.to_csv(os.path.join(source_dir, 'data.csv'))
+
+    def label17(row):
+        if row['Period Length'] == '2-3 days':
+            return 3
+        elif row['Period Length'] == '4-5 days':
+            return 5
+        elif row['Period Length'] == '6-7 days':
+            return 7
+        else:
+            return 9
+
+    data['Period Length'] = data.apply(lambda row: label17(row), axis=1)
+
+    def label18(row):
+        if row['Cycle Length'] == '20-24 days':
+            return 22
+        elif row['Cycle Length'] == '20-28 days':
+            return 25
+        elif row['Cycle Length'] == '25-28':
+            return 27
+        elif row['Cycle Length'] == '29-35 days':
+            return 32
+        elif row['Cycle Length'] == '36+ days':
+            return 37
+        else:
+            return 'NaN'
+
+    data['Cycle Length'] = data.apply(lambda row: label18(row), axis=1)
+    del data['PCOS_from']
+    data.to_csv(os.path.join(source_dir, 'data_final.csv'))
+
+    data1 = pd.read_csv(os.path.join(source_dir, 'data.csv'))
+    data1['Period Length'] = data.apply(lambda row: label17(row), axis=1)
+
+    def label18(row):
+        if row['Cycle Length'] == '20-24 days':
+            return 1
+        elif row['Cycle Length'] == '20-28 days':
+            return 2
+        elif row['Cycle Length'] == '25-28':
+            return 3
+        elif row['Cycle Length'] == '29-35 days':
+            return 4
+        elif row['Cycle Length'] == '36+ days':
+            return 5
+        else:
+            return 6
+
+    data1['Cycle Length'] = data.apply(lambda row: label18(row), axis=1)
+
+    def label19(row):
+        if row['Age'] == 'Below 18':
+            return 1
+        elif row['Age'] == '18-25':
+            return 2
+        elif row['Age'] == '26-30':
+            return 3
+        elif row['Age'] == '31-35':
+            return 4
+        elif row['Age'] == '36-40':
+            return 5
+        elif row['Age'] == '41-45':
+            return 6
+        else:
+            return 7
+
+    data1['Age'] = data1.apply(lambda row: label19(row), axis=1)
+
+    def encode_yes_no(value):
+        if value == 'Yes':
+            return 1
+        elif value == 'No':
+            return 0
+        else:
+            return value
+
+    def encode_hair_growth(value):
+        if value == 'normal':
+            return 0
+        elif value == 'moderate':
+            return 1
+        elif value == 'excessive':
+            return 2
+        else:
+            return value
+
+    def encode_difficulty(value):
+        if value == 'Not Applicable':
+            return 0
+        elif value == 'Yes':
+            return 1
+        elif value == 'No':
+            return 2
+        else:
+            return value
+
+    yes_no_cols = ['Overweight', 'loss weight gain / weight loss', 'irregular or missed periods',
+                   'Acne or skin tags', 'Hair thinning or hair loss ', 'Dark patches',
+                   'always tired', 'more Mood Swings', 'canned food often', 'PCOS']
+    hair_cols = ['Hair growth  on Cheeks', 'Hair growth Between breasts',
+                 'Hair growth  on Upper lips ', 'Hair growth in Arms', 'Hair growth on Inner thighs']
+    for col in yes_no_cols:
+        if col in data1.columns:
+            data1[col] = data1[col].apply(encode_yes_no)
+    for col in hair_cols:
+        if col in data1.columns:
+            data1[col] = data1[col].apply(encode_hair_growth)
+    if 'Difficulty in conceiving' in data1.columns:
+        data1['Difficulty in conceiving'] = data1['Difficulty in conceiving'].apply(encode_difficulty)
+
+    data1 = data1.fillna(0)
+    for col in data1.columns:
+        if col not in ['City', 'PCOS_from', 'Unnamed: 0']:
+            data1[col] = pd.to_numeric(data1[col], errors='coerce')
+    data1 = data1.fillna(0)
+    for col in ['Unnamed: 0', 'City', 'PCOS_from']:
+        if col in data1.columns:
+            del data1[col]
+
+    data1.to_csv(os.path.join(output_dir, 'clean_data.csv'), index=False)
+
+
+def synthetic_export(rows, seed=0):
+    """Survey export with each column sampled from the real answer frequencies."""
+    real = pd.read_csv(os.path.join(cleaning.interim_dir, 'allData.csv'))
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for col in real.columns:
+        counts = real[col].value_counts(dropna=False, normalize=True)
+        values = counts.index.to_numpy(dtype=object)
+        columns[col] = values[rng.choice(len(values), size=rows, p=counts.to_numpy())]
+    return pd.DataFrame(columns)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time cleaning.py')
+    args = parser.parse_args()
+
+    outputs = ['data.csv', 'data_final.csv', 'clean_data.csv']
+    workdir = tempfile.mkdtemp(prefix='pcos_cleaning_')
+    try:
+        dirs = {name: os.path.join(workdir, name) for name in ('new', 'legacy')}
+        export = os.path.join(workdir, 'allData.csv')
+        synthetic_export(args.rows).to_csv(export, index=False)
+        print(f"Synthetic export: {args.rows:,} rows, {os.path.getsize(export) / 1e6:.1f} MB")
+
+        for name, path in dirs.items():
+            os.makedirs(path)
+            shutil.copy(export, path)
+
+        new_s = timed(cleaning.run, dirs['new'], dirs['new'])
+        print(f"  cleaning.py      {new_s:8.2f}s")
+        data = pd.read_csv(export)
+        encode_s = timed(lambda: cleaning.clean(cleaning.encode(data, cleaning.INTERIM_COLUMNS)))
+        print(f"    of which encoding (no CSV I/O) {encode_s:.2f}s")
+        if args.skip_legacy:
+            return
+
+        legacy_s = timed(legacy_run, dirs['legacy'], dirs['legacy'])
+        print(f"  row-wise legacy  {legacy_s:8.2f}s  ({legacy_s / new_s:.1f}x slower)")
+
+        for name in outputs:
+            same = filecmp.cmp(os.path.join(dirs['new'], name), os.path.join(dirs['legacy'], name), shallow=False)
+            assert same, f"{name} differs from the legacy output"
+        print(f"  {', '.join(outputs)} are byte-identical")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
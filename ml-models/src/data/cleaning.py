@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""Declarative, vectorized cleaning of the survey export.
+
+Turns data/interim/allData.csv (written by datacleaning1.py) into
+
+- data/interim/data.csv        Chin hair growth and relocation encoded
+- data/interim/data_final.csv  plus period / cycle length in days
+- data/processed/clean_data.csv  every answer encoded as a number
+
+and, from the streamed data/interim/allData.parquet (see ingest.py),
+data/processed/clean_data.parquet with int8 columns, one record batch at a
+time and reading only the columns that are kept.
+
+Each column's encoding is declared once below as an `Encoding` and applied
+to the whole column by factorizing it and looking up each distinct answer
+once, instead of calling a Python function per row. The output is byte-identical to the old
+row-wise datacleaning2.py, including its quirks:
+
+- Period Length and Cycle Length in clean_data.csv were encoded from the
+  already-encoded data_final.csv values, so every row ends up with the
+  fallback code (9 and 6). Pass legacy=False to encode the raw answers.
+- Age "40-45" and "Above 45" are not in the map and fall back to 7.
+- Answers outside a map (e.g. Overweight "Maybe") become 0 and turn the
+  column into floats, as pd.to_numeric + fillna(0) did.
+"""
+
+import os
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import ingest
+
+# Get the directory of this script
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(script_dir, '..', '..')
+interim_dir = os.path.join(project_root, 'data', 'interim')
+processed_dir = os.path.join(project_root, 'data', 'processed')
+
+# Unmapped answers pass through unchanged (and are coerced to numbers later)
+KEEP = object()
+
+
+class Encoding(NamedTuple):
+    """Category -> code map, with `default` for anything else (incl. missing)."""
+    mapping: dict
+    default: object = KEEP
+
+    def apply(self, column):
+        # Look up each distinct answer once, then broadcast by factor code
+        factor, uniques = pd.factorize(column)
+        # (factor -1 = missing picks the trailing -1 = not found)
+        pos = np.append(pd.Index(list(self.mapping)).get_indexer(uniques), -1)[factor]
+        if self.default is KEEP:
+            # Unmapped answers go straight to pd.to_numeric, i.e. NaN unless
+            # they already look like numbers
+            values = np.array(list(self.mapping.values()), dtype=np.float64)[pos]
+            unmapped = pos < 0
+            if unmapped.any():
+                values[unmapped] = pd.to_numeric(column[unmapped], errors='coerce').to_numpy(dtype=np.float64)
+                if not (values == np.round(values)).all():  # NaN or fractional
+                    return pd.Series(values, index=column.index, name=column.name)
+            return pd.Series(values.astype(np.int64), index=column.index, name=column.name)
+
+        # Index -1 (not found) picks the default appended at the end
+        codes = list(self.mapping.values()) + [self.default]
+        mixed = any(isinstance(code, str) for code in codes)
+        values = np.array(codes, dtype=object if mixed else None)[pos]
+        return pd.Series(values, index=column.index, name=column.name)
+
+
+# ──────────────────────────────────────────────
+# Encodings
+# ──────────────────────────────────────────────
+
+YES_NO = Encoding({'Yes': 1, 'No': 0})
+HAIR_GROWTH = Encoding({'normal': 0, 'moderate': 1, 'excessive': 2})
+DIFFICULTY = Encoding({'Not Applicable': 0, 'Yes': 1, 'No': 2})
+HAIR_CHIN = Encoding({'normal': 0, 'moderate': 1}, default=2)
+RELOCATED = Encoding({'Yes': 1}, default=0)
+AGE = Encoding({'Below 18': 1, '18-25': 2, '26-30': 3, '31-35': 4, '36-40': 5, '41-45': 6}, default=7)
+PERIOD_DAYS = Encoding({'2-3 days': 3, '4-5 days': 5, '6-7 days': 7}, default=9)
+CYCLE_DAYS = Encoding({'20-24 days': 22, '20-28 days': 25, '25-28': 27, '29-35 days': 32, '36+ days': 37},
+                      default='NaN')
+CYCLE_ORDINAL = Encoding({'20-24 days': 1, '20-28 days': 2, '25-28': 3, '29-35 days': 4, '36+ days': 5},
+                         default=6)
+
+# data.csv
+INTERIM_COLUMNS = {
+    'Hair growth on Chin': HAIR_CHIN,
+    'relocated city': RELOCATED,
+}
+
+# data_final.csv (built on data.csv)
+FINAL_COLUMNS = {
+    'Period Length': PERIOD_DAYS,
+    'Cycle Length': CYCLE_DAYS,
+}
+
+# clean_data.csv (built on data.csv); other columns are only made numeric
+CLEAN_COLUMNS = {
+    'Period Length': PERIOD_DAYS,
+    'Cycle Length': CYCLE_ORDINAL,
+    'Age': AGE,
+    'Difficulty in conceiving': DIFFICULTY,
+    **{col: YES_NO for col in [
+        'Overweight', 'loss weight gain / weight loss', 'irregular or missed periods',
+        'Acne or skin tags', 'Hair thinning or hair loss ', 'Dark patches',
+        'always tired', 'more Mood Swings', 'canned food often', 'PCOS']},
+    **{col: HAIR_GROWTH for col in [
+        'Hair growth  on Cheeks', 'Hair growth Between breasts',
+        'Hair growth  on Upper lips ', 'Hair growth in Arms', 'Hair growth on Inner thighs']},
+}
+
+# clean_data.csv encodes these from data_final.csv rather than the raw answers
+LEGACY_FROM_FINAL = ['Period Length', 'Cycle Length']
+
+DROP_COLUMNS = ['Unnamed: 0', 'City', 'PCOS_from']
+
+# clean_data columns the models are trained on, in the order the backend
+# sends them (relocated city is not asked in the app)
+FEATURE_COLUMNS = [
+    'Period Length', 'Cycle Length', 'Age', 'Overweight', 'loss weight gain / weight loss',
+    'irregular or missed periods', 'Difficulty in conceiving', 'Hair growth on Chin',
+    'Hair growth  on Cheeks', 'Hair growth Between breasts', 'Hair growth  on Upper lips ',
+    'Hair growth in Arms', 'Hair growth on Inner thighs', 'Acne or skin tags',
+    'Hair thinning or hair loss ', 'Dark patches', 'always tired', 'more Mood Swings',
+    'exercise per week', 'eat outside per week', 'canned food often',
+]
+LABEL_COLUMN = 'PCOS'
+
+
+def encode(data, columns):
+    """Copy of `data` with each declared column replaced by its encoding."""
+    out = data.copy()
+    for col, encoding in columns.items():
+        if col in out.columns:
+            out[col] = encoding.apply(out[col])
+    return out
+
+
+def to_numeric(data):
+    """Coerce every column to numbers; anything unparseable or missing is 0."""
+    out = {}
+    for col in data.columns:
+        values = pd.to_numeric(data[col], errors='coerce')
+        if values.isna().any():
+            values = values.fillna(0)
+        out[col] = values
+    return pd.DataFrame(out, index=data.index)
+
+
+def clean(interim, final=None, legacy=True):
+    """clean_data.csv frame from the data.csv frame.
+
+    With `legacy` the LEGACY_FROM_FINAL columns are re-encoded from `final`
+    (the data_final.csv frame), as the original script did.
+    """
+    source = interim.drop(columns=[c for c in DROP_COLUMNS if c in interim.columns])
+    if legacy:
+        if final is None:
+            final = encode(interim, FINAL_COLUMNS)
+        source[LEGACY_FROM_FINAL] = final[LEGACY_FROM_FINAL]
+    return to_numeric(encode(source, CLEAN_COLUMNS))
+
+
+def run(source_dir=interim_dir, output_dir=processed_dir, legacy=True):
+    """allData.csv -> data.csv, data_final.csv and clean_data.csv."""
+    data = pd.read_csv(os.path.join(source_dir, 'allData.csv'))
+
+    interim = encode(data, INTERIM_COLUMNS)
+    interim.to_csv(os.path.join(source_dir, 'data.csv'))
+
+    final = encode(interim, FINAL_COLUMNS).drop(columns=['PCOS_from'])
+    final.to_csv(os.path.join(source_dir, 'data_final.csv'))
+
+    cleaned = clean(interim, final, legacy=legacy)
+    cleaned.to_csv(os.path.join(output_dir, 'clean_data.csv'), index=False)
+    return cleaned
+
+
+def run_parquet(source=None, dest=None, legacy=True, batch_rows=ingest.CHUNK_ROWS):
+    """allData.parquet -> clean_data.parquet in bounded memory.
+
+    Every encoding works row by row, so batches are cleaned independently.
+    """
+    source = source or os.path.join(interim_dir, 'allData.parquet')
+    dest = dest or os.path.join(processed_dir, 'clean_data.parquet')
+    parquet = pq.ParquetFile(source)
+    columns = [c for c in parquet.schema_arrow.names if c not in DROP_COLUMNS]
+    writer = None
+    rows = 0
+    try:
+        for batch in parquet.iter_batches(batch_size=batch_rows, columns=columns):
+            cleaned = clean(encode(batch.to_pandas(), INTERIM_COLUMNS), legacy=legacy)
+            if writer is None:
+                # Every code and count fits in int8; a cast that doesn't fit raises
+                schema = pa.schema([pa.field(col, pa.int8()) for col in cleaned.columns])
+                writer = pq.ParquetWriter(dest, schema)
+            writer.write_table(pa.Table.from_pandas(cleaned, preserve_index=False).cast(schema))
+            rows += len(cleaned)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""Streaming ingestion of the survey export.
+
+Reads results.xlsx (or a CSV export with the same columns) in chunks of
+`chunk_rows` rows, applies the datacleaning1.py preparation to each chunk
+and appends it to
+
+- data/interim/allData.parquet  typed, compact copy read by later stages
+- data/interim/allData.csv      unchanged, for the older scripts
+- data/interim/OnlyPCOS.csv     PCOS-positive rows with a known onset age
+
+so memory is bounded by the chunk size rather than the export size.
+In Parquet each answer column is dictionary-encoded with int8 indices
+(int16 for free-text City), and the counts are int8, so readers can pull
+just the columns they need with `read_columns`.
+
+Each stage reports its peak resident memory through `peak_memory`.
+"""
+
+import argparse
+import itertools
+import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Get the directory of this script
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(script_dir, '..', '..')
+raw_dir = os.path.join(project_root, 'data', 'raw')
+interim_dir = os.path.join(project_root, 'data', 'interim')
+
+CHUNK_ROWS = 50_000
+
+# Survey questions we don't use
+DROPPED_COLUMNS = ['Timestamp', 'PCOS tested', 'When do you experience mood swings?']
+
+# Numeric columns and their (nullable) pandas dtypes; every other column is
+# a categorical answer
+NUMERIC_COLUMNS = {
+    'PCOS_from': 'Int16',
+    'exercise per week': 'Int8',
+    'eat outside per week': 'Int8',
+}
+ARROW_TYPES = {'Int8': pa.int8(), 'Int16': pa.int16()}
+
+# Free text - can have more distinct values per chunk than int8 indices hold
+WIDE_CATEGORICALS = ['City']
+
+
+# ──────────────────────────────────────────────
+# Memory reporting
+# ──────────────────────────────────────────────
+
+def _reset_peak_rss():
+    # Linux: writing 5 resets VmHWM so each stage gets its own peak
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _proc_status(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss():
+    peak = _proc_status('VmHWM')
+    if peak is not None:
+        return peak
+    import resource
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@contextmanager
+def peak_memory(stage):
+    """Print the peak resident memory and wall time of the enclosed block.
+
+    The growth over the memory already in use when the block started is the
+    stage's own footprint. Where the peak can't be reset (non-Linux) it is
+    the process peak so far.
+    """
+    _reset_peak_rss()
+    before = _proc_status('VmRSS') or _peak_rss()
+    start = time.perf_counter()
+    yield
+    peak = _peak_rss()
+    print(f"[{stage}] peak memory {peak / 2**20:.1f} MiB (+{max(peak - before, 0) / 2**20:.1f} MiB), "
+          f"{time.perf_counter() - start:.1f}s")
+
+
+# ──────────────────────────────────────────────
+# Reading
+# ──────────────────────────────────────────────
+
+def iter_export(path, chunk_rows=CHUNK_ROWS):
+    """Yield the raw export as DataFrames of at most `chunk_rows` rows."""
+    if path.endswith('.csv'):
+        yield from pd.read_csv(path, chunksize=chunk_rows, dtype=object)
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows)
+        while True:
+            block = [row for row in itertools.islice(rows, chunk_rows) if any(v is not None for v in row)]
+            if not block:
+                break
+            yield pd.DataFrame(block, columns=header, dtype=object)
+    finally:
+        workbook.close()
+
+
+def prepare(chunk):
+    """datacleaning1.py's preparation, applied to one chunk."""
+    chunk = chunk.drop(columns=[c for c in DROPPED_COLUMNS if c in chunk.columns])
+    chunk['City'] = chunk['City'].str.lower()
+    chunk = chunk.rename(columns={'PCOS from age of': 'PCOS_from'})
+    # Only text answers ("Since I was 17") yield an age here; cells Excel
+    # stored as numbers come back NaN, as they always have with .str.extract
+    text = chunk.PCOS_from.where(chunk.PCOS_from.apply(isinstance, args=(str,)))
+    chunk['PCOS_from'] = text.astype('string').str.extract(r'(\d+)', expand=False)
+
+    for col in chunk.columns:
+        if col in NUMERIC_COLUMNS:
+            chunk[col] = pd.to_numeric(chunk[col]).astype(NUMERIC_COLUMNS[col])
+        else:
+            chunk[col] = chunk[col].astype('string')
+    return chunk
+
+
+def arrow_schema(columns):
+    fields = []
+    for col in columns:
+        if col in NUMERIC_COLUMNS:
+            fields.append(pa.field(col, ARROW_TYPES[NUMERIC_COLUMNS[col]]))
+        else:
+            index = pa.int16() if col in WIDE_CATEGORICALS else pa.int8()
+            fields.append(pa.field(col, pa.dictionary(index, pa.string())))
+    return pa.schema(fields)
+
+
+def read_columns(path, columns=None):
+    """Load `columns` of a stage output, reading Parquet when it exists.
+
+    `path` may name either the .parquet or the .csv file.
+    """
+    stem = os.path.splitext(path)[0]
+    if os.path.exists(stem + '.parquet'):
+        return pd.read_parquet(stem + '.parquet', columns=columns)
+    data = pd.read_csv(stem + '.csv', usecols=columns)
+    # usecols keeps file order
+    return data[columns] if columns else data
+
+
+# ──────────────────────────────────────────────
+# Ingestion
+# ──────────────────────────────────────────────
+
+def run(source=None, output_dir=interim_dir, chunk_rows=CHUNK_ROWS):
+    """Stream the export into allData.parquet, allData.csv and OnlyPCOS.csv."""
+    source = source or os.path.join(raw_dir, 'results.xlsx')
+    writer = None
+    rows = 0
+    with open(os.path.join(output_dir, 'allData.csv'), 'w', newline='') as all_csv, \
+            open(os.path.join(output_dir, 'OnlyPCOS.csv'), 'w', newline='') as pcos_csv:
+        try:
+            for chunk in iter_export(source, chunk_rows):
+                data = prepare(chunk)
+                first = writer is None
+                if first:
+                    schema = arrow_schema(data.columns)
+                    writer = pq.ParquetWriter(os.path.join(output_dir, 'allData.parquet'), schema)
+                writer.write_table(pa.Table.from_pandas(data, preserve_index=False).cast(schema))
+
+                data.to_csv(all_csv, index=False, header=first)
+                pcos = data[data['PCOS'] == 'Yes'].dropna(subset=['PCOS_from'])
+                pcos.to_csv(pcos_csv, index=False, header=first)
+                rows += len(data)
+        finally:
+            if writer is not None:
+                writer.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream the survey export into data/interim')
+    parser.add_argument('--source', help='results.xlsx or a CSV export (default: data/raw/results.xlsx)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    with peak_memory('ingest'):
+        rows = run(args.source, chunk_rows=args.chunk_rows)
+    print(f"Saved {rows} rows to allData.parquet, allData.csv and OnlyPCOS.csv in {interim_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Versioned model bundles.
+
+A bundle is a directory holding
+
+- model.joblib   the fitted estimator, dumped uncompressed so its NumPy
+                 arrays can be memory-mapped on load (mmap_mode='r')
+- manifest.json  what the model expects and where it came from: bundle
+                 format, model version, feature names/order/dtypes, label,
+                 classes, training data hash, metrics, probability
+                 calibration table, the model_selection.py configuration it
+                 was trained with, library versions and the model file's
+                 sha256
+
+The backend (app/services/pcos_model.py) validates the manifest against the
+model and its own feature mapping before serving it, and records the
+manifest's model_version with each prediction.
+
+Files are written to a temp name and renamed into place, manifest last, so a
+reader that sees a new manifest also sees the model it describes, and a
+process that has the old model memory-mapped keeps reading the old file.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import joblib
+
+FORMAT_VERSION = 1
+MODEL_FILE = 'model.joblib'
+MANIFEST_FILE = 'manifest.json'
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _library_versions():
+    import numpy
+    import sklearn
+    return {'python': '.'.join(map(str, sys.version_info[:3])),
+            'numpy': numpy.__version__, 'scikit-learn': sklearn.__version__}
+
+
+def save_bundle(directory, model, features, label, training_data, metrics=None, calibration=None,
+                selection=None):
+    """Write `model` and its manifest to `directory`; returns the manifest.
+
+    `features` maps each feature name, in the order the model was fit on, to
+    its dtype; `training_data` is the file the model was trained from.
+    `calibration` is a lookup table from calibration.fit_table and
+    `selection` the {family, params, resampling} the model was built from.
+    """
+    os.makedirs(directory, exist_ok=True)
+    model_path = os.path.join(directory, MODEL_FILE)
+    # New file, then rename: a reader may have the old one memory-mapped
+    joblib.dump(model, model_path + '.tmp')
+    os.replace(model_path + '.tmp', model_path)
+    model_sha256 = file_hash(model_path)
+
+    trained_at = datetime.datetime.now(datetime.timezone.utc)
+    # The calibration changes what is served, so it is part of the version
+    served = hashlib.sha256((model_sha256 + json.dumps(calibration, sort_keys=True)).encode()).hexdigest()
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        # Fits PCOSPrediction.model_version (20 chars)
+        'model_version': f"{trained_at:%Y.%m.%d}-{served[:8]}",
+        'trained_at': trained_at.isoformat(timespec='seconds'),
+        'estimator': f"{type(model).__module__}.{type(model).__name__}",
+        'features': [{'name': name, 'dtype': str(dtype)} for name, dtype in features.items()],
+        'label': label,
+        'classes': [int(c) for c in model.classes_],
+        'training_data': {'file': os.path.basename(training_data), 'sha256': file_hash(training_data)},
+        'metrics': {name: round(float(value), 4) for name, value in (metrics or {}).items()},
+        'calibration': calibration,
+        'selection': selection,
+        'libraries': _library_versions(),
+        'model_file': MODEL_FILE,
+        'model_sha256': model_sha256,
+    }
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+
+def copy_bundle(source, dest):
+    """Copy a bundle, manifest last, replacing (never rewriting) each file."""
+    os.makedirs(dest, exist_ok=True)
+    for name in (MODEL_FILE, MANIFEST_FILE):
+        shutil.copy2(os.path.join(source, name), os.path.join(dest, name + '.tmp'))
+        os.replace(os.path.join(dest, name + '.tmp'), os.path.join(dest, name))
+
+
+def load_bundle(directory, mmap=True):
+    """(model, manifest) from a bundle directory."""
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    model = joblib.load(os.path.join(directory, manifest['model_file']), mmap_mode='r' if mmap else None)
+    return model, manifest
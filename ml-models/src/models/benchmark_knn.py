@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Benchmark the vectorized KNNClassifier against the legacy loops.
+
+Usage:
+    python benchmark_knn.py [--sizes 267,1000,10000,100000] [--legacy-queries 50]
+
+Datasets are synthetic survey-like rows (22 small integer answers, 0/1
+label) so ties in distance are common, as in clean_data.csv. The legacy
+getNeighbors re-sorts its whole list after every append, so it is only
+timed on the first --legacy-queries test rows and extrapolated; its
+predictions on those rows must match the vectorized ones exactly.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from knn import KNNClassifier
+from knnprediction import getNeighbors, getResponse, loadData
+
+
+def survey_like(n, n_features=22, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 6, size=(n, n_features))
+    # Label depends on a few answers so the classes are not pure noise
+    y = (X[:, :4].sum(axis=1) + rng.integers(0, 4, size=n) > 12).astype(int)
+    return X, y
+
+
+def legacy_predict(X_train, y_train, X_query, k):
+    trainingSet = np.column_stack([X_train, y_train]).tolist()
+    preds = []
+    for row in X_query.tolist():
+        neighbors = getNeighbors(trainingSet, row + [None], k)
+        preds.append(getResponse(neighbors))
+    return np.array(preds)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(name, X, y, k, legacy_queries, algorithms):
+    n_train = int(len(X) * 0.67)
+    X_train, y_train, X_test = X[:n_train], y[:n_train], X[n_train:]
+    print(f"\n{name}: {n_train} train x {len(X_test)} test, {X.shape[1]} features")
+
+    reference = None
+    for algorithm in algorithms:
+        knn = KNNClassifier(k=k, algorithm=algorithm, vote='legacy')
+        _, fit_s = timed(knn.fit, X_train, y_train)
+        preds, pred_s = timed(knn.predict, X_test)
+        if reference is None:
+            reference = preds
+        assert np.array_equal(preds, reference), f"{algorithm} disagrees with {algorithms[0]}"
+        print(f"  {algorithm:<10} fit {fit_s:8.3f}s  predict {pred_s:8.3f}s")
+
+    majority = KNNClassifier(k=k, vote='majority').fit(X_train, y_train).predict(X_test)
+    print(f"  majority vote differs from legacy on {int((majority != reference).sum())} rows")
+
+    q = min(legacy_queries, len(X_test))
+    if q:
+        legacy, legacy_s = timed(legacy_predict, X_train, y_train, X_test[:q], k)
+        assert np.array_equal(legacy, reference[:q]), "vectorized predictions differ from legacy"
+        estimate = legacy_s / q * len(X_test)
+        print(f"  legacy     {q} queries {legacy_s:8.3f}s  (~{estimate:,.1f}s for all) - predictions match")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='267,1000,10000,100000')
+    parser.add_argument('--legacy-queries', type=int, default=50)
+    parser.add_argument('--k', type=int, default=3)
+    args = parser.parse_args()
+
+    # The real dataset, every test row checked against legacy
+    data = loadData()
+    values = data.values[:-1]
+    run('clean_data.csv', values[:, :-1].astype(int), values[:, -1], args.k, len(values), ['brute', 'kd_tree'])
+
+    for n in (int(s) for s in args.sizes.split(',')):
+        X, y = survey_like(n)
+        # Trees lose to brute force at 22 dimensions and get slower than it
+        # as n grows, so only brute force runs past 10k
+        algorithms = ['brute', 'kd_tree', 'ball_tree'] if n <= 10000 else ['brute']
+        # Legacy re-sorts after every append (~n^2 per query): a couple of
+        # rows at 10k, none beyond
+        legacy_queries = args.legacy_queries if n <= 1000 else (2 if n <= 10000 else 0)
+        run(f'synthetic {n:,}', X, y, args.k, legacy_queries, algorithms)
+
+
+if __name__ == '__main__':
+    main()
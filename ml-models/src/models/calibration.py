@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Probability calibration exported as a lookup table.
+
+The model is trained on rebalanced (resampled or class-weighted) data, so its
+predict_proba overstates PCOS risk and can't be read as a probability (the
+backend's 20/50/80% risk bands assume it can). `fit_table` fits an isotonic
+(or Platt) mapping from raw to calibrated probability on out-of-fold
+predictions: each fold's model is trained, resampled inside the fold like
+the final one, on the other folds. The mapping is then sampled on a fixed
+grid of raw scores. The resulting table (a few dozen floats) goes into the
+bundle manifest; serving is one `np.interp` over it, for one row or many.
+"""
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
+
+from resampling import resample
+
+METHODS = ('isotonic', 'platt')
+# Raw-score knots of the exported table
+GRID = np.linspace(0, 1, 41)
+
+
+def out_of_fold_proba(estimator, X, y, n_folds=5, resampling='oversample', seed=42):
+    """Positive-class probability for every row from a model that didn't see it."""
+    X, y = np.asarray(X), np.asarray(y)
+    proba = np.empty(len(y))
+    folds = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    for i, (train_idx, test_idx) in enumerate(folds.split(X, y)):
+        model = clone(estimator).fit(*resample(X, y, train_idx, resampling, seed + i).take(X, y))
+        proba[test_idx] = model.predict_proba(X[test_idx])[:, -1]
+    return proba
+
+
+def fit_table(raw, y, method='isotonic'):
+    """Calibration lookup table {'method', 'raw', 'calibrated'} for scores `raw` with labels `y`."""
+    if method == 'isotonic':
+        calibrator = IsotonicRegression(y_min=0, y_max=1, out_of_bounds='clip').fit(raw, y)
+        calibrated = calibrator.predict(GRID)
+    elif method == 'platt':
+        calibrator = LogisticRegression(C=1e6).fit(np.asarray(raw).reshape(-1, 1), y)
+        calibrated = calibrator.predict_proba(GRID.reshape(-1, 1))[:, 1]
+    else:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}, got {method!r}")
+    return {
+        'method': method,
+        'raw': [round(float(v), 4) for v in GRID],
+        # Rounding keeps the table non-decreasing
+        'calibrated': [round(float(v), 4) for v in np.maximum.accumulate(calibrated)],
+    }
+
+
+def apply_table(table, raw):
+    """Calibrated probabilities for raw scores (scalar or array)."""
+    return np.interp(raw, table['raw'], table['calibrated'])
+
+
+def brier(y, proba):
+    return float(np.mean((np.asarray(proba) - np.asarray(y)) ** 2))
+
+
+def expected_calibration_error(y, proba, bins=10):
+    """Row-weighted mean |observed rate - mean predicted| over equal-width bins."""
+    y, proba = np.asarray(y), np.asarray(proba)
+    which = np.minimum((proba * bins).astype(int), bins - 1)
+    error = 0.0
+    for b in np.unique(which):
+        in_bin = which == b
+        error += in_bin.mean() * abs(y[in_bin].mean() - proba[in_bin].mean())
+    return float(error)
@@ -29,14 +29,8 @@ data = data.set_index('PCOS_label')
 data = data.reset_index()
 
 
-def label(row):
-    if row['PCOS'] == 1 or row['PCOS'] == 'Yes':
-        return 1
-    else:
-        return 0
-
-
-data['PCOS_label'] = data.apply(lambda row: label(row), axis=1)
+# 1 for PCOS-positive rows, whether PCOS is encoded (1) or raw ("Yes")
+data['PCOS_label'] = data['PCOS'].isin([1, 'Yes']).astype(int)
 
 print(data.head())
 print(f"\nPCOS_label distribution: {data['PCOS_label'].value_counts().to_dict()}")
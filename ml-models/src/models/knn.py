@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""Vectorized k-nearest-neighbours classifier.
+
+Replaces the per-pair Python loops of knnprediction.py:
+
+- distances come from one BLAS matrix product per query chunk
+  (||a||^2 + ||b||^2 - 2ab), or from a scikit-learn KDTree / BallTree;
+- the k nearest are selected with np.argpartition instead of re-sorting
+  the whole list after every append;
+- votes are counted with array operations.
+
+Neighbour order is (distance, training row index), exactly like the stable
+sort in the legacy getNeighbors, so predictions match it. `vote="legacy"`
+also reproduces getResponse, which only re-sorts its tally when a new
+class appears; the default `vote="majority"` is a plain majority with ties
+going to the class seen first among the nearest neighbours.
+"""
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+# Bytes of distance matrix computed per chunk of queries
+CHUNK_BYTES = 256 * 1024 * 1024
+
+
+class KNNClassifier(BaseEstimator, ClassifierMixin):
+    def __init__(self, k=3, algorithm='auto', vote='majority', leaf_size=40):
+        self.k = k
+        self.algorithm = algorithm
+        self.vote = vote
+        self.leaf_size = leaf_size
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        self.classes_, self._y = np.unique(np.asarray(y), return_inverse=True)
+        self._X = X
+        self._sq_norms = np.einsum('ij,ij->i', X, X)
+        self._algorithm = self._choose_algorithm(X)
+        self._tree = None
+        if self._algorithm == 'kd_tree':
+            from sklearn.neighbors import KDTree
+            self._tree = KDTree(X, leaf_size=self.leaf_size)
+        elif self._algorithm == 'ball_tree':
+            from sklearn.neighbors import BallTree
+            self._tree = BallTree(X, leaf_size=self.leaf_size)
+        return self
+
+    def _choose_algorithm(self, X):
+        if self.algorithm != 'auto':
+            return self.algorithm
+        # Trees stop paying off in high dimensions; the survey has 22 features
+        return 'kd_tree' if X.shape[1] <= 15 and len(X) >= 1000 else 'brute'
+
+    # ---------------- Neighbours ----------------
+    def kneighbors(self, X):
+        """Indices and squared distances of the k nearest training rows.
+
+        Rows are ordered by (distance, training index).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        k = min(self.k, len(self._X))
+        if self._tree is not None:
+            return self._tree_neighbors(X, k)
+
+        chunk = max(1, CHUNK_BYTES // (8 * max(len(self._X), 1)))
+        idx = np.empty((len(X), k), dtype=np.intp)
+        dist = np.empty((len(X), k))
+        for start in range(0, len(X), chunk):
+            stop = start + chunk
+            d = self._sq_distances(X[start:stop])
+            idx[start:stop], dist[start:stop] = _stable_topk(d, k)
+        return idx, dist
+
+    def _sq_distances(self, Q):
+        d = Q @ self._X.T
+        d *= -2.0
+        d += np.einsum('ij,ij->i', Q, Q)[:, None]
+        d += self._sq_norms[None, :]
+        # Round-off can push exact zeros slightly negative
+        np.maximum(d, 0, out=d)
+        return d
+
+    def _tree_neighbors(self, X, k):
+        dist, idx = self._tree.query(X, k=k)
+        # The tree's order among equal distances is arbitrary: re-sort the k
+        # found by (distance, index), then redo rows where more training rows
+        # tie with the k-th distance than fit in k.
+        order = _lexsort_rows(dist, idx)
+        idx = np.take_along_axis(idx, order, axis=1)
+        dist = np.take_along_axis(dist, order, axis=1)
+        kth = dist[:, -1]
+        dist = dist ** 2
+        counts = self._tree.query_radius(X, r=kth, count_only=True)
+        tied = np.nonzero(counts > k)[0]
+        if len(tied):
+            ind, d = self._tree.query_radius(X[tied], r=kth[tied], return_distance=True)
+            rows = np.repeat(np.arange(len(tied)), [len(i) for i in ind])
+            best, vals = _first_k(rows, np.concatenate(ind), np.concatenate(d) ** 2, len(tied), k)
+            idx[tied], dist[tied] = best, vals
+        return idx, dist
+
+    # ---------------- Voting ----------------
+    def predict(self, X):
+        idx, _ = self.kneighbors(X)
+        labels = self._y[idx]
+        return self.classes_[_vote(labels, len(self.classes_), self.vote)]
+
+    def predict_proba(self, X):
+        idx, _ = self.kneighbors(X)
+        labels = self._y[idx]
+        counts = (labels[:, :, None] == np.arange(len(self.classes_))).sum(axis=1)
+        return counts / labels.shape[1]
+
+
+def _lexsort_rows(primary, secondary):
+    """Per-row argsort by (primary, secondary)."""
+    order = np.argsort(secondary, axis=1, kind='stable')
+    p = np.take_along_axis(primary, order, axis=1)
+    return np.take_along_axis(order, np.argsort(p, axis=1, kind='stable'), axis=1)
+
+
+def _stable_topk(d, k):
+    """k smallest per row, ordered by (value, column) like a stable sort."""
+    n = d.shape[1]
+    if k >= n:
+        idx = np.argsort(d, axis=1, kind='stable')
+        return idx, np.take_along_axis(d, idx, axis=1)
+
+    part = np.argpartition(d, k - 1, axis=1)[:, :k]
+    vals = np.take_along_axis(d, part, axis=1)
+    order = _lexsort_rows(vals, part)
+    idx = np.take_along_axis(part, order, axis=1)
+    vals = np.take_along_axis(vals, order, axis=1)
+
+    # argpartition picks arbitrarily among values equal to the k-th one;
+    # for those rows order every candidate up to the k-th value
+    kth = vals[:, -1]
+    within = d <= kth[:, None]
+    tied = np.nonzero(within.sum(axis=1) > k)[0]
+    if len(tied):
+        rows, cols = np.nonzero(within[tied])
+        idx[tied], vals[tied] = _first_k(rows, cols, d[tied][rows, cols], len(tied), k)
+    return idx, vals
+
+
+def _first_k(rows, cols, vals, n_rows, k):
+    """Per row, the k (col, val) pairs with the smallest (val, col)."""
+    order = np.lexsort((cols, vals, rows))
+    rows, cols, vals = rows[order], cols[order], vals[order]
+    starts = np.searchsorted(rows, np.arange(n_rows))
+    take = (starts[:, None] + np.arange(k)).ravel()
+    return cols[take].reshape(n_rows, k), vals[take].reshape(n_rows, k)
+
+
+def _vote(labels, n_classes, mode='majority'):
+    """Winning class index per row of neighbour labels (nearest first)."""
+    k = labels.shape[1]
+    onehot = labels[:, :, None] == np.arange(n_classes)
+    present = onehot.any(axis=1)
+    # Position where each class is first seen (k if absent)
+    first = np.where(present, onehot.argmax(axis=1), k)
+
+    if mode == 'legacy':
+        # getResponse only re-sorts when a new class shows up, so the tally
+        # it returns is the one at the last class's first appearance
+        last_new = np.where(present, first, -1).max(axis=1)
+        onehot = onehot & (np.arange(k)[None, :, None] <= last_new[:, None, None])
+    elif mode != 'majority':
+        raise ValueError(f"Unknown vote mode: {mode}")
+
+    counts = onehot.sum(axis=1)
+    # Most votes first, then the class seen first
+    score = counts * (k + 1) - first
+    return score.argmax(axis=1)
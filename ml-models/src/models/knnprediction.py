@@ -9,29 +9,36 @@ import os
 import pandas as pd
 import numpy as np
 
+from knn import KNNClassifier
+
 # Get the directory of this script
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.join(script_dir, '..', '..')
 
 # Load data from local data/processed folder
 data_path = os.path.join(project_root, 'data', 'processed', 'clean_data.csv')
-data = pd.read_csv(data_path)
 
-data.head()
 
-# Drop unnecessary columns if they exist
-cols_to_drop = ['Unnamed: 0', 'City', 'PCOS_from']
-for col in cols_to_drop:
-    if col in data.columns:
-        data.drop(data.columns[[data.columns.get_loc(col)]], inplace=True, axis=1)
+def loadData(path=data_path):
+    data = pd.read_csv(path)
+
+    # Drop unnecessary columns if they exist
+    cols_to_drop = ['Unnamed: 0', 'City', 'PCOS_from']
+    for col in cols_to_drop:
+        if col in data.columns:
+            data.drop(data.columns[[data.columns.get_loc(col)]], inplace=True, axis=1)
+
+    # Reorder columns to have PCOS at the end
+    cols = list(data.columns.values)
+    if 'PCOS' in cols:
+        cols.pop(cols.index('PCOS'))
+        data = data[cols+['PCOS']]
 
-# Reorder columns to have PCOS at the end
-cols = list(data.columns.values)
-if 'PCOS' in cols:
-    cols.pop(cols.index('PCOS'))
-    data = data[cols+['PCOS']]
+    return data
 
-data.head()
+
+# Reference implementation below - kept for benchmark_knn.py, which checks
+# that the vectorized KNNClassifier (knn.py) predicts the same labels.
 
 
 def loadDataset(data, split, trainingSet=[], testSet=[]):
@@ -96,6 +103,7 @@ def getAccuracy(testSet, predictions):
 
 
 def main():  # prepare data
+    data = loadData()
     trainingSet = []
     testSet = []
     split = 0.67
@@ -106,33 +114,23 @@ def main():  # prepare data
 
     print('Test set: ' + repr(len(testSet)))
 
-    # generate predictions
-    predictions = []
-    k = 3
+    train = np.array(trainingSet)
+    test = np.array(testSet)
+    X_train, y_train = train[:, :-1], train[:, -1]
+    X_test, y_test = test[:, :-1], test[:, -1]
 
-    for x in range(len(trainingSet)):
-        neighbors = getNeighbors(trainingSet, trainingSet[x], k)
-        result = getResponse(neighbors)
-        predictions.append(result)
+    # vote='legacy' keeps getResponse's tie-breaking so the reported numbers
+    # are unchanged; use vote='majority' for a plain majority vote
+    knn = KNNClassifier(k=3, vote='legacy').fit(X_train, y_train)
 
-    #print('> predicted=' + repr(result) + ', actual=' + repr(trainingSet[x][-1]))
-    accuracy = getAccuracy(trainingSet, predictions)
+    accuracy = getAccuracy(trainingSet, knn.predict(X_train))
     print('Accuracy Training: ' + repr(accuracy) + '%')
 
-    predictions.clear()
-    for x in range(len(testSet)):
-        neighbors = getNeighbors(trainingSet, testSet[x], k)
-        result = getResponse(neighbors)
-        predictions.append(result)
-
-    #print('> predicted=' + repr(result) + ', actual=' + repr(testSet[x][-1]))
+    predictions = knn.predict(X_test)
     accuracy = getAccuracy(testSet, predictions)
     print('Accuracy Test: ' + repr(accuracy) + '%')
 
-    actual = []
-
-    for x in range(len(testSet)):
-        actual.append(testSet[x][-1])
+    actual = y_test
 
     results = confusion_matrix(actual, predictions)
 
@@ -143,4 +141,5 @@ def main():  # prepare data
     print(classification_report(actual, predictions))
 
 
-main()
+if __name__ == '__main__':
+    main()
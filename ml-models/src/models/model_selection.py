@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""Cross-validated model selection across every candidate family.
+
+Usage:
+    python model_selection.py [--folds 5] [--eta 3] [--n-jobs -1] [--no-halving]
+                              [--resampling none oversample smote]
+
+Logistic regression, naive Bayes, decision tree, KNN and random forest
+are each expanded over a small hyperparameter grid and scored on the same
+stratified k-fold split, so their numbers are comparable. (fit, fold) tasks
+run in parallel with joblib. X and y are dumped once to a joblib file and
+memory-mapped, so worker processes share one copy instead of each
+receiving a pickled array.
+
+Class rebalancing (random oversampling or SMOTE, see resampling.py) is
+another candidate dimension. It is applied to each training fold after the
+split, as row indices, so the test folds only ever hold real, unseen rows.
+
+Successive halving: the first rung scores every candidate on a stratified
+subsample of each training fold. Only the best 1/eta go on to the next
+rung, which uses eta times more rows; the last rung uses full folds. Ranking
+is by mean ROC AUC, then F1.
+
+Writes outputs/model_selection/leaderboard.csv and the winning
+configuration (family, hyperparameters, resampling) to
+outputs/model_selection/selected.json. train_best_model.py trains, calibrates
+and bundles that configuration for the backend.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, recall_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, train_test_split
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from resampling import METHODS as RESAMPLING_METHODS, resample
+
+# Get the directory of this script
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(script_dir, '..', '..')
+
+sys.path.insert(0, os.path.join(script_dir, '..', 'data'))
+from cleaning import FEATURE_COLUMNS, LABEL_COLUMN
+from ingest import peak_memory, read_columns
+
+data_path = os.path.join(project_root, 'data', 'processed', 'clean_data.parquet')
+leaderboard_path = os.path.join(project_root, 'outputs', 'model_selection', 'leaderboard.csv')
+selected_path = os.path.join(project_root, 'outputs', 'model_selection', 'selected.json')
+
+RANDOM_STATE = 42
+METRICS = ['roc_auc', 'f1', 'accuracy', 'recall']
+
+# family -> (estimator factory, parameter grid). Only scikit-learn estimators:
+# the winner is pickled for the backend, which can't import the training
+# modules (knn.py's KNNClassifier stays with benchmark_knn.py).
+FAMILIES = {
+    'logistic_regression': (
+        lambda: make_pipeline(StandardScaler(), LogisticRegression(max_iter=2000)),
+        {'logisticregression__C': [0.01, 0.1, 1, 10],
+         'logisticregression__class_weight': [None, 'balanced']}),
+    'naive_bayes': (
+        GaussianNB,
+        {'var_smoothing': [1e-9, 1e-7, 1e-5, 1e-3]}),
+    'decision_tree': (
+        lambda: DecisionTreeClassifier(random_state=RANDOM_STATE),
+        {'max_depth': [3, 6, 9, None], 'min_samples_leaf': [1, 5], 'class_weight': [None, 'balanced']}),
+    'knn': (
+        KNeighborsClassifier,
+        {'n_neighbors': [3, 5, 7, 11, 15]}),
+    'random_forest': (
+        lambda: RandomForestClassifier(random_state=RANDOM_STATE, n_jobs=1),
+        {'n_estimators': [150, 300], 'max_depth': [6, 12, None], 'class_weight': [None, 'balanced']}),
+}
+
+
+def candidates(families=None, resampling=RESAMPLING_METHODS):
+    """(family, params, resampling, key) for every grid point and resampling
+    method; key identifies it on the leaderboard."""
+    return [(family, params, method, (family, method, json.dumps(params, sort_keys=True)))
+            for family in (families or FAMILIES)
+            for method in resampling
+            for params in ParameterGrid(FAMILIES[family][1])]
+
+
+def make_estimator(family, params):
+    return FAMILIES[family][0]().set_params(**params)
+
+
+def load_data():
+    data = read_columns(data_path, FEATURE_COLUMNS + [LABEL_COLUMN])
+    X = data[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = data[LABEL_COLUMN].isin([1, 'Yes']).to_numpy(dtype=np.int64)
+    return X, y
+
+
+# ──────────────────────────────────────────────
+# Scoring
+# ──────────────────────────────────────────────
+
+def _evaluate(family, params, method, X, y, train_idx, test_idx, n_train, seed):
+    """Fit on (a stratified subsample of) one training fold, rebalanced with
+    `method`, and score the untouched test fold."""
+    if n_train is not None and n_train < len(train_idx):
+        train_idx, _ = train_test_split(train_idx, train_size=n_train, stratify=y[train_idx], random_state=seed)
+    estimator = make_estimator(family, params)
+    start = time.perf_counter()
+    estimator.fit(*resample(X, y, train_idx, method, seed).take(X, y))
+    fit_seconds = time.perf_counter() - start
+
+    proba = estimator.predict_proba(X[test_idx])[:, 1]
+    pred = estimator.predict(X[test_idx])
+    y_test = y[test_idx]
+    return {
+        'roc_auc': roc_auc_score(y_test, proba),
+        'f1': f1_score(y_test, pred, zero_division=0),
+        'accuracy': accuracy_score(y_test, pred),
+        'recall': recall_score(y_test, pred, zero_division=0),
+        'fit_seconds': fit_seconds,
+    }
+
+
+def _rung_sizes(n_candidates, n_max, eta, min_resources, halving):
+    """Training rows per fold for each rung; None (the last) means the whole fold."""
+    if not halving:
+        return [None]
+    n_rungs = 1 + int(math.log(max(n_candidates, 1), eta))
+    # Don't start below min_resources training rows
+    while n_rungs > 1 and n_max / eta ** (n_rungs - 1) < min_resources:
+        n_rungs -= 1
+    return [int(n_max / eta ** (n_rungs - 1 - r)) for r in range(n_rungs - 1)] + [None]
+
+
+def select(X, y, families=None, n_folds=5, eta=3, min_resources=40, halving=True, n_jobs=-1,
+           resampling=RESAMPLING_METHODS):
+    """Successive-halving CV over all candidates; returns the leaderboard DataFrame."""
+    folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=RANDOM_STATE).split(X, y))
+    alive = candidates(families, resampling)
+    fold_rows = min(len(train) for train, _ in folds)
+    sizes = _rung_sizes(len(alive), fold_rows, eta, min_resources, halving)
+    rows = {}
+
+    with tempfile.TemporaryDirectory(prefix='pcos_select_') as tmp:
+        # Memory-mapped arrays are passed to workers by file name, not copied
+        path = os.path.join(tmp, 'Xy.joblib')
+        joblib.dump((X, y), path)
+        X, y = joblib.load(path, mmap_mode='r')
+
+        with Parallel(n_jobs=n_jobs) as parallel:
+            for rung, n_train in enumerate(sizes):
+                rung_rows = n_train or fold_rows
+                start = time.perf_counter()
+                results = parallel(
+                    delayed(_evaluate)(family, params, method, X, y, train, test, n_train, RANDOM_STATE + i)
+                    for family, params, method, _ in alive
+                    for i, (train, test) in enumerate(folds))
+
+                for c, (family, params, method, key) in enumerate(alive):
+                    fold_scores = pd.DataFrame(results[c * n_folds:(c + 1) * n_folds])
+                    row = {'family': family, 'params': key[2], 'resampling': method, 'rung': rung,
+                           'n_train': rung_rows}
+                    for metric in METRICS:
+                        row[f'{metric}_mean'] = fold_scores[metric].mean()
+                        row[f'{metric}_std'] = fold_scores[metric].std(ddof=0)
+                    row['fit_seconds'] = fold_scores['fit_seconds'].sum()
+                    rows[key] = row
+
+                print(f"Rung {rung}: {len(alive)} candidates x {n_folds} folds on {rung_rows} rows "
+                      f"in {time.perf_counter() - start:.1f}s")
+                if rung < len(sizes) - 1:
+                    ranked = sorted(alive, key=lambda c: (-rows[c[3]]['roc_auc_mean'], -rows[c[3]]['f1_mean']))
+                    alive = ranked[:math.ceil(len(alive) / eta)]
+
+    leaderboard = pd.DataFrame(list(rows.values()))
+    leaderboard = leaderboard.sort_values(
+        ['rung', 'roc_auc_mean', 'f1_mean'], ascending=[False, False, False], kind='stable').reset_index(drop=True)
+    leaderboard.insert(0, 'rank', np.arange(1, len(leaderboard) + 1))
+    return leaderboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--eta', type=int, default=3, help='keep the best 1/eta candidates per rung')
+    parser.add_argument('--min-resources', type=int, default=40, help='training rows in the first rung')
+    parser.add_argument('--no-halving', dest='halving', action='store_false', help='score every candidate on full folds')
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--families', nargs='+', choices=list(FAMILIES))
+    parser.add_argument('--resampling', nargs='+', choices=RESAMPLING_METHODS, default=list(RESAMPLING_METHODS),
+                        help='class rebalancing applied inside each training fold')
+    args = parser.parse_args()
+
+    with peak_memory('load'):
+        X, y = load_data()
+    print(f"{len(y)} rows, {X.shape[1]} features, {int(y.sum())} positive")
+
+    with peak_memory('select'):
+        leaderboard = select(X, y, args.families, args.folds, args.eta, args.min_resources, args.halving, args.n_jobs,
+                             args.resampling)
+
+    os.makedirs(os.path.dirname(leaderboard_path), exist_ok=True)
+    leaderboard.to_csv(leaderboard_path, index=False, float_format='%.4f')
+    columns = ['rank', 'family', 'params', 'resampling', 'rung', 'roc_auc_mean', 'f1_mean', 'accuracy_mean', 'recall_mean']
+    print(leaderboard[columns].head(10).to_string(index=False))
+    print(f"\nLeaderboard saved to {leaderboard_path}")
+
+    best = leaderboard.iloc[0]
+    selected = {
+        'family': best['family'],
+        'params': json.loads(best['params']),
+        'resampling': best['resampling'],
+        'metrics': {f'{metric}_mean': round(float(best[f'{metric}_mean']), 4) for metric in METRICS},
+    }
+    with open(selected_path, 'w') as f:
+        json.dump(selected, f, indent=2)
+    print(f"Winner: {best['family']} {best['params']} resampling={best['resampling']} (ROC AUC {best['roc_auc_mean']:.3f})")
+    print(f"Selection saved to {selected_path}; train_best_model.py trains and bundles it")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Index-based class rebalancing for training folds.
+
+Resampling has to happen after the train/test split (inside each CV fold),
+otherwise copies of the same minority row end up on both sides and the test
+metrics are inflated. `resample` only looks at the training rows it is given
+and returns a `Resample`: the training rows as indices into the original
+arrays, with minority rows repeated for random oversampling, plus for
+SMOTE the (base, neighbor, gap) triples that define each synthetic row.
+Nothing is copied until `Resample.take` builds the arrays to fit on.
+
+    plan = resample(X, y, train_idx, 'smote', seed=42)
+    X_fit, y_fit = plan.take(X, y)
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from knn import KNNClassifier
+
+METHODS = ('none', 'oversample', 'smote')
+SMOTE_NEIGHBORS = 5
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+class Resample(NamedTuple):
+    """Training rows after rebalancing.
+
+    Synthetic row i is X[base[i]] + gap[i] * (X[neighbor[i]] - X[base[i]])
+    with label label[i]; the arrays are empty unless the method is 'smote'.
+    """
+    rows: np.ndarray
+    base: np.ndarray = _EMPTY
+    neighbor: np.ndarray = _EMPTY
+    gap: np.ndarray = np.empty(0)
+    label: np.ndarray = _EMPTY
+
+    def take(self, X, y):
+        """(X, y) to fit on: the selected rows followed by any synthetic ones."""
+        X_fit, y_fit = X[self.rows], y[self.rows]
+        if not len(self.base):
+            return X_fit, y_fit
+        start = X[self.base].astype(np.float64)
+        synthetic = start + self.gap[:, None] * (X[self.neighbor] - start)
+        return np.concatenate([X_fit, synthetic]), np.concatenate([y_fit, self.label.astype(y_fit.dtype)])
+
+
+def _shortfall(y, rows):
+    """(class, its training rows, rows needed to match the largest class) per minority class."""
+    labels = y[rows]
+    classes, counts = np.unique(labels, return_counts=True)
+    return [(c, rows[labels == c], counts.max() - n) for c, n in zip(classes, counts) if n < counts.max()]
+
+
+def oversample(y, rows, rng):
+    """`rows` plus minority rows drawn with replacement until the classes balance."""
+    extra = [rng.choice(members, size=need, replace=True) for _, members, need in _shortfall(y, rows)]
+    return Resample(np.concatenate([rows] + extra))
+
+
+def smote(X, y, rows, rng, k_neighbors=SMOTE_NEIGHBORS):
+    """SMOTE: each synthetic row lies between a minority row and one of its
+    k nearest minority neighbours, at a uniform random point on the segment.
+    """
+    base, neighbor, gap, label = [], [], [], []
+    for c, members, need in _shortfall(y, rows):
+        if len(members) < 2:
+            # Nothing to interpolate with; fall back to repeating the row
+            base.append(np.repeat(members, need))
+            neighbor.append(np.repeat(members, need))
+        else:
+            k = min(k_neighbors, len(members) - 1)
+            points = X[members]
+            # Column 0 is (a copy of) the row itself
+            nearest, _ = KNNClassifier(k=k + 1, algorithm='brute').fit(points, np.zeros(len(members))).kneighbors(points)
+            pick = rng.integers(len(members), size=need)
+            base.append(members[pick])
+            neighbor.append(members[nearest[pick, rng.integers(1, k + 1, size=need)]])
+        gap.append(rng.random(need))
+        label.append(np.full(need, c))
+    if not base:
+        return Resample(rows)
+    return Resample(rows, np.concatenate(base), np.concatenate(neighbor), np.concatenate(gap), np.concatenate(label))
+
+
+def resample(X, y, rows=None, method='oversample', seed=None, k_neighbors=SMOTE_NEIGHBORS):
+    """Rebalance the training `rows` (default: all) of X, y with `method`."""
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}, got {method!r}")
+    y = np.asarray(y)
+    rows = np.arange(len(y)) if rows is None else np.asarray(rows)
+    if method == 'none':
+        return Resample(rows)
+    rng = np.random.default_rng(seed)
+    if method == 'oversample':
+        return oversample(y, rows, rng)
+    return smote(np.asarray(X), y, rows, rng, k_neighbors)
@@ -1,77 +1,101 @@
 # -*- coding: utf-8 -*-
-"""DecisionTree.ipynb - Local Version with Model Saving"""
+"""DecisionTree.ipynb - Local Version with Model Saving
 
-import pickle
+Trains the configuration chosen by model_selection.py
+(outputs/model_selection/selected.json), or the random forest below if
+selection hasn't run, calibrates it and writes a versioned bundle (see
+artifact.py) to models/saved/pcos_model, then copies it to
+backend/models/pcos_model.
+"""
+
+import json
 import os
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import confusion_matrix, accuracy_score, precision_score, recall_score, f1_score, classification_report
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.utils import resample
 import numpy as np
 import pandas as pd
-import shutil
+import sys
 
 # Get the directory of this script
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.join(script_dir, '..', '..')
 
-# Load data from local data/processed folder
+sys.path.insert(0, os.path.join(script_dir, '..', 'data'))
+from cleaning import FEATURE_COLUMNS
+from ingest import peak_memory, read_columns
+from artifact import copy_bundle, load_bundle, save_bundle
+from calibration import apply_table, brier, expected_calibration_error, fit_table, out_of_fold_proba
+from model_selection import make_estimator, selected_path
+from resampling import resample
+
+feature_cols = FEATURE_COLUMNS
+
+# Used when model_selection.py hasn't written a selection yet
+DEFAULT_SELECTION = {
+    'family': 'random_forest',
+    'params': {'n_estimators': 150, 'max_depth': 12, 'class_weight': 'balanced'},
+    'resampling': 'oversample',
+}
+if os.path.exists(selected_path):
+    with open(selected_path) as f:
+        selection = json.load(f)
+    print(f"Training the selected model: {selection['family']} {selection['params']} "
+          f"resampling={selection['resampling']}")
+else:
+    selection = DEFAULT_SELECTION
+    print(f"No {selected_path}, training the default {selection['family']}")
+selection = {key: selection[key] for key in ('family', 'params', 'resampling')}
+
+# Load only the columns the model uses from data/processed
+# (clean_data.parquet when ingest.py / datacleaning2.py have written it)
 data_path = os.path.join(project_root, 'data', 'processed', 'clean_data.csv')
-data = pd.read_csv(data_path)
-
-data.head()
-
-# Drop columns if they exist
-cols_to_drop = ['PCOS_from', 'City', 'relocated city', 'Unnamed: 0']
-for col in cols_to_drop:
-    if col in data.columns:
-        del data[col]
-
-data['PCOS_label'] = None
-print(data.head())
-
-data = data.set_index('PCOS_label')
-
-data = data.reset_index()
-
+parquet_path = os.path.splitext(data_path)[0] + '.parquet'
+data_source = parquet_path if os.path.exists(parquet_path) else data_path
+with peak_memory('load'):
+    data = read_columns(data_source, feature_cols + ['PCOS'])
 
-def label(row):
-    if row['PCOS'] == 1 or row['PCOS'] == 'Yes':
-        return 1
-    else:
-        return 0
-
-
-data['PCOS_label'] = data.apply(lambda row: label(row), axis=1)
+# 1 for PCOS-positive rows, whether PCOS is encoded (1) or raw ("Yes")
+data['PCOS_label'] = data['PCOS'].isin([1, 'Yes']).astype(int)
 
 print(data.head())
 print(f"\nPCOS_label distribution: {data['PCOS_label'].value_counts().to_dict()}")
 
-PCOS_check = dict(zip(data.PCOS_label.unique(), data.PCOS.unique()))
-print(f"PCOS mapping: {PCOS_check}")
+PCOS_STATUS = {0: 'No PCOS', 1: 'PCOS'}
 
-# Oversample the minority class
-df_majority = data[data.PCOS_label==0]
-df_minority = data[data.PCOS_label==1]
+X = data[feature_cols]
+y = data.PCOS_label
 
-df_minority_upsampled = resample(df_minority, 
-                                 replace=True,
-                                 n_samples=len(df_majority),
-                                 random_state=42)
-
-data_upsampled = pd.concat([df_majority, df_minority_upsampled])
+# Use stratified split to ensure both classes are in train and test sets
+train_idx, test_idx = train_test_split(np.arange(len(data)), random_state=42, stratify=y)
 
-X = data_upsampled.drop(['PCOS_label', 'PCOS'], axis=1)
-y = data_upsampled.PCOS_label
+# Fit on arrays in feature_cols (manifest) order: the backend scores plain
+# feature rows, and a model fit on a DataFrame warns on every prediction
+# that they have no feature names
+X_values, y_values = X.to_numpy(dtype=np.float64), y.to_numpy()
 
-# Use stratified split to ensure both classes are in train and test sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, random_state=42, stratify=y)
+# Rebalance the training rows only, so no copy of (or point interpolated
+# from) a test row is trained on
+X_train, y_train = resample(X_values, y_values, train_idx, selection['resampling'], seed=42).take(X_values, y_values)
+X_test, y_test = X_values[test_idx], y_values[test_idx]
 
 print(f"Training set size: {len(X_train)}, Test set size: {len(X_test)}")
-print(f"Training set class distribution: {y_train.value_counts().to_dict()}")
-print(f"Test set class distribution: {y_test.value_counts().to_dict()}")
-
-clf = RandomForestClassifier(n_estimators=150, max_depth=12, random_state=42, class_weight='balanced').fit(X_train, y_train)
+print(f"Training set class distribution: {pd.Series(y_train).value_counts().to_dict()}")
+print(f"Test set class distribution: {pd.Series(y_test).value_counts().to_dict()}")
+
+with peak_memory('train'):
+    clf = make_estimator(selection['family'], selection['params']).fit(X_train, y_train)
+
+# Calibrate: map out-of-fold scores on the (real) training rows to observed
+# PCOS rates; the test set stays untouched for the before/after check
+with peak_memory('calibrate'):
+    oof = out_of_fold_proba(clf, X_values[train_idx], y_values[train_idx], resampling=selection['resampling'])
+    calibration = fit_table(oof, y_values[train_idx], method='isotonic')
+raw_test = clf.predict_proba(X_test)[:, 1]
+calibrated_test = apply_table(calibration, raw_test)
+print('Brier score on test set: {:.3f} raw, {:.3f} calibrated'.format(
+    brier(y_test, raw_test), brier(y_test, calibrated_test)))
+print('Calibration error on test set: {:.3f} raw, {:.3f} calibrated'.format(
+    expected_calibration_error(y_test, raw_test), expected_calibration_error(y_test, calibrated_test)))
 
 tree_predicted = clf.predict(X_test)
 confusion = confusion_matrix(y_test, tree_predicted)
@@ -88,33 +112,38 @@ print('Accuracy on training set: {:.2f}'.format(clf.score(X_train, y_train)))
 
 print('Accuracy on test set: {:.2f}'.format(clf.score(X_test, y_test)))
 
-feature_cols = ['Period Length', 'Cycle Length', 'Age', 'Overweight', 'loss weight gain / weight loss', 'irregular or missed periods', 'Difficulty in conceiving', 'Hair growth on Chin', 'Hair growth  on Cheeks', 'Hair growth Between breasts',
-                'Hair growth  on Upper lips ', 'Hair growth in Arms', 'Hair growth on Inner thighs', 'Acne or skin tags', 'Hair thinning or hair loss ', 'Dark patches', 'always tired', 'more Mood Swings', 'exercise per week', 'eat outside per week', 'canned food often']
-
 print("Feature columns:", feature_cols)
 
 print("\n=== Sample Predictions ===")
 pcos1 = clf.predict([[5, 6, 2, 1, 1, 1, 1, 1, 0, 0, 1, 0, 0, 1, 1, 1, 1, 1, 0, 7, 0]])
-print(f"Sample 1 prediction: {PCOS_check[pcos1[0]]}")
+print(f"Sample 1 prediction: {PCOS_STATUS[pcos1[0]]}")
 
 pcos2 = clf.predict([[5, 1, 2, 0, 0, 0, 0, 1, 0, 0, 1, 1, 0, 1, 0, 1, 0, 0, 3, 3, 0]])
-print(f"Sample 2 prediction: {PCOS_check[pcos2[0]]}")
-
-# Save the trained model
-model_filename = os.path.join(project_root, 'models', 'saved', 'pcos_model.pkl')
-pickle.dump(clf, open(model_filename, 'wb'))
-print(f"Model saved to {model_filename}")
+print(f"Sample 2 prediction: {PCOS_STATUS[pcos2[0]]}")
+
+# Save the trained model as a versioned bundle (model + manifest)
+metrics = {
+    'accuracy': accuracy_score(y_test, tree_predicted),
+    'precision': precision_score(y_test, tree_predicted, zero_division=0),
+    'recall': recall_score(y_test, tree_predicted, zero_division=0),
+    'f1': f1_score(y_test, tree_predicted),
+    'brier_raw': brier(y_test, raw_test),
+    'brier_calibrated': brier(y_test, calibrated_test),
+}
+bundle_dir = os.path.join(project_root, 'models', 'saved', 'pcos_model')
+manifest = save_bundle(bundle_dir, clf, {col: X[col].dtype for col in feature_cols}, 'PCOS',
+                       data_source, metrics, calibration, selection)
+print(f"Model {manifest['model_version']} saved to {bundle_dir}")
 
 # Also copy to backend
-backend_model_path = os.path.join(project_root, '..', 'backend', 'models', 'pcos_model.pkl')
-os.makedirs(os.path.dirname(backend_model_path), exist_ok=True)
-shutil.copy2(model_filename, backend_model_path)
-print(f"Model copied to {backend_model_path}")
+backend_bundle_dir = os.path.join(project_root, '..', 'backend', 'models', 'pcos_model')
+copy_bundle(bundle_dir, backend_bundle_dir)
+print(f"Model copied to {backend_bundle_dir}")
 
 # Load and test the model
-loaded_model = pickle.load(open(model_filename, 'rb'))
+loaded_model, _ = load_bundle(bundle_dir)
 
 result = loaded_model.predict(
     [[5,	1,	2,	0,	0,	0,	0,	1,	0,	0,	1,	1,	0,	1,	0,	1,	0,	0,	3,	3,	0]])
 print(f"Prediction result: {result}")
-print(f"PCOS Status: {PCOS_check[result[0]]}")
+print(f"PCOS Status: {PCOS_STATUS[result[0]]}")
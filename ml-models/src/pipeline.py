@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""Run the ml-models workflow as one cached pipeline.
+
+Usage:
+    python pipeline.py                  # every stage, skipping cached ones
+    python pipeline.py train            # train and the stages it needs
+    python pipeline.py knn --only       # just knn, on the current inputs
+    python pipeline.py clean --force    # re-run clean even if cached
+    python pipeline.py --list           # stages and their cache state
+
+Each stage runs one of the existing scripts. Its cache key is a hash of
+the content of its input files, its source files, its command and the
+versions of the libraries that shape its outputs. After a run the outputs
+are copied into a content-addressed store under .cache/pipeline, keyed by
+their own hash, and recorded against the stage key. When the key is seen
+again the stage is skipped; any output that has changed since is restored
+from the store first. Downstream keys depend on output content, not run
+time, so a rerun that produces the same bytes does not invalidate them.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from typing import List, NamedTuple, Optional
+
+# Get the directory of this script
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.normpath(os.path.join(script_dir, '..'))
+cache_dir = os.path.join(project_root, '.cache', 'pipeline')
+
+# Libraries whose version can change a stage's outputs
+PACKAGES = ['numpy', 'pandas', 'pyarrow', 'sklearn', 'openpyxl']
+
+
+class Stage(NamedTuple):
+    name: str
+    script: str  # relative to the project root
+    inputs: List[str]
+    outputs: List[str]
+    code: List[str]  # sources besides `script` that the stage imports
+    deps: List[str]
+    args: List[str] = []
+    # Output file that receives the script's stdout (evaluation reports)
+    report: Optional[str] = None
+
+
+def _report_stage(name, script, code=()):
+    report = f'outputs/reports/{name}.txt'
+    return Stage(name, script, ['data/processed/clean_data.csv'], [report], list(code), ['clean'], report=report)
+
+
+STAGES = [
+    Stage('ingest', 'src/data/ingest.py',
+          inputs=['data/raw/results.xlsx'],
+          outputs=['data/interim/allData.parquet', 'data/interim/allData.csv', 'data/interim/OnlyPCOS.csv'],
+          code=[], deps=[]),
+    Stage('clean', 'src/data/datacleaning2.py',
+          inputs=['data/interim/allData.csv', 'data/interim/allData.parquet'],
+          outputs=['data/interim/data.csv', 'data/interim/data_final.csv',
+                   'data/processed/clean_data.csv', 'data/processed/clean_data.parquet'],
+          code=['src/data/cleaning.py', 'src/data/ingest.py'], deps=['ingest']),
+    Stage('select', 'src/models/model_selection.py',
+          inputs=['data/processed/clean_data.parquet'],
+          outputs=['outputs/model_selection/leaderboard.csv', 'outputs/model_selection/selected.json'],
+          code=['src/models/resampling.py', 'src/data/ingest.py', 'src/data/cleaning.py'], deps=['clean']),
+    Stage('train', 'src/models/train_best_model.py',
+          inputs=['data/processed/clean_data.parquet', 'outputs/model_selection/selected.json'],
+          outputs=['models/saved/pcos_model/model.joblib', 'models/saved/pcos_model/manifest.json',
+                   '../backend/models/pcos_model/model.joblib', '../backend/models/pcos_model/manifest.json'],
+          code=['src/models/artifact.py', 'src/models/calibration.py', 'src/models/model_selection.py',
+                'src/models/resampling.py', 'src/data/ingest.py', 'src/data/cleaning.py'],
+          deps=['clean', 'select']),
+    _report_stage('decisiontree', 'src/models/decisiontree.py'),
+    _report_stage('logisticregression', 'src/models/logisticregression.py'),
+    _report_stage('naivebayes', 'src/models/naivebayesprediction.py'),
+    _report_stage('knn', 'src/models/knnprediction.py', code=['src/models/knn.py']),
+]
+STAGES_BY_NAME = {stage.name: stage for stage in STAGES}
+
+
+# ──────────────────────────────────────────────
+# Hashing and the object store
+# ──────────────────────────────────────────────
+
+def _path(relative):
+    return os.path.normpath(os.path.join(project_root, relative))
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _package_versions():
+    versions = {}
+    for name in PACKAGES:
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+    return versions
+
+
+def stage_key(stage, versions):
+    missing = [p for p in stage.inputs if not os.path.exists(_path(p))]
+    if missing:
+        raise FileNotFoundError(f"{stage.name}: missing input(s) {', '.join(missing)}")
+    description = {
+        'stage': stage.name,
+        'command': [stage.script] + stage.args,
+        'inputs': {p: file_hash(_path(p)) for p in stage.inputs},
+        'code': {p: file_hash(_path(p)) for p in [stage.script] + stage.code},
+        'packages': versions,
+        'python': sys.version_info[:2],
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def _manifest_path(stage, key):
+    return os.path.join(cache_dir, 'stages', stage.name, key + '.json')
+
+
+def _object_path(digest):
+    return os.path.join(cache_dir, 'objects', digest[:2], digest)
+
+
+def _store(path):
+    digest = file_hash(path)
+    target = _object_path(digest)
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(path, target + '.tmp')
+        os.replace(target + '.tmp', target)
+    return digest
+
+
+def restore(stage, key, check_only=False):
+    """Bring the outputs recorded for `key` back into place.
+
+    Returns False if there is no record or an output can't be restored.
+    """
+    manifest = _manifest_path(stage, key)
+    if not os.path.exists(manifest):
+        return False
+    with open(manifest) as f:
+        recorded = json.load(f)['outputs']
+    if set(recorded) != set(stage.outputs):
+        return False
+
+    for relative, digest in recorded.items():
+        path = _path(relative)
+        if os.path.exists(path) and file_hash(path) == digest:
+            continue
+        if not os.path.exists(_object_path(digest)):
+            return False
+        if check_only:
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copy2(_object_path(digest), path)
+        print(f"  restored {relative}")
+    return True
+
+
+# ──────────────────────────────────────────────
+# Running
+# ──────────────────────────────────────────────
+
+def execute(stage):
+    script = _path(stage.script)
+    env = dict(os.environ, MPLBACKEND='Agg')  # no plot windows
+    command = [sys.executable, script] + stage.args
+    for relative in stage.outputs:
+        os.makedirs(os.path.dirname(_path(relative)), exist_ok=True)
+
+    if stage.report:
+        result = subprocess.run(command, cwd=os.path.dirname(script), env=env,
+                                stdout=subprocess.PIPE, text=True)
+        with open(_path(stage.report), 'w') as f:
+            f.write(result.stdout)
+    else:
+        result = subprocess.run(command, cwd=os.path.dirname(script), env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f"{stage.name}: {stage.script} exited with {result.returncode}")
+
+    missing = [p for p in stage.outputs if not os.path.exists(_path(p))]
+    if missing:
+        raise RuntimeError(f"{stage.name}: did not write {', '.join(missing)}")
+
+
+def run_stage(stage, versions, force=False, dry_run=False):
+    key = stage_key(stage, versions)
+    if not force and restore(stage, key, check_only=dry_run):
+        print(f"[{stage.name}] cached ({key[:12]})")
+        return False
+    if dry_run:
+        print(f"[{stage.name}] would run ({key[:12]})")
+        return True
+
+    print(f"[{stage.name}] running {stage.script}")
+    start = time.perf_counter()
+    execute(stage)
+    elapsed = time.perf_counter() - start
+
+    outputs = {relative: _store(_path(relative)) for relative in stage.outputs}
+    manifest = _manifest_path(stage, key)
+    os.makedirs(os.path.dirname(manifest), exist_ok=True)
+    with open(manifest, 'w') as f:
+        json.dump({'outputs': outputs, 'seconds': round(elapsed, 2), 'finished_at': time.time()}, f, indent=2)
+    print(f"[{stage.name}] done in {elapsed:.1f}s ({key[:12]})")
+    return True
+
+
+def plan(names, only=False):
+    """Requested stages plus (unless `only`) everything upstream, in order."""
+    wanted = set(names or STAGES_BY_NAME)
+    if not only:
+        pending = list(wanted)
+        while pending:
+            for dep in STAGES_BY_NAME[pending.pop()].deps:
+                if dep not in wanted:
+                    wanted.add(dep)
+                    pending.append(dep)
+    return [stage for stage in STAGES if stage.name in wanted]
+
+
+def list_stages(versions):
+    for stage in STAGES:
+        try:
+            key = stage_key(stage, versions)
+            state = 'cached' if os.path.exists(_manifest_path(stage, key)) else 'stale'
+        except FileNotFoundError:
+            state = 'waiting for inputs'
+        deps = f" <- {', '.join(stage.deps)}" if stage.deps else ''
+        print(f"{stage.name:<20} {state:<20} {stage.script}{deps}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('stages', nargs='*', metavar='stage',
+                        help=f"any of: {', '.join(STAGES_BY_NAME)} (default: all)")
+    parser.add_argument('--only', action='store_true', help="don't run upstream stages")
+    parser.add_argument('--force', action='store_true', help='re-run the named stages even if cached')
+    parser.add_argument('--dry-run', action='store_true', help='show what would run')
+    parser.add_argument('--list', action='store_true', help='show stages and cache state')
+    args = parser.parse_args()
+    unknown = [name for name in args.stages if name not in STAGES_BY_NAME]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    versions = _package_versions()
+    if args.list:
+        list_stages(versions)
+        return
+
+    forced = set(args.stages or STAGES_BY_NAME) if args.force else set()
+    ran = set()
+    try:
+        for stage in plan(args.stages, only=args.only):
+            if args.dry_run and ran.intersection(stage.deps):
+                # Its inputs don't exist yet, so neither does its key
+                print(f"[{stage.name}] would run if upstream outputs change")
+                ran.add(stage.name)
+                continue
+            if run_stage(stage, versions, force=stage.name in forced, dry_run=args.dry_run):
+                ran.add(stage.name)
+    except (FileNotFoundError, RuntimeError) as e:
+        parser.exit(1, f"Pipeline stopped: {e}\n")
+    print(f"{len(ran)} stage(s) {'to run' if args.dry_run else 'ran'}")
+
+
+if __name__ == '__main__':
+    main()